@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Post, Comment
+from .models import Post, Comment, Job
 
 admin.site.register(Post)
 admin.site.register(Comment)
+admin.site.register(Job)
@@ -0,0 +1,133 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.views import APIView
+
+from blog.api.views import (
+    ApprovedCommentsAPIView,
+    PostAPIView,
+    PostCommentsAPIView,
+    PublishedPostsAPIView,
+)
+
+
+# The ORM is synchronous, so database work runs on a bounded pool of worker
+# threads. The event loop keeps serving slow clients while at most
+# ASYNC_DB_THREADS queries run at once.
+database_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix="blog-async-db"
+)
+
+
+def run_in_database_thread(func):
+    """Wrap a sync function so it runs on the database pool when awaited."""
+
+    def wrapper(*args, **kwargs):
+        # Worker threads never see request_started/finished, so honour
+        # CONN_MAX_AGE and drop broken connections here instead.
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False, executor=database_executor)
+
+
+def detach_rendering(response):
+    """Return the response rendered, as a response Django will not render again.
+
+    Under ASGI Django renders every response with a render() method on its
+    single sync thread, a thread hop that serializes requests. The body is
+    rendered here, on the database pool, instead.
+    """
+
+    if not callable(getattr(response, "render", None)):
+        return response
+    response.render()
+    rendered = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    rendered.precompress_etag = getattr(response, "precompress_etag", None)
+    return rendered
+
+
+class AsyncAPIView(APIView):
+    """Base of the async versions of the read-only API views.
+
+    A subclass names the sync view as its next base. That view's get() runs
+    on the database pool with its authentication, permission and throttle
+    classes, so both versions answer alike: same caching, same conditional
+    responses, same checks.
+    """
+
+    http_method_names = ["get"]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """Return a coroutine function so Django runs the view on the event loop.
+
+        Django 3.2 only detects async function views, not async handler
+        methods on class-based views.
+        """
+
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        return functools.update_wrapper(async_view, view)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() not in self.http_method_names:
+            return HttpResponseNotAllowed(self._allowed_methods())
+        return self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return await run_in_database_thread(self.run_sync_get)(request, *args, **kwargs)
+
+    def run_sync_get(self, request, *args, **kwargs):
+        """APIView.dispatch with the sync view's get() as the handler."""
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            self.initial(request, *args, **kwargs)
+            response = super().get(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return detach_rendering(self.finalize_response(request, response, *args, **kwargs))
+
+
+class AsyncPublishedPostsAPIView(AsyncAPIView, PublishedPostsAPIView):
+    """Async version of PublishedPostsAPIView.
+
+    ?stream=1 is ignored: Django iterates a streamed body on the event loop,
+    where the queryset's iterator() may not query. A page is served instead.
+    """
+
+    def get_response(self, request, posts, list_query):
+        return self.get_paginated_posts_response(request, posts, ("published_date", "id"))
+
+
+class AsyncPostAPIView(AsyncAPIView, PostAPIView):
+    """Async version of PostAPIView.get."""
+
+
+class AsyncPostCommentsAPIView(AsyncAPIView, PostCommentsAPIView):
+    """Async version of PostCommentsAPIView."""
+
+
+class AsyncApprovedCommentsAPIView(AsyncAPIView, ApprovedCommentsAPIView):
+    """Async version of ApprovedCommentsAPIView."""
@@ -0,0 +1,172 @@
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from blog.cache import bump_version, get_version
+from blog.models import RevokedSignedToken
+
+
+SIGNED_TOKEN_SALT = "blog.api.signed-token"
+REVOCATIONS_VERSION_KEY = "blog:signed_token_revocations"
+
+# The version and ids of the revocations this process loaded last.
+revocations = (None, frozenset())
+
+
+class SignedToken:
+    """A verified signed token."""
+
+    def __init__(self, key_id, user_id, token_id):
+        self.key_id = key_id
+        self.user_id = user_id
+        self.token_id = token_id
+
+
+def get_signing_keys():
+    """Return the ``(key id, secret)`` pairs; the first one signs new tokens."""
+
+    return settings.SIGNED_TOKEN_KEYS
+
+
+def issue_signed_token(user):
+    """Return a new signed token for the user."""
+
+    key_id, secret = get_signing_keys()[0]
+    payload = {"u": user.pk, "j": secrets.token_hex(8)}
+    return key_id + ":" + signing.dumps(payload, key=secret, salt=SIGNED_TOKEN_SALT)
+
+
+def verify_signed_token(token):
+    """Return the SignedToken for a token string or raise signing.BadSignature."""
+
+    key_id, _, signed = token.partition(":")
+    secret = dict(get_signing_keys()).get(key_id)
+    if secret is None or not signed:
+        raise signing.BadSignature("Unknown signing key.")
+    payload = signing.loads(
+        signed, key=secret, salt=SIGNED_TOKEN_SALT, max_age=settings.SIGNED_TOKEN_MAX_AGE
+    )
+    return SignedToken(key_id, payload["u"], payload["j"])
+
+
+def get_user_revocation_id(user_id):
+    """Return the revocation id that rejects all tokens of a user."""
+
+    return f"user:{user_id}"
+
+
+def get_revoked_token_ids():
+    """Return the ids of the revoked tokens and users.
+
+    Loaded from RevokedSignedToken once per process and again only after
+    a revocation bumped their version in the cache, so checking a token
+    costs a cache read.
+    """
+
+    global revocations
+    # Read before the rows: a revocation committed in between bumps it again.
+    version = get_version(REVOCATIONS_VERSION_KEY)
+    if revocations[0] != version:
+        token_ids = RevokedSignedToken.objects.filter(expires_date__gte=timezone.now()).values_list("token_id", flat=True)
+        revocations = (version, frozenset(token_ids))
+    return revocations[1]
+
+
+def invalidate_revocations():
+    """Bump the revocations version now and again once the transaction commits."""
+
+    bump_version(REVOCATIONS_VERSION_KEY)
+    transaction.on_commit(lambda: bump_version(REVOCATIONS_VERSION_KEY))
+
+
+def revoke(revocation_id):
+    now = timezone.now()
+    RevokedSignedToken.objects.filter(expires_date__lt=now).delete()
+    RevokedSignedToken.objects.update_or_create(
+        token_id=revocation_id,
+        defaults={"expires_date": now + timedelta(seconds=settings.SIGNED_TOKEN_MAX_AGE)},
+    )
+    invalidate_revocations()
+
+
+def revoke_signed_token(token):
+    """Reject a SignedToken until it would have expired anyway."""
+
+    revoke(token.token_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def revoke_user_tokens(sender, instance, signal, raw=False, **kwargs):
+    """Reject the tokens of deactivated and deleted users, accept them again on reactivation."""
+
+    if raw:
+        return
+    revocation_id = get_user_revocation_id(instance.pk)
+    if signal is post_delete or not instance.is_active:
+        revoke(revocation_id)
+    elif revocation_id in get_revoked_token_ids():
+        RevokedSignedToken.objects.filter(token_id=revocation_id).delete()
+        invalidate_revocations()
+
+
+class SignedTokenUser(SimpleLazyObject):
+    """The user of a signed token, loaded from the database on first use.
+
+    Authenticated without loading, so a view that only checks
+    is_authenticated, as IsAuthenticated does, runs no query for it.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Signed token authentication.
+
+    Clients pass a token issued by the signed token endpoint:
+
+        Authorization: Signed <token>
+
+    The signature and expiry are checked in memory, the revocations from a
+    per-process set kept current through the cache: revoking a token or
+    deactivating its user takes effect on the next request, and a request
+    that does not read request.user runs no query to authenticate.
+    """
+
+    keyword = "Signed"
+
+    def authenticate_credentials(self, key):
+        try:
+            token = verify_signed_token(key)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed("Token expired.")
+        except (signing.BadSignature, KeyError, TypeError):
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        revoked = get_revoked_token_ids()
+        if get_user_revocation_id(token.user_id) in revoked:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        if token.token_id in revoked:
+            raise exceptions.AuthenticationFailed("Token revoked.")
+
+        def get_user():
+            user = get_user_model().objects.filter(pk=token.user_id).first()
+            if user is None or not user.is_active:
+                raise exceptions.AuthenticationFailed("User inactive or deleted.")
+            return user
+
+        return (SignedTokenUser(get_user), token)
@@ -0,0 +1,102 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from blog.api.fragments import EncodedJSONResponse
+from blog.cache import get_content_version, public_cache
+from blog.compression import get_precompressed_response
+
+
+def make_etag(request, *parts):
+    """Return a quoted ETag for the request's query string and the given parts."""
+
+    value = "|".join(str(part) for part in (request.get_full_path(), *parts))
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    """Answer conditional GETs with 304 before the body is built.
+
+    ``get_response`` is only called when the client's copy is stale and
+    no compressed copy of this version is cached, see blog.compression. The
+    ETag and Last-Modified headers are set on whichever response is returned.
+    """
+
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = get_precompressed_response(request, etag)
+    if response is None:
+        response = get_response()
+        # Lets CompressionMiddleware cache the compressed body of this version.
+        response.precompress_etag = etag
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+    return response
+
+
+def get_list_etag(request, version=None):
+    """Return the ETag of a list of public content, without a query.
+
+    Every change to a post or an approved comment bumps the content version,
+    see blog.cache. Lists carry no Last-Modified: deleting a row leaves the
+    newest timestamp of the rest unchanged.
+    """
+
+    return make_etag(request, get_content_version() if version is None else version)
+
+
+def get_queryset_etag(request, queryset, timestamp_fields=("updated_date",)):
+    """Return the ETag of a list of rows that change without a version bump.
+
+    Computed from one aggregate query: the row count catches deletions, the
+    newest timestamps catch edits.
+    """
+
+    aggregates = {"count": Count("pk")}
+    for i, field in enumerate(timestamp_fields):
+        aggregates[f"max_{i}"] = Max(field)
+    state = queryset.order_by().aggregate(**aggregates)
+    return make_etag(request, *(state[name] for name in sorted(state)))
+
+
+def conditional_list_response(request, get_response):
+    """Conditional response for a list of public content, see get_list_etag."""
+
+    return conditional_response(request, get_list_etag(request), None, get_response)
+
+
+def conditional_queryset_response(request, queryset, get_response, timestamp_fields=("updated_date",)):
+    """Conditional response for a list, validated with one aggregate query."""
+
+    return conditional_response(request, get_queryset_etag(request, queryset, timestamp_fields), None, get_response)
+
+
+def cached_list_response(request, get_response):
+    """conditional_list_response for public lists, cached in blog.cache.public_cache.
+
+    A cache hit answers without any query. Only 200 responses of encoded
+    JSON are cached, per URL, until the next content version.
+    """
+
+    # Read once, before any row: the entry is stored under the version the
+    # rows were current at, never under one a concurrent write bumped to.
+    version = get_content_version()
+    key = request.get_full_path()
+    entry = public_cache.get(key, version)
+    if entry is not None:
+        return conditional_response(request, entry["etag"], None, lambda: EncodedJSONResponse(entry["content"]))
+
+    etag = get_list_etag(request, version)
+
+    def get_cached_response():
+        response = get_response()
+        if response.status_code == 200 and isinstance(response, EncodedJSONResponse):
+            public_cache.set(key, {"etag": etag, "content": response.content}, version)
+        return response
+
+    return conditional_response(request, etag, None, get_cached_response)
@@ -0,0 +1,41 @@
+from operator import attrgetter
+
+from django.db.models.functions import Length, Substr
+
+
+EXCERPT_PARAM = "excerpt"
+MAX_EXCERPT_LENGTH = 5000
+
+
+class InvalidExcerpt(ValueError):
+    """Raised when ?excerpt= is not a usable length."""
+
+
+def get_excerpt_length(request):
+    """Return the ?excerpt= length of the request, or None for the full text."""
+
+    value = request.GET.get(EXCERPT_PARAM)
+    if value is None:
+        return None
+    try:
+        length = int(value)
+    except ValueError:
+        raise InvalidExcerpt("excerpt must be a number.")
+    if not 1 <= length <= MAX_EXCERPT_LENGTH:
+        raise InvalidExcerpt(f"excerpt must be between 1 and {MAX_EXCERPT_LENGTH}.")
+    return length
+
+
+def annotate_excerpt(queryset, length):
+    """Cut the text in the database, so the full text never leaves it."""
+
+    return queryset.annotate(text_excerpt=Substr("text", 1, length), text_length=Length("text"))
+
+
+def get_excerpt_fields(fieldset, length):
+    """Return the field set with ``text`` read from the excerpt and a ``truncated`` flag."""
+
+    return fieldset.replace(
+        text=((), attrgetter("text_excerpt")),
+        truncated=((), lambda instance: instance.text_length > length),
+    )
@@ -0,0 +1,76 @@
+FIELDS_PARAM = "fields"
+
+
+class InvalidFields(ValueError):
+    """Raised when ?fields= names a field the endpoint does not have."""
+
+
+class FieldSet:
+    """The fields an API object can be serialized with.
+
+    ``fields`` maps each field name to ``(columns, get_value)``: the model
+    columns the field reads and a function returning its value from an
+    instance. ``nested`` maps a field to the FieldSet of the object it
+    embeds, so ``?fields=post.title`` selects fields of the embedded post.
+
+    ``name`` identifies the field set in fragment cache keys.
+
+    A selection is None for all fields, or a dict of the selected field
+    names, each with the selection of its nested object. The id is always
+    selected.
+    """
+
+    def __init__(self, fields, nested=None, name=None):
+        self.fields = fields
+        self.nested = nested or {}
+        self.name = name
+
+    def parse(self, value):
+        """Return the selection of a comma-separated ?fields= value."""
+
+        if value is None:
+            return None
+        selected = {"id": None}
+        for item in value.split(","):
+            name, dot, nested_name = item.strip().partition(".")
+            if not name:
+                continue
+            if name not in self.fields or (dot and nested_name not in self.nested.get(name, FieldSet({})).fields):
+                raise InvalidFields(f"Unknown field: {item.strip()}.")
+            if not dot:
+                selected[name] = None
+            elif name not in selected or selected[name] is not None:
+                selected.setdefault(name, []).append(nested_name)
+
+        selection = {}
+        for name in self.fields:
+            if name in selected:
+                nested = selected[name]
+                selection[name] = None if nested is None else self.nested[name].parse(",".join(nested))
+        return selection
+
+    def get_selection(self, request):
+        """Return the selection the request asks for with ?fields=."""
+
+        return self.parse(request.GET.get(FIELDS_PARAM))
+
+    def get_columns(self, selection, extra=()):
+        """Return the columns the selected fields read, always with the id."""
+
+        columns = {"id", *extra}
+        for name in selection or self.fields:
+            columns.update(self.fields[name][0])
+        return sorted(columns)
+
+    def restrict(self, queryset, selection, extra=()):
+        """Load only the columns the selected fields and ``extra`` need."""
+
+        return queryset.only(*self.get_columns(selection, extra))
+
+    def replace(self, **fields):
+        """Return a copy with the given fields replaced or added."""
+
+        return FieldSet({**self.fields, **fields}, self.nested, self.name)
+
+    def serialize(self, instance, selection=None):
+        return {name: self.fields[name][1](instance) for name in selection or self.fields}
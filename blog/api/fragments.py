@@ -0,0 +1,155 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.functional import cached_property
+from rest_framework.utils.encoders import JSONEncoder
+
+from blog.cache import get_content_version, get_post_versions
+
+
+# The same output as DRF's JSONRenderer with its default settings.
+encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def encode(data):
+    return encoder.encode(data)
+
+
+def get_shape(name, fields=None, *extra):
+    """Name the serialized form of an object: its field set, fields and options.
+
+    Fragments of different shapes never share a cache key.
+    """
+
+    options = json.dumps([fields, extra], sort_keys=True)
+    return f"{name}:{hashlib.md5(options.encode()).hexdigest()[:12]}"
+
+
+class FragmentCache:
+    """A per-process LRU of the encoded JSON of single objects.
+
+    Each entry is keyed by shape and object id and holds the version of the
+    post its object belongs to, see blog.cache, and the content version it
+    was last found current at. While the content version does not move all
+    entries are current, so a warm lookup costs one read of the shared
+    cache. After a change the post versions of the entries looked up are
+    read with one get_many and only the entries of changed posts are built
+    again.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get_many(self, keys):
+        """Return the (post_version, content_version, fragment) entries of ``keys`` that are cached."""
+
+        found = {}
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    found[key] = entry
+        return found
+
+    def set_many(self, entries):
+        with self.lock:
+            for key, entry in entries.items():
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+fragment_cache = FragmentCache(settings.FRAGMENT_CACHE_MAX_ENTRIES)
+
+
+def get_fragments(shape, items, get_post_id, serialize):
+    """Return the encoded JSON of each item, from fragment_cache where possible.
+
+    ``get_post_id(item)`` returns the post whose version covers the item.
+    ``serialize(items)`` is called once with the items whose fragment is
+    not current and returns their data in the same order.
+    """
+
+    content_version = get_content_version()
+    keys = [(shape, item.pk) for item in items]
+    entries = fragment_cache.get_many(keys)
+    fragments = {}
+    unchecked = []
+    for key, item in zip(keys, items):
+        entry = entries.get(key)
+        if entry is not None and entry[1] == content_version:
+            fragments[key] = entry[2]
+        else:
+            unchecked.append((key, item))
+    if not unchecked:
+        return [fragments[key] for key in keys]
+
+    # Versions are read before the rows, a change in between only makes the
+    # new entries stale.
+    post_versions = get_post_versions({get_post_id(item) for key, item in unchecked})
+    updated = {}
+    missing = []
+    for key, item in unchecked:
+        entry = entries.get(key)
+        post_version = post_versions[get_post_id(item)]
+        if entry is not None and entry[0] == post_version:
+            updated[key] = (post_version, content_version, entry[2])
+        else:
+            missing.append((key, item))
+    if missing:
+        data = serialize([item for key, item in missing])
+        for (key, item), item_data in zip(missing, data):
+            updated[key] = (post_versions[get_post_id(item)], content_version, encode(item_data))
+    fragment_cache.set_many(updated)
+    fragments.update((key, entry[2]) for key, entry in updated.items())
+    return [fragments[key] for key in keys]
+
+
+class EncodedJSONResponse(HttpResponse):
+    """Response of JSON that is encoded already.
+
+    Like DRF's Response, ``.data`` gives the decoded body.
+    """
+
+    def __init__(self, content, status=200):
+        super().__init__(content, content_type="application/json", status=status)
+
+    @cached_property
+    def data(self):
+        return json.loads(self.content)
+
+    def render(self):
+        # The body is complete already; kept so it can stand in for a Response.
+        return self
+
+
+class FragmentJSONResponse(EncodedJSONResponse):
+    """JSON response assembled from encoded fragments.
+
+    ``data`` is the response envelope; the value under ``list_key`` is a list
+    of fragments and is spliced in as it is. Without a ``list_key`` ``data``
+    itself is the list of fragments.
+    """
+
+    def __init__(self, data, list_key=None, status=200):
+        if list_key is None:
+            body = "[" + ",".join(data) + "]"
+        else:
+            members = []
+            for key, value in data.items():
+                value = "[" + ",".join(value) + "]" if key == list_key else encode(value)
+                members.append(f"{encode(key)}:{value}")
+            body = "{" + ",".join(members) + "}"
+        super().__init__(body.encode(), status=status)
@@ -0,0 +1,128 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+class KeysetPagination:
+    """Cursor pagination on a (timestamp, id) key.
+
+    Each page is fetched with a ``WHERE (key) > (cursor) ORDER BY key LIMIT n``
+    query, so the cost of a page does not grow with how deep the client pages.
+    Query parameters are read from ``request.GET`` so both DRF and plain
+    Django requests can be paginated.
+
+    Responses carry ``page_size``, the number of rows on the page, and no
+    total: counting every row would cost what keyset paging saves. Clients
+    page by following ``next`` until it is null.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE", 10)
+    max_page_size = 100
+
+    def __init__(self, ordering=("published_date", "id")):
+        self.ordering = ordering
+
+    def get_page_size(self, request):
+        """Return the requested page size, clamped to max_page_size."""
+
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, instance, reverse):
+        """Return an opaque cursor pointing at the given row."""
+
+        timestamp = getattr(instance, self.ordering[0])
+        payload = {"k": [timestamp.isoformat(), instance.pk], "r": reverse}
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Return ``(timestamp, pk, reverse)`` for a cursor string."""
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            timestamp, pk = payload["k"]
+            timestamp = parse_datetime(timestamp)
+            pk = int(pk)
+            reverse = bool(payload["r"])
+        except (TypeError, ValueError, KeyError):
+            raise InvalidCursor("Invalid cursor.")
+        if timestamp is None:
+            raise InvalidCursor("Invalid cursor.")
+        return timestamp, pk, reverse
+
+    def paginate_queryset(self, queryset, request):
+        """Return the rows of the requested page as a list."""
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        field, tiebreak = self.ordering
+
+        cursor = request.GET.get(self.cursor_query_param)
+        reverse = False
+        if cursor:
+            timestamp, pk, reverse = self.decode_cursor(cursor)
+            lookup = "lt" if reverse else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": timestamp})
+                | Q(**{field: timestamp, f"{tiebreak}__{lookup}": pk})
+            )
+
+        if reverse:
+            queryset = queryset.order_by(f"-{field}", f"-{tiebreak}")
+        else:
+            queryset = queryset.order_by(field, tiebreak)
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving forwards there is a previous page whenever we came from a
+        # cursor; moving backwards there is always a next page.
+        self.has_next = has_more if not reverse else True
+        self.has_previous = bool(cursor) if not reverse else has_more
+        self.rows = rows
+        return rows
+
+    def get_link(self, instance, reverse):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(instance, reverse))
+        return url
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.get_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.get_link(self.rows[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        """Wrap a page of serialized rows in the list response envelope."""
+
+        return {
+            "data": data,
+            "page_size": len(data),
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+        }
@@ -1,6 +1,15 @@
 from blog.models import Post, Comment
 
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    CharField,
+    ChoiceField,
+    DateTimeField,
+    IntegerField,
+    ListField,
+    ModelSerializer,
+    Serializer,
+    ValidationError,
+)
 
 
 class PostSerializer(ModelSerializer):
@@ -13,4 +22,44 @@ class CommentSerializer(ModelSerializer):
     
     class Meta:
         model = Comment
-        fields = ["id", "post",  "author", "text",]
\ No newline at end of file
+        fields = ["id", "post",  "author", "text",]
+
+
+class PostBulkSerializer(PostSerializer):
+    """PostSerializer that leaves the author lookup to the bulk view."""
+
+    author = IntegerField(min_value=1)
+
+
+class CommentBulkSerializer(CommentSerializer):
+    """CommentSerializer that leaves the post lookup to the bulk view."""
+
+    post = IntegerField(min_value=1)
+
+
+class CommentModerationSerializer(Serializer):
+    """Selects comments to moderate by ``ids`` or by a filter, not both."""
+
+    FILTERS = ["post", "author", "created_before"]
+
+    action = ChoiceField(choices=["approve", "delete"])
+    ids = ListField(child=IntegerField(min_value=1), min_length=1, max_length=1000, required=False)
+    post = IntegerField(min_value=1, required=False)
+    author = CharField(max_length=200, required=False)
+    created_before = DateTimeField(required=False)
+
+    def validate(self, data):
+        filters = [name for name in self.FILTERS if name in data]
+        if ("ids" in data) == bool(filters):
+            raise ValidationError("Give either ids or at least one of %s." % ", ".join(self.FILTERS))
+        return data
+
+    def get_queryset(self):
+        """Return the selected comments."""
+        data = self.validated_data
+        if "ids" in data:
+            return Comment.objects.filter(pk__in=data["ids"])
+        lookups = {"post": "post_id", "author": "author", "created_before": "created_date__lt"}
+        return Comment.objects.filter(**{
+            lookups[name]: data[name] for name in self.FILTERS if name in data
+        })
@@ -0,0 +1,43 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+STREAM_CHUNK_SIZE = 500
+
+
+def is_streaming_request(request):
+    """Check if the client asked for a streamed response with ?stream=1."""
+
+    return request.query_params.get("stream") in ("1", "true")
+
+
+def iter_json_array(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield a JSON array of items, a chunk of items at a time."""
+
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    yield "["
+    buffer = []
+    first = True
+    for item in items:
+        buffer.append(encoder.encode(item))
+        if len(buffer) >= chunk_size:
+            yield ("" if first else ",") + ",".join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield ("" if first else ",") + ",".join(buffer)
+    yield "]"
+
+
+def streaming_json_response(queryset, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """Return a response that streams the queryset as a JSON array.
+
+    Rows are read with a server-side cursor in chunks, so memory use stays
+    flat however many rows the queryset matches.
+    """
+
+    items = (serialize(row) for row in queryset.iterator(chunk_size=chunk_size))
+    return StreamingHttpResponse(
+        iter_json_array(items, chunk_size),
+        content_type="application/json",
+    )
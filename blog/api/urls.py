@@ -1,15 +1,29 @@
 from django.urls import path
+from blog.api.async_views import (
+    AsyncPublishedPostsAPIView,
+    AsyncPostAPIView,
+    AsyncPostCommentsAPIView,
+    AsyncApprovedCommentsAPIView,
+)
 from blog.api.views import (
     PublishedPostsAPIView, 
     PostPublishingAPIView, 
     UnpublishedPostsAPIView, 
     PostAPIView, 
+    PostBulkAPIView,
     ListAPIView, 
     CommentAPIView,
     CommentsAPIView,
+    CommentBulkAPIView,
     ApprovedCommentsAPIView,
     ApprovingCommentAPIView,
+    CommentModerationAPIView,
     CustomAuthToken,
+    SignedAuthToken,
+    SearchAPIView,
+    SQLStatsAPIView,
+    CompressionStatsAPIView,
+    CacheStatsAPIView,
     PostCommentsAPIView
 )
 
@@ -21,12 +35,25 @@ urlpatterns = [
     path("post/publish/<int:post_id>/", PostPublishingAPIView.as_view()), #publishing post
     path("post/unpublished/", UnpublishedPostsAPIView.as_view()),
     path("posts/", PostAPIView.as_view()), #creating post
-    path("posts/<int:pk>/", PostAPIView.as_view()), #reading, updating and deleting posts
+    path("posts/<int:post_id>/", PostAPIView.as_view()), #reading, updating and deleting posts
+    path("posts/bulk/", PostBulkAPIView.as_view()), #creating many posts
     path("comments/<int:comment_id>/", CommentAPIView.as_view()), #accessing comment
     path("comment/new/", CommentsAPIView.as_view()), #creating comment
+    path("comments/bulk/", CommentBulkAPIView.as_view()), #creating many comments
     path("approve/comment/<int:comment_id>/", ApprovingCommentAPIView.as_view()), #approving comment
+    path("comments/moderate/", CommentModerationAPIView.as_view()), #approving or deleting many comments
     path("comments/approved/", ApprovedCommentsAPIView.as_view()), #reading comment
     path('api-token-auth/', CustomAuthToken.as_view()),#Adding token for the user
-    path('post/<int:post_id>/comments/', PostCommentsAPIView.as_view())
+    path('api-signed-token-auth/', SignedAuthToken.as_view()),#Issuing and revoking signed tokens
+    path('post/<int:post_id>/comments/', PostCommentsAPIView.as_view()),
+    path("search/", SearchAPIView.as_view()), #searching published posts
+    path("stats/sql/", SQLStatsAPIView.as_view()), #per-route query stats, staff only
+    path("stats/compression/", CompressionStatsAPIView.as_view()), #compression stats, staff only
+    path("stats/cache/", CacheStatsAPIView.as_view()), #public cache stats, staff only
+    # Async read endpoints, served best by the ASGI application in mysite/asgi.py
+    path("async/post/published/", AsyncPublishedPostsAPIView.as_view()),
+    path("async/posts/<int:post_id>/", AsyncPostAPIView.as_view()),
+    path("async/post/<int:post_id>/comments/", AsyncPostCommentsAPIView.as_view()),
+    path("async/comments/approved/", AsyncApprovedCommentsAPIView.as_view()),
 
 ]
\ No newline at end of file
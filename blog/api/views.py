@@ -1,75 +1,288 @@
-from blog.api.serializers import PostSerializer, CommentSerializer
+from operator import attrgetter
+
+from blog.api.authentication import SignedToken, issue_signed_token, revoke_signed_token
+from blog.api.conditional import (
+    cached_list_response,
+    conditional_list_response,
+    conditional_queryset_response,
+    conditional_response,
+    make_etag,
+)
+from blog.api.excerpts import InvalidExcerpt, annotate_excerpt, get_excerpt_fields, get_excerpt_length
+from blog.api.fieldsets import FieldSet, InvalidFields
+from blog.api.fragments import FragmentJSONResponse, encode, get_fragments, get_shape
+from blog.api.pagination import InvalidCursor, KeysetPagination
+from blog.api.serializers import (
+    PostSerializer,
+    CommentSerializer,
+    PostBulkSerializer,
+    CommentBulkSerializer,
+    CommentModerationSerializer,
+)
+from blog.api.streaming import is_streaming_request, streaming_json_response
+from blog.cache import invalidate_content, public_cache
+from blog.compression import compression_stats
+from blog.middleware import route_stats
 from blog.models import Post, Comment
+from blog.search import search
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.utils.urls import replace_query_param
+
+
+POST_LIST_FIELDS = FieldSet({
+    "id": (("id",), attrgetter("id")),
+    "title": (("title",), attrgetter("title")),
+    "text": (("text",), attrgetter("text")),
+    "excerpt": (("excerpt",), attrgetter("excerpt")),
+    "is_published": (("published_date",), Post.is_published),
+}, name="post_list")
+
+POST_FIELDS = FieldSet({
+    "id": (("id",), attrgetter("id")),
+    "title": (("title",), attrgetter("title")),
+    "text": (("text",), attrgetter("text")),
+    "author": (("author",), attrgetter("author_id")),
+    "is_published": (("published_date",), Post.is_published),
+}, name="post")
+
+# Only the post itself carries its HTML, not every comment embedding it.
+POST_DETAIL_FIELDS = FieldSet({
+    **POST_FIELDS.fields,
+    "rendered_html": (("rendered_html",), attrgetter("rendered_html")),
+}, name="post_detail")
+
+COMMENT_FIELDS = FieldSet({
+    "id": (("id",), attrgetter("id")),
+    "post": (("post",), attrgetter("post_id")),
+    "author": (("author",), attrgetter("author")),
+    "text": (("text",), attrgetter("text")),
+    "is_approved": (("approved_comment",), Comment.is_approved),
+}, nested={"post": POST_FIELDS}, name="comment")
 
 
 class PostsDataMixin:
-    """Mixin for getting posts data."""
+    """Mixin for getting posts data.
 
-    def get_posts_data(self, posts):
-        """Get posts data from posts queryset."""
-        
-        posts_data = []
-        for post in posts:
-            data = {
-                "id": post.id, 
-                "title": post.title, 
-                "text": post.text,
-                "is_published": post.is_published(),
-                }
-            posts_data.append(data)
+    Every view takes ``?fields=`` to select the returned fields; only the
+    columns those fields need are loaded. List views also take
+    ``?excerpt=N`` to return the first N characters of the text.
+
+    List responses are assembled from the cached JSON of each object, see
+    blog.api.fragments.
+    """
+
+    post_list_fields = POST_LIST_FIELDS
+    post_fields = POST_FIELDS
+
+    def get_paginated_posts_response(self, request, posts, ordering):
+        """Return a keyset paginated response for the posts queryset.
+
+        The page itself only reads ids and the ordering columns; only posts
+        without a current fragment are loaded and serialized.
+        """
 
-        return posts_data
+        paginator = KeysetPagination(ordering)
+        try:
+            query, fieldset, fields, shape = self.get_post_list_query(
+                request, posts, self.post_list_fields, ordering
+            )
+            page = paginator.paginate_queryset(posts.only("id", *ordering), request)
+        except (InvalidCursor, InvalidFields, InvalidExcerpt) as exc:
+            return self.get_invalid_query_response(exc)
+        fragments = self.get_post_fragments(page, query, fieldset, fields, shape)
+        return FragmentJSONResponse(paginator.get_paginated_data(fragments), list_key="data")
+
+    def get_post_list_query(self, request, posts, fieldset, ordering=()):
+        """Apply the request's ?fields= and ?excerpt= to a posts queryset.
+
+        Return the restricted queryset, the field set to serialize the posts
+        with, the selected fields and the shape naming that serialization.
+        """
+
+        fields = fieldset.get_selection(request)
+        excerpt_length = get_excerpt_length(request)
+        if excerpt_length is not None:
+            fieldset = get_excerpt_fields(fieldset, excerpt_length)
+            posts = annotate_excerpt(posts, excerpt_length)
+            if fields is not None and "text" in fields:
+                fields["truncated"] = None
+        posts = fieldset.restrict(posts, fields, ordering)
+        return posts, fieldset, fields, get_shape(fieldset.name, fields, excerpt_length)
+
+    def get_post_fragments(self, page, posts, fieldset, fields, shape):
+        """Return the encoded JSON of the page's posts.
+
+        ``page`` needs ids only; posts without a current fragment are
+        loaded from the ``posts`` queryset.
+        """
+
+        def serialize(missing):
+            loaded = posts.in_bulk([post.pk for post in missing])
+            return [fieldset.serialize(loaded[post.pk], fields) if post.pk in loaded else None for post in missing]
+
+        return get_fragments(shape, page, attrgetter("pk"), serialize)
+
+    def get_post_list_item(self, post, fields=None):
+        """Return the data of a post as shown in post lists."""
+
+        return self.post_list_fields.serialize(post, fields)
     
-    def get_post_data(self, post):
+    def get_post_data(self, post, fields=None):
         """Return individual post data."""
         
-        data = {
-            "id": post.id, 
-            "title": post.title, 
-            "text": post.text, 
-            "author": post.author.id,
-            "is_published": post.is_published()
-            }
-        return data
+        return self.post_fields.serialize(post, fields)
+
+    def get_invalid_query_response(self, exc):
+        error_response = {
+            "title": "Error",
+            "message": str(exc)
+        }
+        return Response(error_response, status=400)
     
     
 class CommentsDataMixin(PostsDataMixin):
     """Mixin for getting comment data."""
+
+    comment_fields = COMMENT_FIELDS
+
+    def get_posts_data_by_id(self, post_ids, fields=None):
+        """Return post data keyed by post id, loading all posts in one query.
+
+        Each post is serialized once however many comments point at it.
+        """
+
+        posts = self.post_fields.restrict(Post.objects.all(), fields).in_bulk(post_ids)
+        return {post_id: self.get_post_data(post, fields) for post_id, post in posts.items()}
     
-    def get_comments_data(self, comments):
-        """Get comment data from comment queryset."""
-        
-        comments_data = []
-        for comment in comments:
-            data = {
-                "id": comment.id,
-                "post": self.get_post_data(comment.post),
-                "author": comment.author, 
-                "text": comment.text,
-                "is_approved": comment.is_approved()
-                }
-            comments_data.append(data)
+    def get_comments_data(self, comments, fields=None):
+        """Get comment data from comment queryset, with the post data embedded."""
         
+        return self.serialize_comments(list(self.comment_fields.restrict(comments, fields)), fields)
+
+    def get_comment_fragments(self, comments, fields=None):
+        """Return the encoded JSON of the comments in the queryset.
+
+        Approved comments change their post's version, so an approved
+        comment's fragment, which embeds its post, is current as long as the
+        post's version is. Pending comments change no version and are
+        serialized every time. Posts are only loaded for comments without a
+        current fragment.
+        """
+
+        comments = list(self.comment_fields.restrict(comments, fields, ("post", "approved_comment")))
+        approved = [comment for comment in comments if comment.approved_comment]
+        pending = [comment for comment in comments if not comment.approved_comment]
+        shape = get_shape(self.comment_fields.name, fields)
+        fragments = dict(zip(approved, get_fragments(
+            shape, approved, attrgetter("post_id"), lambda missing: self.serialize_comments(missing, fields)
+        )))
+        if pending:
+            fragments.update(zip(pending, map(encode, self.serialize_comments(pending, fields))))
+        return [fragments[comment] for comment in comments]
+
+    def serialize_comments(self, comments, fields=None):
+        """Serialize a list of comments, loading their posts in one query."""
+
+        comments_data = [self.comment_fields.serialize(comment, fields) for comment in comments]
+        if fields is None or "post" in fields:
+            post_fields = None if fields is None else fields["post"]
+            posts_data = self.get_posts_data_by_id({comment.post_id for comment in comments}, post_fields)
+            for data in comments_data:
+                data["post"] = posts_data[data["post"]]
         return comments_data
     
-    def get_comment_data(self, comment):
+    def get_comment_data(self, comment, fields=None):
         """Return individual comment data."""
         
-        data = {
-            "id": comment.id, 
-            "post": comment.post.id,
-            "author": comment.author,
-            "text": comment.text,
-            "is_approved": comment.is_approved()
-            }
-        return data
+        return self.comment_fields.serialize(comment, fields)
             
     
+class BulkCreateMixin:
+    """Mixin for creating many objects from one JSON array.
+
+    Every item is validated on its own, foreign keys are checked with one
+    query per related model and the valid items are inserted with a single
+    bulk_create in one transaction. Backends that cannot return ids from a
+    bulk insert (SQLite) report ``"id": None`` for the created objects.
+    """
+
+    max_bulk_items = 1000
+
+    def get_bulk_relations(self):
+        """Return the related model of each foreign key field to check."""
+        return {}
+
+    def prepare_bulk_object(self, instance):
+        """Fill what save() would before the instance is bulk inserted."""
+
+    def bulk_create(self, request):
+        """Validate and insert the items of request.data."""
+
+        items = request.data
+        if not isinstance(items, list) or not items or len(items) > self.max_bulk_items:
+            error_response = {
+                "title": "Error",
+                "message": "Expected a list of 1 to %d objects." % self.max_bulk_items
+            }
+            return Response(error_response, status=400)
+
+        relations = self.get_bulk_relations()
+        results = [None] * len(items)
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = self.bulk_serializer_class(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                results[index] = {"index": index, "status": 400, "errors": serializer.errors}
+
+        for field, model in relations.items():
+            ids = {data[field] for data in valid.values()}
+            existing = set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+            for index, data in list(valid.items()):
+                if data[field] not in existing:
+                    errors = {field: ["Invalid pk \"%s\" - object does not exist." % data[field]]}
+                    results[index] = {"index": index, "status": 400, "errors": errors}
+                    del valid[index]
+
+        model = self.bulk_serializer_class.Meta.model
+        objects = {}
+        for index, data in valid.items():
+            fields = {
+                (field + "_id" if field in relations else field): value
+                for field, value in data.items()
+            }
+            objects[index] = model(**fields)
+            self.prepare_bulk_object(objects[index])
+        with transaction.atomic():
+            model.objects.bulk_create(objects.values(), batch_size=500)
+            # bulk_create sends no signals.
+            invalidate_content()
+
+        for index, instance in objects.items():
+            results[index] = {"index": index, "status": 201, "data": self.get_bulk_item_data(instance)}
+
+        if not objects:
+            status = 400
+        elif len(objects) < len(items):
+            status = 207
+        else:
+            status = 201
+        response = {
+            "title": "Success!" if objects else "Error",
+            "message": "Created %d of %d objects." % (len(objects), len(items)),
+            "data": results
+        }
+        return Response(response, status=status)
+
+
 class  PublishedPostsAPIView(PostsDataMixin, APIView):
     """Get all published posts."""
     
@@ -78,13 +291,67 @@ class  PublishedPostsAPIView(PostsDataMixin, APIView):
     def get(self, request, *args, **kwargs):
         """Get all published posts data."""
         
-        posts = Post.objects.exclude(published_date=None)
-        posts_data = self.get_posts_data(posts)
-        response = {
-            "data": posts_data, 
-            "count": len(posts_data)
+        posts = Post.objects.filter(published_date__isnull=False)
+        try:
+            list_query = self.get_post_list_query(request, posts, self.post_list_fields)
+        except (InvalidFields, InvalidExcerpt) as exc:
+            return self.get_invalid_query_response(exc)
+        return cached_list_response(request, lambda: self.get_response(request, posts, list_query))
+
+    def get_response(self, request, posts, list_query):
+        if is_streaming_request(request):
+            posts, fieldset, fields, shape = list_query
+            posts = posts.order_by("published_date", "id")
+            return streaming_json_response(posts, lambda post: fieldset.serialize(post, fields))
+        return self.get_paginated_posts_response(request, posts, ("published_date", "id"))
+
+
+class SearchAPIView(PostsDataMixin, APIView):
+    """API for searching published posts."""
+
+    permission_classes = [AllowAny]
+    page_size = 10
+    max_page_size = 50
+
+    def get(self, request, *args, **kwargs):
+        """Get a page of published posts matching ?q=, best match first."""
+
+        query = request.query_params.get("q", "").strip()
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = int(request.query_params.get("page_size", self.page_size))
+            page_size = max(1, min(page_size, self.max_page_size))
+        except ValueError:
+            error_response = {
+                "title": "Error",
+                "message": "page and page_size must be numbers."
             }
-        
+            return Response(error_response, status=400)
+        if not query:
+            error_response = {
+                "title": "Error",
+                "message": "Missing search query."
+            }
+            return Response(error_response, status=400)
+
+        results = search(query, offset=(page - 1) * page_size, limit=page_size + 1)
+        has_next = len(results) > page_size
+        results = results[:page_size]
+        posts = Post.objects.in_bulk([post_id for post_id, score in results])
+        posts_data = []
+        for post_id, score in results:
+            if post_id in posts:
+                data = self.get_post_list_item(posts[post_id])
+                data["score"] = round(score, 4)
+                posts_data.append(data)
+
+        url = request.build_absolute_uri()
+        response = {
+            "data": posts_data,
+            "page_size": len(posts_data),
+            "next": replace_query_param(url, "page", page + 1) if has_next else None,
+            "previous": replace_query_param(url, "page", page - 1) if page > 1 else None,
+        }
         return Response(response, status=200)
 
 
@@ -110,33 +377,37 @@ class UnpublishedPostsAPIView(PostsDataMixin, APIView):
         """Get all published posts data."""
         
         posts = Post.objects.filter(published_date=None)
-        posts_data = self.get_posts_data(posts)
-        response = {
-            "data": posts_data, 
-            "count": len(posts_data)
-            }
-        
-        return Response(response, status=200)
+        return self.get_paginated_posts_response(request, posts, ("created_date", "id"))
 
 
 class PostAPIView(PostsDataMixin, APIView):
     """API for blog post."""
 
+    post_fields = POST_DETAIL_FIELDS
+
     def get(self, request, post_id, *args, **kwargs):
         """Get post data on given post id or primary key, pk."""
         
         try:
-            post = Post.objects.get(pk=post_id)
-            response = {
-                "data": self.get_post_data(post)
-            }
-            return Response(response, 200)
+            fields = self.post_fields.get_selection(request)
+            updated_date = Post.objects.values_list("updated_date", flat=True).get(pk=post_id)
+            etag = make_etag(request, updated_date.isoformat())
+            return conditional_response(request, etag, updated_date, lambda: self.get_response(post_id, fields))
+        except InvalidFields as exc:
+            return self.get_invalid_query_response(exc)
         except Post.DoesNotExist:
             error_response = {
                 "title": "Error",
                 "message": "Post not found."
             }
             return Response(error_response, status=404)
+
+    def get_response(self, post_id, fields=None):
+        post = self.post_fields.restrict(Post.objects.all(), fields).get(pk=post_id)
+        response = {
+            "data": self.get_post_data(post, fields)
+        }
+        return Response(response, 200)
         
     def post(self, request, *args, **kwargs):
         """Post the data given."""
@@ -227,15 +498,50 @@ class PostAPIView(PostsDataMixin, APIView):
             
     
 
+class PostBulkAPIView(BulkCreateMixin, PostsDataMixin, APIView):
+    """API for creating many posts at once."""
+
+    bulk_serializer_class = PostBulkSerializer
+
+    def get_bulk_relations(self):
+        return {"author": get_user_model()}
+
+    def prepare_bulk_object(self, post):
+        post.render_text()
+
+    def get_bulk_item_data(self, post):
+        return self.get_post_data(post)
+
+    def post(self, request, *args, **kwargs):
+        """Create the posts in the given list."""
+
+        return self.bulk_create(request)
+
+
 class ListAPIView(PostsDataMixin, APIView):
     """List all post data"""
+
+    # The PostSerializer fields, without its per-row overhead.
+    serialized_post_fields = FieldSet({
+        name: POST_FIELDS.fields[name] for name in PostSerializer.Meta.fields
+    }, name="post_serializer")
     
     def get(self, request, format=None):
         """get method returns all post data wether published or not."""
 
-        posts = Post.objects.all()
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        try:
+            list_query = self.get_post_list_query(request, Post.objects.all(), self.serialized_post_fields)
+        except (InvalidFields, InvalidExcerpt) as exc:
+            return self.get_invalid_query_response(exc)
+        posts, fieldset, fields, shape = list_query
+        if is_streaming_request(request):
+            return streaming_json_response(posts.order_by("id"), lambda post: fieldset.serialize(post, fields))
+        return conditional_list_response(request, lambda: self.get_response(list_query))
+
+    def get_response(self, list_query):
+        posts, fieldset, fields, shape = list_query
+        page = Post.objects.only("id")
+        return FragmentJSONResponse(self.get_post_fragments(page, posts, fieldset, fields, shape))
     
    
 class CommentAPIView(CommentsDataMixin, APIView):
@@ -245,11 +551,14 @@ class CommentAPIView(CommentsDataMixin, APIView):
         """Get comment data on given post id or primary key, pk"""
         
         try:
-            comment = Comment.objects.get(pk=comment_id)
+            fields = self.comment_fields.get_selection(request)
+            comment = self.comment_fields.restrict(Comment.objects.all(), fields).get(pk=comment_id)
             response = {
-                "data": self.get_comment_data(comment)
+                "data": self.get_comment_data(comment, fields)
             }
             return Response(response, 200)
+        except InvalidFields as exc:
+            return self.get_invalid_query_response(exc)
         except Comment.DoesNotExist:
             error_response = {
                 "title": "Error",
@@ -288,6 +597,23 @@ class CommentsAPIView(CommentsDataMixin, APIView):
             return Response(error_response, status=404)
         
 
+class CommentBulkAPIView(BulkCreateMixin, CommentsDataMixin, APIView):
+    """API for creating many comments at once."""
+
+    bulk_serializer_class = CommentBulkSerializer
+
+    def get_bulk_relations(self):
+        return {"post": Post}
+
+    def get_bulk_item_data(self, comment):
+        return self.get_comment_data(comment)
+
+    def post(self, request, *args, **kwargs):
+        """Create the comments in the given list."""
+
+        return self.bulk_create(request)
+
+
 class ApprovedCommentsAPIView(CommentsDataMixin, APIView):
     """API for getting the approved comments"""
     
@@ -296,14 +622,21 @@ class ApprovedCommentsAPIView(CommentsDataMixin, APIView):
     def get(self, request, *args, **kwargs):
         """Get all approved comment data."""
         
-        comments = Comment.objects.exclude(approved_comment=False)
-        comments_data = self.get_comments_data(comments)
+        try:
+            fields = self.comment_fields.get_selection(request)
+        except InvalidFields as exc:
+            return self.get_invalid_query_response(exc)
+        comments = Comment.objects.filter(approved_comment=True)
+        return cached_list_response(request, lambda: self.get_response(comments, fields))
+
+    def get_response(self, comments, fields):
+        comments_data = self.get_comment_fragments(comments, fields)
         response = {
             "data": comments_data, 
             "count": len(comments_data)
             }
         
-        return Response(response, status=200)
+        return FragmentJSONResponse(response, list_key="data")
         
 
 class ApprovingCommentAPIView(APIView):
@@ -332,6 +665,43 @@ class ApprovingCommentAPIView(APIView):
         return Response(response, status=200)
     
     
+class CommentModerationAPIView(APIView):
+    """API for approving or deleting many comments at once."""
+
+    def post(self, request, *args, **kwargs):
+        """Approve or delete the comments picked by ids or by a filter.
+
+        The comments are changed with one UPDATE or DELETE, see
+        CommentQuerySet.
+        """
+
+        serializer = CommentModerationSerializer(data=request.data)
+        if not serializer.is_valid():
+            error_response = {
+                "title": "Error",
+                "message": "Invalid moderation request",
+                "error": serializer.errors,
+            }
+            return Response(error_response, status=400)
+
+        comments = serializer.get_queryset()
+        if serializer.validated_data["action"] == "approve":
+            count = comments.approve()
+            response = {
+                "title": "Success",
+                "message": "Approved %d comments!" % count,
+                "approved": count
+            }
+        else:
+            count = comments.remove()
+            response = {
+                "title": "Success",
+                "message": "Removed %d comments!" % count,
+                "deleted": count
+            }
+        return Response(response, status=200)
+
+
 class CustomAuthToken(ObtainAuthToken):
     
     def post(self, request, *args, **kwargs):
@@ -358,6 +728,48 @@ class CustomAuthToken(ObtainAuthToken):
             return Response(error_response, status=400)
         
 
+class SignedAuthToken(ObtainAuthToken):
+    """Issue and revoke stateless signed tokens."""
+
+    def post(self, request, *args, **kwargs):
+        """Issue a signed token for the given username and password."""
+
+        try:
+            serializer = self.serializer_class(data=request.data, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            user = serializer.validated_data['user']
+            response = {
+                'token': issue_signed_token(user),
+                'expires_in': settings.SIGNED_TOKEN_MAX_AGE,
+                'user_id': user.pk,
+                'email': user.email
+            }
+            return Response(response, 200)
+        except Exception as exc:
+            error_response = {
+                "title": "Error",
+                "message": "Invalid username/password",
+                "error": str(exc)
+            }
+            return Response(error_response, status=400)
+
+    def delete(self, request, *args, **kwargs):
+        """Revoke the signed token the request was made with."""
+
+        if not isinstance(request.auth, SignedToken):
+            error_response = {
+                "title": "Error",
+                "message": "Authenticate with the signed token to revoke."
+            }
+            return Response(error_response, status=400)
+        revoke_signed_token(request.auth)
+        response = {
+            "title": "Success",
+            "message": "Token revoked!"
+        }
+        return Response(response, status=200)
+
+
 class PostCommentsAPIView(CommentsDataMixin, APIView):
     """API for getting comments for a specific post"""
     
@@ -365,6 +777,7 @@ class PostCommentsAPIView(CommentsDataMixin, APIView):
         """Get post data on given post id or primary key, pk."""
         
         try:
+            fields = self.comment_fields.get_selection(request)
             post_exists = Post.objects.filter(id=post_id).exists()
             if not post_exists:
                 error_response = {
@@ -372,11 +785,16 @@ class PostCommentsAPIView(CommentsDataMixin, APIView):
                 "message": "Post not found."
             }
                 return Response(error_response, status=404)
-            comment = Comment.objects.filter(post=post_id)
-            response = {
-                "data": self.get_comments_data(comment)
-            }
-            return Response(response, 200)
+            comments = Comment.objects.filter(post=post_id)
+            # Pending comments bump no version, validate on the rows themselves.
+            return conditional_queryset_response(
+                request,
+                comments,
+                lambda: FragmentJSONResponse({"data": self.get_comment_fragments(comments, fields)}, list_key="data"),
+                timestamp_fields=("updated_date", "post__updated_date"),
+            )
+        except InvalidFields as exc:
+            return self.get_invalid_query_response(exc)
         except Exception as exc:
             error_response = {
                 "title": "Error",
@@ -384,4 +802,67 @@ class PostCommentsAPIView(CommentsDataMixin, APIView):
                 "error": str(exc)
             }
             return Response(error_response, status=500)
-            
\ No newline at end of file
+            
+
+
+class SQLStatsAPIView(APIView):
+    """API for the per-route SQL aggregates of this server process"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """Get query count and database time per route."""
+
+        return Response({"data": route_stats.get_data()}, 200)
+
+    def delete(self, request, *args, **kwargs):
+        """Start collecting from scratch."""
+
+        route_stats.reset()
+        response = {
+            "title": "Success",
+            "message": "SQL stats reset!"
+        }
+        return Response(response, status=200)
+
+
+class CompressionStatsAPIView(APIView):
+    """API for the response compression counters of this server process"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """Get bytes compressed, bytes sent and time spent or saved."""
+
+        return Response({"data": compression_stats.get_data()}, 200)
+
+    def delete(self, request, *args, **kwargs):
+        """Start counting from scratch."""
+
+        compression_stats.reset()
+        response = {
+            "title": "Success",
+            "message": "Compression stats reset!"
+        }
+        return Response(response, status=200)
+
+
+class CacheStatsAPIView(APIView):
+    """API for the public response cache counters of this server process"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """Get hits per tier, misses and the current content version."""
+
+        return Response({"data": public_cache.get_data()}, 200)
+
+    def delete(self, request, *args, **kwargs):
+        """Start counting from scratch."""
+
+        public_cache.reset()
+        response = {
+            "title": "Success",
+            "message": "Cache stats reset!"
+        }
+        return Response(response, status=200)
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        # Connects the signal handlers that keep the search index up to date.
+        from blog import search  # noqa: F401
+        # Connects the signal handlers that queue feed updates.
+        from blog import feeds  # noqa: F401
+        # Connects the signal handlers that drop outdated prerendered pages.
+        from blog import prerender  # noqa: F401
+        # Connects the signal handlers that reject the tokens of deactivated users.
+        from blog.api import authentication  # noqa: F401
+        # Installs the SQL recorder on database connections as they open.
+        from blog import middleware  # noqa: F401
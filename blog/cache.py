@@ -0,0 +1,204 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+POST_VERSION_KEY = "blog:post:{}:version"
+CONTENT_VERSION_KEY = "blog:content:version"
+CONTENT_CHANGED_KEY = "blog:content:changed"
+
+
+def get_version(key):
+    """Return the version stored under ``key``.
+
+    A missing version starts from the clock rather than 1, so entries
+    cached under an evicted version can never be picked up again.
+    """
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_post_version(post_id):
+    """Return the current cache version of a post."""
+
+    return get_version(POST_VERSION_KEY.format(post_id))
+
+
+def get_post_versions(post_ids):
+    """get_post_version of many posts, keyed by post id, in one read.
+
+    Missing versions start from the clock like in get_version, written with
+    one set_many.
+    """
+
+    keys = {post_id: POST_VERSION_KEY.format(post_id) for post_id in post_ids}
+    versions = cache.get_many(keys.values())
+    missing = {key: time.time_ns() for key in keys.values() if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return {post_id: versions[key] for post_id, key in keys.items()}
+
+
+def bump_post_version(post_id):
+    """Invalidate every cached fragment of a post."""
+
+    bump_version(POST_VERSION_KEY.format(post_id))
+
+
+def get_content_version():
+    """Return the version of all public content, see public_cache."""
+
+    return get_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version():
+    """Invalidate every entry of public_cache."""
+
+    bump_version(CONTENT_VERSION_KEY)
+    cache.set(CONTENT_CHANGED_KEY, time.time(), timeout=None)
+
+
+def get_content_changed():
+    """Return when the content version was last bumped, as a timestamp, or None."""
+
+    return cache.get(CONTENT_CHANGED_KEY)
+
+
+def invalidate_content():
+    """Bump the content version now and again once the transaction commits."""
+
+    bump_content_version()
+    transaction.on_commit(bump_content_version)
+
+
+def invalidate_post(post_id):
+    """Bump the version of a post now and again once the transaction commits.
+
+    The second bump covers readers that cached the old rows between the first
+    bump and the commit. Anything that changes a post changes the public
+    content too.
+    """
+
+    invalidate_posts([post_id])
+
+
+def invalidate_posts(post_ids):
+    """invalidate_post for many posts, bumping the content version once."""
+
+    post_ids = list(post_ids)
+    for post_id in post_ids:
+        bump_post_version(post_id)
+
+    def bump_post_versions():
+        for post_id in post_ids:
+            bump_post_version(post_id)
+
+    transaction.on_commit(bump_post_versions)
+    invalidate_content()
+
+
+class TieredCache:
+    """A per-process LRU in front of the shared cache.
+
+    Keys are namespaced by the content version, so bumping it invalidates
+    every entry at once without touching them: entries of older versions
+    are never looked up again and fall out of the LRU and the shared cache
+    by themselves. Each lookup still reads the version from the shared
+    cache, which keeps processes consistent with each other.
+    """
+
+    fields = ("local_hits", "shared_hits", "misses", "sets")
+
+    def __init__(self, prefix, max_entries, timeout):
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.reset()
+
+    def get_key(self, key, version=None):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        if version is None:
+            version = get_content_version()
+        return f"{self.prefix}:{version}:{digest}"
+
+    def get(self, key, version=None):
+        """Return the entry cached under ``key`` for ``version``, by default the current one, or None."""
+
+        key = self.get_key(key, version)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.counters["local_hits"] += 1
+                return self.entries[key]
+        value = cache.get(key)
+        if value is None:
+            self.add(misses=1)
+            return None
+        self.add(shared_hits=1)
+        self.store(key, value)
+        return value
+
+    def set(self, key, value, version=None):
+        """Store an entry for ``version``, by default the current one.
+
+        Pass the version read before the rows the value was built from: a
+        change committed meanwhile must not file old rows under its version.
+        """
+
+        key = self.get_key(key, version)
+        cache.set(key, value, self.timeout)
+        self.add(sets=1)
+        self.store(key, value)
+
+    def store(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def add(self, **values):
+        with self.lock:
+            for name, value in values.items():
+                self.counters[name] += value
+
+    def clear(self):
+        """Drop the local entries; the shared ones are dropped by a version bump."""
+
+        with self.lock:
+            self.entries.clear()
+
+    def reset(self):
+        with self.lock:
+            self.counters = dict.fromkeys(self.fields, 0)
+
+    def get_data(self):
+        with self.lock:
+            data = dict(self.counters, local_entries=len(self.entries), max_entries=self.max_entries)
+        lookups = data["local_hits"] + data["shared_hits"] + data["misses"]
+        data["hit_ratio"] = round((lookups - data["misses"]) / lookups, 4) if lookups else None
+        data["content_version"] = get_content_version()
+        return data
+
+
+# Responses of the public read endpoints, see blog.api.conditional.
+public_cache = TieredCache("blog:public", settings.PUBLIC_CACHE_MAX_ENTRIES, settings.PUBLIC_CACHE_TIMEOUT)
@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# The API and the feeds only. Pages reflect request input next to their CSRF
+# token, compressing them would leak the token to a BREACH attack; static
+# files are compressed ahead of time by whitenoise.
+COMPRESSIBLE_TYPES = ("application/json", "application/atom+xml", "application/rss+xml")
+
+
+def get_supported_encodings():
+    """Return the encodings we can produce, preferred first."""
+
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(request, encodings=None):
+    """Return the best of ``encodings`` the client accepts, or None.
+
+    Honours q-values, including ``q=0`` and ``*``, per RFC 7231 5.3.4.
+    """
+
+    qualities = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings or get_supported_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(request, response):
+    """Whether a response may be compressed as it is sent.
+
+    Responses that used the CSRF token never are, whatever their type.
+    """
+
+    if request.META.get("CSRF_COOKIE_USED"):
+        return False
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def get_cache_key(request, etag, encoding):
+    """Key of the compressed body of a versioned response.
+
+    The ETag covers the path and the data version; Accept is added because
+    the same URL can render as JSON or as the browsable API.
+    """
+
+    accept = request.META.get("HTTP_ACCEPT", "")
+    digest = hashlib.md5(f"{etag}|{accept}".encode()).hexdigest()
+    return f"compressed:{encoding}:{digest}"
+
+
+class CompressionStats:
+    """Counters of this process, shown by the compression stats API."""
+
+    fields = (
+        "responses", "bytes_in", "bytes_out", "compress_seconds",
+        "cache_hits", "cache_bytes_out", "cache_seconds_saved",
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.values = dict.fromkeys(self.fields, 0)
+
+    def add(self, **values):
+        with self.lock:
+            for name, value in values.items():
+                self.values[name] += value
+
+    def get_data(self):
+        with self.lock:
+            data = dict(self.values)
+        data["ratio"] = round(data["bytes_out"] / data["bytes_in"], 4) if data["bytes_in"] else None
+        data["compress_seconds"] = round(data["compress_seconds"], 6)
+        data["cache_seconds_saved"] = round(data["cache_seconds_saved"], 6)
+        return data
+
+
+compression_stats = CompressionStats()
+
+
+def get_precompressed_response(request, etag):
+    """Return the cached compressed response for a versioned request, or None.
+
+    Serving it skips building, rendering and compressing the body.
+    """
+
+    encoding = negotiate_encoding(request)
+    if encoding is None:
+        return None
+    entry = cache.get(get_cache_key(request, etag, encoding))
+    if entry is None:
+        return None
+    response = HttpResponse(entry["body"], content_type=entry["content_type"])
+    response["Content-Encoding"] = encoding
+    response["Vary"] = "Accept, Accept-Encoding"
+    response.precompressed = True
+    compression_stats.add(cache_hits=1, cache_bytes_out=len(entry["body"]), cache_seconds_saved=entry["seconds"])
+    return response
+
+
+def store_precompressed_response(request, etag, encoding, response, seconds):
+    """Cache a compressed response body under its ETag.
+
+    ``seconds`` is what building and compressing it took, the time a cache
+    hit saves.
+    """
+
+    entry = {"body": response.content, "content_type": response["Content-Type"], "seconds": seconds}
+    cache.set(get_cache_key(request, etag, encoding), entry, settings.COMPRESSION_CACHE_TIMEOUT)
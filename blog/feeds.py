@@ -0,0 +1,198 @@
+"""Atom and RSS feeds of the latest published posts, rendered ahead of time.
+
+The feed documents are kept as FeedFile rows and served as they are by
+blog.views.feed from blog.cache.public_cache, so polling a feed renders
+nothing and, once cached, runs no query.
+Publishing, editing or deleting a published post queues a job that
+re-renders only that post's entries and splices them into the documents;
+the rendered entries are kept in the ENTRIES_FILE row.
+"""
+
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.dateparse import parse_datetime
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from blog.cache import invalidate_content
+from blog.jobs import enqueue, task
+from blog.models import FeedFile, Post
+
+
+class AtomFeed(feedgenerator.Atom1Feed):
+    item_tag = "entry"
+    closing_tag = "</feed>"
+
+
+class RssFeed(feedgenerator.Rss201rev2Feed):
+    item_tag = "item"
+    closing_tag = "</channel>"
+
+
+FEEDS = {
+    "posts.atom": AtomFeed,
+    "posts.rss": RssFeed,
+}
+
+# The FeedFile of the rendered entries, it is not served.
+ENTRIES_FILE = "entries.json"
+
+
+def get_site_url(path):
+    return settings.FEED_SITE_URL.rstrip("/") + path
+
+
+def get_feed(feed_class, name):
+    return feed_class(
+        title=settings.FEED_TITLE,
+        link=get_site_url("/"),
+        description=settings.FEED_DESCRIPTION,
+        feed_url=get_site_url(reverse("feed", kwargs={"name": name})),
+        language="en",
+    )
+
+
+def get_feed_posts():
+    return Post.objects.filter(published_date__isnull=False).select_related("author").only(
+        "id", "title", "excerpt", "published_date", "updated_date", "author__username"
+    )
+
+
+def render_entry(post):
+    """Return the state entry of a post: its dates and its XML in every feed."""
+
+    link = get_site_url(reverse("post_detail", kwargs={"pk": post.pk}))
+    entry = {
+        "id": post.pk,
+        "published": post.published_date.isoformat(),
+        "updated": post.updated_date.isoformat(),
+    }
+    for name, feed_class in FEEDS.items():
+        feed = get_feed(feed_class, name)
+        feed.add_item(
+            title=post.title,
+            link=link,
+            description=post.excerpt,
+            author_name=post.author.username,
+            pubdate=post.published_date,
+            updateddate=post.updated_date,
+            unique_id=link,
+        )
+        item = feed.items[0]
+        stream = StringIO()
+        handler = SimplerXMLGenerator(stream, "utf-8")
+        handler.startElement(feed.item_tag, feed.item_attributes(item))
+        feed.add_item_elements(handler, item)
+        handler.endElement(feed.item_tag)
+        entry[name] = stream.getvalue()
+    return entry
+
+
+def render_document(name, entries):
+    """Splice the rendered entries into an otherwise empty feed document."""
+
+    feed = get_feed(FEEDS[name], name)
+    if entries:
+        # Atom's <updated> and RSS's <lastBuildDate>.
+        latest = max(parse_datetime(entry["updated"]) for entry in entries)
+        feed.latest_post_date = lambda: latest
+    document = feed.writeString("utf-8")
+    head, closing_tag, tail = document.rpartition(feed.closing_tag)
+    return head + "".join(entry[name] for entry in entries) + closing_tag + tail
+
+
+def write_feeds(entries):
+    for name in FEEDS:
+        FeedFile.objects.update_or_create(name=name, defaults={"content": render_document(name, entries)})
+    FeedFile.objects.update_or_create(name=ENTRIES_FILE, defaults={"content": json.dumps({"entries": entries})})
+    # The served documents are cached in public_cache, see blog.views.feed.
+    invalidate_content()
+
+
+def read_entries(lock=True):
+    """Return the rendered entries of the feeds, or None if there are none yet.
+
+    With ``lock`` the row stays locked until the transaction ends, feed
+    updates of concurrent workers wait for each other.
+    """
+
+    entries_files = FeedFile.objects.select_for_update() if lock else FeedFile.objects.all()
+    entries_file = entries_files.filter(name=ENTRIES_FILE).first()
+    try:
+        return json.loads(entries_file.content)["entries"]
+    except (AttributeError, ValueError, KeyError):
+        return None
+
+
+def has_entry(post_id):
+    """Whether the feeds list the post."""
+
+    return any(entry["id"] == post_id for entry in read_entries(lock=False) or [])
+
+
+def render_latest_entries():
+    posts = get_feed_posts().order_by("-published_date", "-id")[:settings.FEED_LENGTH]
+    return [render_entry(post) for post in posts]
+
+
+def order_entries(entries):
+    entries.sort(key=lambda entry: (parse_datetime(entry["published"]), entry["id"]), reverse=True)
+    return entries[:settings.FEED_LENGTH]
+
+
+@task(name="blog.feeds.rebuild")
+def rebuild_feeds():
+    """Render every entry and write the feeds from scratch."""
+
+    with transaction.atomic():
+        write_feeds(render_latest_entries())
+
+
+@task(name="blog.feeds.update_post")
+def update_post_entry(post_id):
+    """Re-render the entries of one post and splice them into the feeds.
+
+    A post that is no longer published, or has dropped out of the latest
+    FEED_LENGTH, loses its entry and the next older post takes its place.
+    """
+
+    with transaction.atomic():
+        entries = read_entries()
+        if entries is None:
+            write_feeds(render_latest_entries())
+            return
+        old_entries = list(entries)
+        entries = [entry for entry in entries if entry["id"] != post_id]
+        post = get_feed_posts().filter(pk=post_id).first()
+        if post is not None:
+            entries.append(render_entry(post))
+        entries = order_entries(entries)
+        if len(entries) < settings.FEED_LENGTH and len(entries) < len(old_entries):
+            older = (
+                get_feed_posts().exclude(pk__in=[entry["id"] for entry in entries] + [post_id])
+                .order_by("-published_date", "-id")[:settings.FEED_LENGTH - len(entries)]
+            )
+            entries = order_entries(entries + [render_entry(older_post) for older_post in older])
+        if entries != old_entries:
+            write_feeds(entries)
+
+
+@receiver(post_save, sender=Post)
+def queue_feed_update(sender, instance, raw=False, **kwargs):
+    # Drafts only need it to leave the feeds once unpublished.
+    if raw:
+        return
+    if instance.published_date is not None or has_entry(instance.pk):
+        enqueue(update_post_entry, args=[instance.pk], key=f"feed:post:{instance.pk}")
+
+
+@receiver(post_delete, sender=Post)
+def queue_feed_removal(sender, instance, **kwargs):
+    if instance.published_date is not None:
+        enqueue(update_post_entry, args=[instance.pk], key=f"feed:post:{instance.pk}")
@@ -0,0 +1,258 @@
+"""Durable background jobs, kept in the Job table.
+
+Register a function with ``@task`` and queue it with ``enqueue()``. The job
+row is inserted in the caller's transaction, so it exists exactly when the
+write that queued it commits, and a request returns without waiting for the
+work. ``manage.py runworker`` runs the jobs; no broker is involved.
+
+Tasks must be idempotent: a job whose worker died is run again, and a task
+that fails halfway keeps the writes it made, wrap them in
+``transaction.atomic()`` where that matters. ``runworker`` deletes finished
+jobs after JOB_KEEP_FINISHED_SECONDS.
+"""
+
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from blog.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Registered tasks by name.
+tasks = {}
+
+# Due jobs read per attempt to claim one.
+CLAIM_BATCH = 10
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register a function as a task, by default under its dotted path."""
+
+    def register(func):
+        func.task_name = name or f"{func.__module__}.{func.__qualname__}"
+        func.max_attempts = max_attempts
+        tasks[func.task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(task, args=(), kwargs=None, key=None, delay=0, max_attempts=None):
+    """Queue a task and return its Job.
+
+    ``task`` is a registered function or a task name; ``args`` and
+    ``kwargs`` must be JSON serializable. With a ``key``, the pending job
+    of the same key is returned instead of queueing another one.
+    """
+
+    if callable(task) and not hasattr(task, "task_name"):
+        raise ValueError(f"{task!r} is not a registered task.")
+    job = Job(
+        task=getattr(task, "task_name", task),
+        args=list(args),
+        kwargs=kwargs or {},
+        idempotency_key=key,
+        max_attempts=max_attempts or getattr(task, "max_attempts", None) or settings.JOB_MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+        return job
+    while True:
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            pending = Job.objects.filter(idempotency_key=key, status=Job.PENDING).first()
+            # Otherwise a worker claimed it meanwhile and the key is free again.
+            if pending is not None:
+                return pending
+            job.pk = None
+
+
+def get_due_jobs(now):
+    """Pending jobs that are due and running jobs whose worker lost its lease."""
+
+    return Job.objects.filter(
+        Q(status=Job.PENDING, run_after__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now),
+        attempts__lt=F("max_attempts"),
+    )
+
+
+def claim_job():
+    """Take the next due job and return it, or None.
+
+    A job is claimed with a conditional UPDATE, which exactly one of several
+    competing workers wins, also on backends without SELECT ... FOR UPDATE.
+    """
+
+    now = timezone.now()
+    due = get_due_jobs(now)
+    for job_id in due.order_by("run_after", "id").values_list("id", flat=True)[:CLAIM_BATCH]:
+        claimed = due.filter(pk=job_id).update(
+            status=Job.RUNNING,
+            locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def fail_abandoned_jobs():
+    """Fail running jobs whose worker died during their last attempt."""
+
+    now = timezone.now()
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_until__lt=now, attempts__gte=F("max_attempts")
+    ).update(status=Job.FAILED, locked_until=None, finished_date=now, last_error="Worker lost the job.")
+
+
+def finish_job(job, status, error=""):
+    Job.objects.filter(pk=job.pk).update(
+        status=status, locked_until=None, finished_date=timezone.now(), last_error=error
+    )
+
+
+def run_job(job):
+    """Run a claimed job, then mark it done, schedule a retry or fail it.
+
+    The task runs outside any transaction of the worker: on SQLite an open
+    write transaction would keep every other writer waiting for as long as
+    the task runs. The claim and the outcome are short statements of their
+    own.
+    """
+
+    try:
+        func = tasks.get(job.task)
+        if func is None:
+            raise LookupError(f"Unknown task {job.task!r}.")
+        func(*job.args, **job.kwargs)
+        finish_job(job, Job.DONE)
+        return True
+    except Exception:
+        error = traceback.format_exc()
+    logger.warning("Job %s (%s) failed, attempt %d of %d:\n%s",
+                   job.pk, job.task, job.attempts, job.max_attempts, error)
+    if job.attempts >= job.max_attempts:
+        finish_job(job, Job.FAILED, error)
+        return False
+    delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.PENDING, locked_until=None, last_error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        # A newer job with the same key is pending and will do the work.
+        finish_job(job, Job.FAILED, error)
+    return False
+
+
+def prune_jobs(batch_size=1000):
+    """Delete jobs finished more than JOB_KEEP_FINISHED_SECONDS ago and return how many.
+
+    Rows are deleted in batches, each a short transaction of its own.
+    """
+
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_KEEP_FINISHED_SECONDS)
+    finished = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_date__lt=cutoff)
+    count = 0
+    while True:
+        job_ids = list(finished.values_list("id", flat=True)[:batch_size])
+        if not job_ids:
+            return count
+        count += Job.objects.filter(pk__in=job_ids).delete()[0]
+
+
+def run_due_jobs():
+    """Run jobs in this thread until none is due and return how many ran."""
+
+    count = 0
+    fail_abandoned_jobs()
+    while True:
+        job = claim_job()
+        if job is None:
+            return count
+        run_job(job)
+        count += 1
+
+
+class Worker:
+    """Runs jobs in a pool of threads, each claiming jobs on its own.
+
+    The threads also take turns pruning finished jobs, every
+    ``prune_interval`` seconds.
+    """
+
+    def __init__(self, threads=1, poll_interval=1.0, prune_interval=60 * 60):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self.stopping = threading.Event()
+        self.prune_lock = threading.Lock()
+        self.next_prune = 0.0
+
+    def run(self, burst=False):
+        """Work until stop() is called, or with ``burst`` until no job is due."""
+
+        threads = [
+            threading.Thread(target=self.work, args=(burst,), name=f"blog-worker-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            # Jobs already started are finished, no new ones are claimed.
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        self.stopping.set()
+
+    def prune(self):
+        """Prune finished jobs if it is this thread's turn."""
+
+        with self.prune_lock:
+            now = time.monotonic()
+            if now < self.next_prune:
+                return
+            self.next_prune = now + self.prune_interval
+        pruned = prune_jobs()
+        if pruned:
+            logger.info("Deleted %d finished jobs.", pruned)
+
+    def work(self, burst):
+        try:
+            while not self.stopping.is_set():
+                try:
+                    self.prune()
+                    ran = run_due_jobs()
+                except DatabaseError:
+                    # E.g. a lock held too long by another process; its job
+                    # is claimed again once the lease runs out.
+                    logger.exception("Worker %s failed to run jobs.", threading.current_thread().name)
+                    connections.close_all()
+                    ran = None
+                if ran == 0 and burst:
+                    return
+                if not ran:
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            connections.close_all()
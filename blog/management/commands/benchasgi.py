@@ -0,0 +1,110 @@
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI deployment (gunicorn sync workers) with the ASGI one "
+        "(gunicorn + uvicorn workers) under many slow clients, and print "
+        "throughput and latency percentiles for each. Uses the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100, help="Concurrent clients.")
+        parser.add_argument("--requests", type=int, default=500, help="Requests per server.")
+        parser.add_argument("--slow", type=float, default=0.2,
+                            help="Seconds each client takes to send its request headers.")
+        parser.add_argument("--workers", type=int, default=2, help="Server worker processes.")
+        parser.add_argument("--port", type=int, default=8765, help="First local port to use.")
+        parser.add_argument("--wsgi-path", default="/post/published/")
+        parser.add_argument("--asgi-path", default="/async/post/published/")
+
+    def handle(self, *args, **options):
+        try:
+            import gunicorn  # noqa: F401
+            import uvicorn  # noqa: F401
+        except ImportError as exc:
+            raise CommandError(f"benchasgi needs gunicorn and uvicorn installed: {exc}")
+
+        servers = [
+            ("wsgi", ["mysite.wsgi:application"], options["wsgi_path"]),
+            ("asgi", ["-k", "uvicorn.workers.UvicornWorker", "mysite.asgi:application"], options["asgi_path"]),
+        ]
+        results = {}
+        for offset, (name, server_args, path) in enumerate(servers):
+            port = options["port"] + offset
+            command = [
+                sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+                "--workers", str(options["workers"]), "--log-level", "warning", *server_args,
+            ]
+            server = subprocess.Popen(command)
+            try:
+                self.wait_for_port(port)
+                self.stdout.write(f"Benchmarking {name} on http://127.0.0.1:{port}{path}")
+                results[name] = asyncio.run(self.run_clients(port, path, options))
+            finally:
+                server.terminate()
+                server.wait()
+
+        self.stdout.write("")
+        self.stdout.write(f"{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+        for name, (latencies, errors, elapsed) in results.items():
+            if not latencies:
+                self.stdout.write(f"{name:<8}{'-':>10}{'-':>10}{'-':>10}{'-':>10}{'-':>10}{errors:>8}")
+                continue
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+            self.stdout.write(
+                f"{name:<8}{len(latencies) / elapsed:>10.1f}{quantiles[49]:>10.1f}{quantiles[94]:>10.1f}"
+                f"{quantiles[98]:>10.1f}{max(latencies):>10.1f}{errors:>8}"
+            )
+
+    def wait_for_port(self, port, timeout=20):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f"Server on port {port} did not start.")
+
+    async def run_clients(self, port, path, options):
+        """Send the requests with at most --clients in flight."""
+
+        semaphore = asyncio.Semaphore(options["clients"])
+        latencies = []
+        errors = 0
+
+        async def one_request():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                    # A slow client: the request line arrives at once, the
+                    # headers only after --slow seconds.
+                    writer.write(f"GET {path} HTTP/1.1\r\n".encode())
+                    await writer.drain()
+                    await asyncio.sleep(options["slow"])
+                    writer.write(b"Host: 127.0.0.1\r\nConnection: close\r\n\r\n")
+                    await writer.drain()
+                    status_line = await reader.readline()
+                    await reader.read()
+                    writer.close()
+                    if b" 200 " not in status_line:
+                        errors += 1
+                        return
+                except OSError:
+                    errors += 1
+                    return
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request() for i in range(options["requests"])))
+        return latencies, errors, time.perf_counter() - start
@@ -0,0 +1,109 @@
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.api.fragments import fragment_cache
+from blog.api.serializers import PostSerializer
+from blog.api.views import ListAPIView
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and time the post/list/ endpoint, which "
+        "is assembled from cached fragments, against serializing the same posts "
+        "with PostSerializer and JSONRenderer. Uses a file based cache like the "
+        "deployed site."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1000, help="Posts to seed.")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed runs per case.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": directory,
+                    "OPTIONS": {"MAX_ENTRIES": 10000},
+                }
+            }):
+                self.seed(options["posts"])
+                results = self.run_cases(options["iterations"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'case':<28}{'p50 ms':>10}{'min ms':>10}")
+        for name, samples in results.items():
+            self.stdout.write(f"{name:<28}{statistics.median(samples):>10.2f}{min(samples):>10.2f}")
+
+    def seed(self, post_count):
+        self.user = get_user_model().objects.create(username="benchfragments", is_staff=True)
+        now = timezone.now()
+        posts = [
+            Post(author=self.user, title=f"Benchmark post {i}", text=f"Benchmark body {i}\n" * 40,
+                 published_date=now - timedelta(minutes=i))
+            for i in range(post_count)
+        ]
+        for post in posts:
+            post.render_text()
+        Post.objects.bulk_create(posts, batch_size=500)
+        self.stdout.write(f"Seeded {post_count} posts.")
+
+    def run_cases(self, iterations):
+        view = ListAPIView.as_view()
+        factory = APIRequestFactory()
+
+        def get_list():
+            request = factory.get("/post/list/")
+            force_authenticate(request, user=self.user)
+            response = view(request)
+            assert response.status_code == 200
+            return response.content
+
+        def serialize():
+            return JSONRenderer().render(PostSerializer(Post.objects.all(), many=True).data)
+
+        def get_cold_list():
+            fragment_cache.clear()
+            return get_list()
+
+        def get_list_after_edit():
+            post = Post.objects.order_by("?").first()
+            post.save()
+            start = time.perf_counter()
+            get_list()
+            return time.perf_counter() - start
+
+        cases = {
+            "PostSerializer+JSONRenderer": serialize,
+            "post/list/ cold": get_cold_list,
+            "post/list/ warm": get_list,
+        }
+        results = {}
+        for name, run in cases.items():
+            run()
+            samples = []
+            for i in range(iterations):
+                start = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - start) * 1000)
+            results[name] = samples
+        # The edit itself is not timed.
+        get_list_after_edit()
+        results["post/list/ after an edit"] = [get_list_after_edit() * 1000 for i in range(iterations)]
+        return results
@@ -0,0 +1,145 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from blog.models import Post, Comment
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed posts and comments, then print EXPLAIN output and timings of the "
+        "blog's hot queries without and with the blog indexes. Everything runs "
+        "in a transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=20000, help="Number of posts to seed.")
+        parser.add_argument("--comments", type=int, default=50000, help="Number of comments to seed.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query, the median is reported.")
+        parser.add_argument("--database", default="default", help="Database alias to benchmark.")
+
+    def handle(self, *args, **options):
+        self.using = options["database"]
+        self.repeat = options["repeat"]
+        connection = connections[self.using]
+        self.stdout.write(f"Database: {connection.vendor} ({self.using})")
+
+        # SQLite only allows schema changes inside a transaction while foreign
+        # key checks are off, the same way the migration executor runs them.
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic(using=self.using):
+                post_id = self.seed(options["posts"], options["comments"])
+                queries = self.get_queries(post_id)
+
+                self.drop_indexes()
+                self.analyze()
+                before = self.run_queries(queries, "without blog indexes")
+                self.create_indexes()
+                self.analyze()
+                after = self.run_queries(queries, "with blog indexes")
+
+                transaction.set_rollback(True, using=self.using)
+        finally:
+            connection.enable_constraint_checking()
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for name in queries:
+            speedup = before[name] / after[name] if after[name] else float("inf")
+            self.stdout.write(f"{name:<28}{before[name]:>12.2f}{after[name]:>12.2f}{speedup:>9.1f}x")
+
+    def seed(self, post_count, comment_count):
+        """Create the benchmark rows and return the id of a busy post."""
+
+        User = get_user_model()
+        user = User.objects.db_manager(self.using).create(username=f"benchindexes-{time.time_ns()}")
+        now = timezone.now()
+        rng = random.Random(0)
+
+        posts = []
+        for i in range(post_count):
+            created = now - timedelta(minutes=post_count - i)
+            # Roughly one post in five is still a draft.
+            published = None if rng.random() < 0.2 else created + timedelta(minutes=rng.randint(0, 600))
+            posts.append(Post(author=user, title=f"Post {i}", text="Lorem ipsum " * 20,
+                              created_date=created, published_date=published))
+        Post.objects.using(self.using).bulk_create(posts, batch_size=1000)
+        post_ids = list(Post.objects.using(self.using).filter(author=user).values_list("id", flat=True))
+
+        comments = [
+            Comment(post_id=rng.choice(post_ids), author=f"Reader {i}", text="Nice post!",
+                    approved_comment=rng.random() < 0.3)
+            for i in range(comment_count)
+        ]
+        Comment.objects.using(self.using).bulk_create(comments, batch_size=1000)
+        self.stdout.write(f"Seeded {post_count} posts and {comment_count} comments.")
+        return post_ids[len(post_ids) // 2]
+
+    def get_queries(self, post_id):
+        """Return the querysets used by the blog views, keyed by a short name."""
+
+        posts = Post.objects.using(self.using)
+        comments = Comment.objects.using(self.using)
+        now = timezone.now()
+        return {
+            "post_list": posts.filter(published_date__lte=now).order_by("-published_date", "-pk")[:settings.POSTS_PER_PAGE],
+            "post_draft_list": posts.filter(published_date__isnull=True).order_by("created_date"),
+            "published_posts_page": posts.filter(published_date__isnull=False).order_by("published_date", "id")[:10],
+            "approved_comments": comments.filter(approved_comment=True),
+            "post_comments": comments.filter(post=post_id),
+            "post_approved_comments": comments.filter(post=post_id, approved_comment=True),
+        }
+
+    def get_indexes(self):
+        for model in (Post, Comment):
+            for index in model._meta.indexes:
+                yield model, index
+
+    def drop_indexes(self):
+        with connections[self.using].schema_editor(atomic=False) as schema_editor:
+            for model, index in self.get_indexes():
+                schema_editor.remove_index(model, index)
+
+    def create_indexes(self):
+        with connections[self.using].schema_editor(atomic=False) as schema_editor:
+            for model, index in self.get_indexes():
+                schema_editor.add_index(model, index)
+
+    def analyze(self):
+        """Refresh planner statistics so the seeded rows are taken into account."""
+
+        with connections[self.using].cursor() as cursor:
+            for model in (Post, Comment):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def run_queries(self, queries, label):
+        """Print the plan of each query and return its median run time in ms."""
+
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Query plans {label}"))
+        timings = {}
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_LABEL(f"{name}:"))
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+
+            # Time the raw SQL so model instantiation does not drown out the
+            # difference the indexes make.
+            sql, params = queryset.query.sql_with_params()
+            runs = []
+            with connections[self.using].cursor() as cursor:
+                for i in range(self.repeat):
+                    start = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    runs.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(runs)
+        return timings
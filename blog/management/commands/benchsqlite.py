@@ -0,0 +1,137 @@
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from blog.models import Post, Comment
+
+
+BACKENDS = {
+    "stock": "django.db.backends.sqlite3",
+    "tuned": "mysite.backends.sqlite3",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the same multi-process read/write workload against a fresh SQLite "
+        "file with the stock backend and with mysite.backends.sqlite3, and print "
+        "throughput, latency percentiles and 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4, help="Concurrent worker processes.")
+        parser.add_argument("--seconds", type=float, default=5, help="How long each worker runs.")
+        parser.add_argument("--write-ratio", type=float, default=0.2,
+                            help="Fraction of operations that post a comment.")
+        parser.add_argument("--posts", type=int, default=200, help="Posts to seed.")
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, engine in BACKENDS.items():
+                alias = f"bench_{name}"
+                connections.databases[alias] = {"ENGINE": engine, "NAME": str(Path(directory) / f"{name}.sqlite3")}
+                self.seed(alias, options["posts"])
+                self.stdout.write(f"Benchmarking {name} ({engine})")
+                results[name] = self.run_workers(alias, options)
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'backend':<8}{'ops/s':>9}{'reads':>8}{'writes':>8}{'locked':>8}"
+            f"{'read p95':>10}{'write p50':>11}{'write p95':>11}{'write p99':>11}"
+        )
+        for name, (reads, writes, locked, elapsed) in results.items():
+            self.stdout.write(
+                f"{name:<8}{(len(reads) + len(writes)) / elapsed:>9.1f}{len(reads):>8}{len(writes):>8}{locked:>8}"
+                f"{self.percentile(reads, 95):>10.1f}{self.percentile(writes, 50):>11.1f}"
+                f"{self.percentile(writes, 95):>11.1f}{self.percentile(writes, 99):>11.1f}"
+            )
+        self.stdout.write("Latencies in ms; locked counts operations that failed with 'database is locked'.")
+
+    def seed(self, alias, post_count):
+        call_command("migrate", database=alias, verbosity=0, stdout=StringIO())
+        # bulk_create skips the signal handlers, which write to the default database.
+        users = get_user_model().objects.db_manager(alias)
+        users.bulk_create([get_user_model()(username="benchsqlite")])
+        user = users.get(username="benchsqlite")
+        now = timezone.now()
+        Post.objects.using(alias).bulk_create([
+            Post(author=user, title=f"Post {i}", text=f"Post body {i}", published_date=now)
+            for i in range(post_count)
+        ])
+        connections[alias].close()
+
+    def run_workers(self, alias, options):
+        # Children must not share the parent's SQLite connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        start = time.perf_counter()
+        workers = [
+            context.Process(target=run_worker, args=(alias, options, seed, queue))
+            for seed in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        reads, writes, locked = [], [], 0
+        for worker in workers:
+            worker_reads, worker_writes, worker_locked = queue.get()
+            reads += worker_reads
+            writes += worker_writes
+            locked += worker_locked
+        for worker in workers:
+            worker.join()
+        return reads, writes, locked, time.perf_counter() - start
+
+    def percentile(self, latencies, percent):
+        if len(latencies) < 2:
+            return latencies[0] if latencies else 0.0
+        return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1]
+
+
+def run_worker(alias, options, seed, queue):
+    """Mix page reads with comment posts until time is up."""
+
+    rng = random.Random(seed)
+    post_ids = list(Post.objects.using(alias).values_list("id", flat=True))
+    reads, writes, locked = [], [], 0
+    deadline = time.perf_counter() + options["seconds"]
+    while time.perf_counter() < deadline:
+        is_write = rng.random() < options["write_ratio"]
+        start = time.perf_counter()
+        try:
+            if is_write:
+                post_comment(alias, rng.choice(post_ids))
+            else:
+                list(Post.objects.using(alias).filter(published_date__isnull=False)
+                     .order_by("-published_date", "-id").values("id", "title")[:20])
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            locked += 1
+            continue
+        (writes if is_write else reads).append((time.perf_counter() - start) * 1000)
+    connections[alias].close()
+    queue.put((reads, writes, locked))
+
+
+def post_comment(alias, post_id):
+    """What posting a comment does: read the post, insert, update the counter."""
+
+    with transaction.atomic(using=alias):
+        post = Post.objects.using(alias).only("id").get(pk=post_id)
+        Comment.objects.using(alias).bulk_create([
+            Comment(post=post, author="Reader", text="Nice post!", approved_comment=True)
+        ])
+        Post.objects.using(alias).filter(pk=post_id).update(approved_comment_count=F("approved_comment_count") + 1)
@@ -0,0 +1,364 @@
+import json
+from contextvars import ContextVar
+from io import StringIO
+from pathlib import Path
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import get_resolver
+from django.utils import timezone
+
+from blog.models import Post, Comment
+
+
+ROUTE_MODULES = ["blog.urls", "blog.api.urls"]
+PASSWORD = "blogbench-password"
+
+# Timer of the request being benchmarked. A context variable, so the queries
+# async views run on the database pool's threads are counted too.
+current_timer = ContextVar("blogbench_query_timer", default=None)
+
+
+class Scenario:
+    """How to call one route.
+
+    ``path`` and ``data`` may be callables; they are evaluated before each
+    timed request, so objects a request destroys can be created untimed.
+    """
+
+    def __init__(self, method, path, data=None, auth=None, json=False):
+        self.method = method
+        self.path = path
+        self.data = data
+        self.auth = auth
+        self.json = json
+
+    def build(self):
+        path = self.path() if callable(self.path) else self.path
+        data = self.data() if callable(self.data) else self.data
+        return path, data
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their time.
+
+    Unlike connection.queries it keeps sub-millisecond precision.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def time_query(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and benchmark every route of blog/urls.py "
+        "and blog/api/urls.py in-process. Reports p50/p95/p99 latency, SQL query "
+        "count, SQL time and response size per route, writes the results as JSON "
+        "and compares them against a saved baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=500, help="Posts to seed.")
+        parser.add_argument("--comments", type=int, default=2000, help="Comments to seed.")
+        parser.add_argument("--iterations", type=int, default=30, help="Timed requests per route.")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per route.")
+        parser.add_argument("--route", action="append", default=[], help="Only run routes containing this text.")
+        parser.add_argument("--output", default="blogbench.json", help="Where to write the results.")
+        parser.add_argument("--baseline", help="Results file to compare against.")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed p95 slowdown against the baseline, as a fraction.")
+        parser.add_argument("--fail-on-regression", action="store_true",
+                            help="Exit with an error if a route regressed.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)["routes"]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # Connections of other threads open later, this one is open already.
+        connection_created.connect(install_query_timer)
+        install_query_timer(None, connection)
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(**self.get_settings(Path(directory))):
+                self.seed(options["posts"], options["comments"])
+                results = self.run_routes(options)
+        finally:
+            connection_created.disconnect(install_query_timer)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "created": timezone.now().isoformat(),
+            "options": {key: options[key] for key in ("posts", "comments", "iterations", "warmup")},
+            "routes": results,
+        }
+        with open(options["output"], "w") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+
+        self.print_results(results, baseline, options["tolerance"])
+        self.stdout.write(f"\nResults written to {options['output']}")
+
+        if baseline is not None:
+            regressions = self.find_regressions(results, baseline, options["tolerance"])
+            for route, reason in regressions:
+                self.stdout.write(self.style.ERROR(f"Regression in {route}: {reason}"))
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} routes regressed.")
+
+    def get_settings(self, directory):
+        """Return the settings the benchmark runs with.
+
+        The cache and every file the views write are private to the run, so
+        it neither reads nor clobbers the cache entries and prerendered pages
+        of the site on the same machine.
+        """
+
+        return {
+            "STATICFILES_STORAGE": "django.contrib.staticfiles.storage.StaticFilesStorage",
+            "CACHES": {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "blogbench",
+                    "OPTIONS": {"MAX_ENTRIES": 10000},
+                }
+            },
+            "PRERENDER_ROOT": directory / "prerendered",
+            "PRERENDER_MANIFEST": directory / "prerendered.json",
+        }
+
+    def seed(self, post_count, comment_count):
+        User = get_user_model()
+        self.user = User.objects.create(username="blogbench", email="blogbench@example.com", is_staff=True)
+        self.user.set_password(PASSWORD)
+        self.user.save()
+
+        now = timezone.now()
+        posts = [
+            Post(author=self.user, title=f"Benchmark post {i}", text=f"Benchmark body {i}\n" * 40,
+                 created_date=now - timedelta(minutes=i),
+                 published_date=None if i % 5 == 0 else now - timedelta(minutes=i))
+            for i in range(post_count)
+        ]
+        for post in posts:
+            post.render_text()
+        Post.objects.bulk_create(posts, batch_size=500)
+        post_ids = list(Post.objects.values_list("id", flat=True))
+        comments = [
+            Comment(post_id=post_ids[i % len(post_ids)], author=f"Reader {i}", text="Nice post!",
+                    approved_comment=i % 3 != 0)
+            for i in range(comment_count)
+        ]
+        Comment.objects.bulk_create(comments, batch_size=500)
+        # bulk_create skips save() and signals, so build the derived data here.
+        call_command("recountcomments", stdout=StringIO())
+        call_command("rebuildsearchindex", stdout=StringIO())
+        call_command("buildfeeds", stdout=StringIO())
+
+        self.published_post = Post.objects.filter(published_date__isnull=False).order_by("id").first()
+        self.comment = Comment.objects.filter(post=self.published_post).first() or Comment.objects.create(
+            post=self.published_post, author="Reader", text="Nice post!"
+        )
+        self.stdout.write(f"Seeded {post_count} posts and {comment_count} comments.")
+
+    def new_post(self, published=False):
+        return Post.objects.create(
+            author=self.user, title="Benchmark draft", text="Draft body",
+            published_date=timezone.now() if published else None,
+        )
+
+    def new_comment(self):
+        return Comment.objects.create(post=self.published_post, author="Reader", text="Pending comment")
+
+    def get_scenarios(self):
+        """Return a Scenario for each route pattern."""
+
+        post_id = self.published_post.pk
+        comment_id = self.comment.pk
+        new_post_data = {"author": self.user.pk, "title": "Benchmark post", "text": "Benchmark body"}
+        comment_data = {"post": post_id, "author": "Reader", "text": "Nice post!"}
+        credentials = {"username": self.user.username, "password": PASSWORD}
+        return {
+            # blog/urls.py
+            "": Scenario("get", "/"),
+            "page/<int:page>/": Scenario("get", "/page/2/"),
+            "post/<int:pk>/": Scenario("get", f"/post/{post_id}/"),
+            "post/new/": Scenario("get", "/post/new/", auth="session"),
+            "post/<int:pk>/edit/": Scenario("get", f"/post/{post_id}/edit/", auth="session"),
+            "drafts/": Scenario("get", "/drafts/", auth="session"),
+            "post/<pk>/publish/": Scenario("get", lambda: f"/post/{self.new_post().pk}/publish/", auth="session"),
+            "post/<pk>/remove/": Scenario("get", lambda: f"/post/{self.new_post().pk}/remove/", auth="session"),
+            "post/<int:pk>/comment/": Scenario("post", f"/post/{post_id}/comment/",
+                                               {"author": "Reader", "text": "Nice post!"}),
+            "comment/<int:pk>/approve/": Scenario("get", lambda: f"/comment/{self.new_comment().pk}/approve/",
+                                                  auth="session"),
+            "comment/<int:pk>/remove/": Scenario("get", lambda: f"/comment/{self.new_comment().pk}/remove/",
+                                                 auth="session"),
+            "feeds/<str:name>": Scenario("get", "/feeds/posts.atom"),
+            # blog/api/urls.py
+            "post/list/": Scenario("get", "/post/list/", auth="token"),
+            "post/published/": Scenario("get", "/post/published/"),
+            "post/publish/<int:post_id>/": Scenario("patch", lambda: f"/post/publish/{self.new_post().pk}/",
+                                                    auth="token"),
+            "post/unpublished/": Scenario("get", "/post/unpublished/", auth="token"),
+            "posts/": Scenario("post", "/posts/", new_post_data, auth="token", json=True),
+            "posts/<int:post_id>/": Scenario("get", f"/posts/{post_id}/", auth="token"),
+            "posts/bulk/": Scenario("post", "/posts/bulk/", [new_post_data] * 10, auth="token", json=True),
+            "comments/<int:comment_id>/": Scenario("get", f"/comments/{comment_id}/", auth="token"),
+            "comment/new/": Scenario("post", "/comment/new/", comment_data, auth="token", json=True),
+            "comments/bulk/": Scenario("post", "/comments/bulk/", [comment_data] * 10, auth="token", json=True),
+            "approve/comment/<int:comment_id>/": Scenario(
+                "patch", lambda: f"/approve/comment/{self.new_comment().pk}/", auth="token"),
+            "comments/approved/": Scenario("get", "/comments/approved/"),
+            "comments/moderate/": Scenario("post", "/comments/moderate/",
+                                           lambda: {"action": "approve", "ids": [self.new_comment().pk]},
+                                           auth="token", json=True),
+            "api-token-auth/": Scenario("post", "/api-token-auth/", credentials),
+            "api-signed-token-auth/": Scenario("post", "/api-signed-token-auth/", credentials),
+            "post/<int:post_id>/comments/": Scenario("get", f"/post/{post_id}/comments/", auth="token"),
+            "search/": Scenario("get", "/search/?q=benchmark+body"),
+            "stats/sql/": Scenario("get", "/stats/sql/", auth="token"),
+            "stats/compression/": Scenario("get", "/stats/compression/", auth="token"),
+            "stats/cache/": Scenario("get", "/stats/cache/", auth="token"),
+            "async/post/published/": Scenario("get", "/async/post/published/"),
+            "async/posts/<int:post_id>/": Scenario("get", f"/async/posts/{post_id}/", auth="token"),
+            "async/post/<int:post_id>/comments/": Scenario("get", f"/async/post/{post_id}/comments/", auth="token"),
+            "async/comments/approved/": Scenario("get", "/async/comments/approved/"),
+        }
+
+    def get_routes(self):
+        for module in ROUTE_MODULES:
+            for pattern in get_resolver(module).url_patterns:
+                yield str(pattern.pattern)
+
+    def run_routes(self, options):
+        scenarios = self.get_scenarios()
+        token = self.user.auth_token.key
+        results = {}
+        for route in self.get_routes():
+            if options["route"] and not any(text in route for text in options["route"]):
+                continue
+            scenario = scenarios.get(route)
+            if scenario is None:
+                self.stdout.write(self.style.WARNING(f"No benchmark scenario for route {route!r}, skipped."))
+                continue
+
+            client = Client(raise_request_exception=False)
+            headers = {}
+            if scenario.auth == "session":
+                client.force_login(self.user)
+            elif scenario.auth == "token":
+                headers["HTTP_AUTHORIZATION"] = "Token " + token
+
+            samples = []
+            for i in range(options["warmup"] + options["iterations"]):
+                samples.append(self.run_request(client, scenario, headers))
+            results[route] = self.summarize(samples[options["warmup"]:])
+        return results
+
+    def run_request(self, client, scenario, headers):
+        path, data = scenario.build()
+        kwargs = dict(headers)
+        if data is not None:
+            kwargs["data"] = json.dumps(data) if scenario.json else data
+            if scenario.json:
+                kwargs["content_type"] = "application/json"
+        request = getattr(client, scenario.method)
+
+        queries = QueryTimer()
+        token = current_timer.set(queries)
+        try:
+            start = time.perf_counter()
+            response = request(path, **kwargs)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - start
+        finally:
+            current_timer.reset(token)
+
+        return {
+            "latency_ms": elapsed * 1000,
+            "queries": queries.count,
+            "sql_ms": queries.seconds * 1000,
+            "bytes": size,
+            "status": response.status_code,
+        }
+
+    def summarize(self, samples):
+        latencies = sorted(sample["latency_ms"] for sample in samples)
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        return {
+            "p50_ms": round(quantiles[49], 3),
+            "p95_ms": round(quantiles[94], 3),
+            "p99_ms": round(quantiles[98], 3),
+            "queries": round(statistics.mean(sample["queries"] for sample in samples), 2),
+            "sql_ms": round(statistics.mean(sample["sql_ms"] for sample in samples), 3),
+            "bytes": round(statistics.mean(sample["bytes"] for sample in samples)),
+            "statuses": sorted({sample["status"] for sample in samples}),
+        }
+
+    def print_results(self, results, baseline, tolerance):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'route':<38}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'sql ms':>9}{'bytes':>10}  status"
+        )
+        for route, result in results.items():
+            line = (
+                f"{route or '/':<38}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                f"{result['queries']:>9g}{result['sql_ms']:>9.2f}{result['bytes']:>10}  "
+                f"{','.join(str(status) for status in result['statuses'])}"
+            )
+            if baseline and route in baseline and baseline[route]["p95_ms"]:
+                change = result["p95_ms"] / baseline[route]["p95_ms"] - 1
+                line += f"  p95 {change:+.0%}"
+            if any(status >= 500 for status in result["statuses"]):
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+    def find_regressions(self, results, baseline, tolerance):
+        """Return (route, reason) for every route worse than the baseline."""
+
+        regressions = []
+        for route, result in results.items():
+            before = baseline.get(route)
+            if before is None:
+                continue
+            if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append((route, f"p95 {before['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms"))
+            if result["queries"] > before["queries"]:
+                regressions.append((route, f"queries {before['queries']:g} -> {result['queries']:g}"))
+        return regressions
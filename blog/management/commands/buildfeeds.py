@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.feeds import FEEDS, rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Write the Atom and RSS feeds from scratch, e.g. on deploy or after changing the feed settings."
+
+    def handle(self, *args, **options):
+        rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {', '.join(FEEDS)}."
+        ))
@@ -0,0 +1,60 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.prerender import (
+    get_file_path,
+    get_page_versions,
+    read_manifest,
+    remove_pages,
+    render_pages,
+    write_manifest,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the published post pages and the index pages to static HTML in "
+        "PRERENDER_ROOT. Only pages whose posts or approved comments changed "
+        "since the last run, or whose file is gone, are rendered again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Render every page, e.g. after a template change.")
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 renders in this process.")
+        parser.add_argument("--chunk-size", type=int, default=50, help="Pages per task sent to a worker.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        manifest = read_manifest()
+        versions = get_page_versions()
+        changed = [
+            path for path, version in versions.items()
+            if options["all"] or manifest.get(path) != version or not get_file_path(path).exists()
+        ]
+        removed = [path for path in manifest if path not in versions]
+
+        chunk_size = options["chunk_size"]
+        chunks = [changed[i:i + chunk_size] for i in range(0, len(changed), chunk_size)]
+        if options["processes"] > 1 and len(chunks) > 1:
+            # Children must not share the parent's database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(options["processes"], initializer=django.setup) as pool:
+                failed = [path for paths in pool.map(render_pages, chunks) for path in paths]
+        else:
+            failed = [path for paths in map(render_pages, chunks) for path in paths]
+        remove_pages(removed + failed)
+        # Failed pages are tried again on the next run.
+        write_manifest({path: version for path, version in versions.items() if path not in failed})
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {len(changed) - len(failed)} of {len(versions)} pages, removed {len(removed)}"
+            f" in {time.perf_counter() - start:.2f}s."
+        ))
+        for path in failed:
+            self.stderr.write(f"Could not render {path}.")
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Post, SearchPosting, SearchStats, SearchTerm
+from blog.search import get_impact_expression, get_term_frequencies, get_term_ids
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Posts indexed per batch.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        document_count = 0
+        total_length = 0
+
+        with transaction.atomic():
+            SearchPosting.objects.all().delete()
+            SearchTerm.objects.all().delete()
+
+            posts = Post.objects.filter(published_date__isnull=False).only("id", "title", "text")
+            chunk = []
+            for post in posts.iterator(chunk_size=chunk_size):
+                chunk.append(post)
+                if len(chunk) >= chunk_size:
+                    count, length = self.index_chunk(chunk)
+                    document_count += count
+                    total_length += length
+                    chunk = []
+            if chunk:
+                count, length = self.index_chunk(chunk)
+                document_count += count
+                total_length += length
+
+            # Document frequencies are counted once at the end instead of
+            # being incremented for every post.
+            frequencies = (
+                SearchPosting.objects.filter(term=OuterRef("pk"))
+                .order_by().values("term").annotate(count=Count("pk")).values("count")
+            )
+            SearchTerm.objects.update(document_frequency=Coalesce(Subquery(frequencies), 0))
+            # Impacts too, once the average length of the whole corpus is known.
+            if document_count:
+                SearchPosting.objects.update(impact=get_impact_expression(total_length / document_count))
+            SearchStats.objects.update_or_create(
+                pk=1, defaults={"document_count": document_count, "total_length": total_length}
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {document_count} published posts."))
+
+    def index_chunk(self, posts):
+        """Index a batch of posts and return (document count, total length)."""
+
+        frequencies_by_post = {post.pk: get_term_frequencies(post) for post in posts}
+        terms = {term for frequencies in frequencies_by_post.values() for term in frequencies}
+        term_ids = get_term_ids(list(terms)) if terms else {}
+
+        postings = []
+        document_count = 0
+        total_length = 0
+        for post_id, frequencies in frequencies_by_post.items():
+            if not frequencies:
+                continue
+            length = sum(frequencies.values())
+            document_count += 1
+            total_length += length
+            postings.extend(
+                SearchPosting(term_id=term_ids[term], post_id=post_id,
+                              term_frequency=frequency, document_length=length)
+                for term, frequency in frequencies.items()
+            )
+        SearchPosting.objects.bulk_create(postings, batch_size=1000)
+        return document_count, total_length
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post, count_approved_comments
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.approved_comment_count from the comments table."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stale = Post.objects.exclude(approved_comment_count=count_approved_comments())
+            updated = stale.update(approved_comment_count=count_approved_comments())
+        self.stdout.write(self.style.SUCCESS(f"Fixed approved comment counts on {updated} posts."))
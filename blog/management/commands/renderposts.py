@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import invalidate_posts
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Fill Post.rendered_html and Post.excerpt for posts saved before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render every post, not only missing ones.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Posts updated per query batch.")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only("id", "text").order_by("id")
+        if not options["all"]:
+            posts = posts.filter(rendered_html="").exclude(text="")
+
+        chunk_size = options["chunk_size"]
+        updated = 0
+        chunk = []
+        for post in posts.iterator(chunk_size=chunk_size):
+            post.render_text()
+            chunk.append(post)
+            if len(chunk) >= chunk_size:
+                updated += self.save_chunk(chunk)
+                chunk = []
+        if chunk:
+            updated += self.save_chunk(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {updated} posts."))
+
+    def save_chunk(self, posts):
+        # bulk_update skips save() and its signals, so cached posts and pages
+        # holding the old HTML are invalidated here.
+        Post.objects.bulk_update(posts, ["rendered_html", "excerpt"])
+        invalidate_posts(post.pk for post in posts)
+        return len(posts)
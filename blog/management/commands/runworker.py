@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from blog.jobs import Worker, tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the jobs queued with blog.jobs.enqueue. Tasks are registered by "
+        "the modules that define them, blog.search and blog.feeds, which "
+        "BlogConfig.ready imports. Finished jobs are deleted after "
+        "JOB_KEEP_FINISHED_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Jobs run at the same time.")
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds a thread waits when no job is due.")
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Running {len(tasks)} tasks with {options['threads']} threads"
+            + (" until the queue is empty." if options["burst"] else ", Ctrl-C to stop.")
+        )
+        Worker(threads=options["threads"], poll_interval=options["poll_interval"]).run(burst=options["burst"])
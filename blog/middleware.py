@@ -0,0 +1,378 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.middleware.security import SecurityMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from blog.cache import CONTENT_CHANGED_KEY
+from blog.compression import (
+    compress,
+    compression_stats,
+    is_compressible,
+    negotiate_encoding,
+    store_precompressed_response,
+)
+from blog.prerender import is_prerendered_path
+from blog.routers import ReplicaState, current_replica_state
+
+
+# Recorder of the request being handled. A context variable, so database
+# calls that sync_to_async moves to worker threads report to the right request.
+current_recorder = ContextVar("blog_sql_recorder", default=None)
+
+MAX_RECORDED_SQL_LENGTH = 500
+
+
+class QueryRecorder:
+    """Query count, total database time and slowest statement of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql = None
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_sql = sql
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection.
+
+    Outside an instrumented request this costs a single context variable
+    lookup per query.
+    """
+
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Connections are thread-local and reopened per request, the wrapper list
+    # survives a reconnect.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RouteStats:
+    """Rolling per-route aggregates, kept in memory of this process.
+
+    Only the last ``window`` requests of each route are kept.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.totals = {}
+
+    def add(self, route, duration, recorder):
+        sample = (
+            duration, recorder.count, recorder.seconds, recorder.slowest_seconds,
+            recorder.slowest_sql[:MAX_RECORDED_SQL_LENGTH] if recorder.slowest_sql else None,
+        )
+        with self.lock:
+            if route not in self.samples:
+                self.samples[route] = deque(maxlen=self.window)
+                self.totals[route] = 0
+            self.samples[route].append(sample)
+            self.totals[route] += 1
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.totals.clear()
+
+    def get_data(self):
+        """Return the aggregates of every route, most total database time first."""
+
+        with self.lock:
+            snapshot = [(route, list(samples), self.totals[route]) for route, samples in self.samples.items()]
+
+        data = []
+        for route, samples, total in snapshot:
+            durations = sorted(sample[0] for sample in samples)
+            slowest = max(samples, key=lambda sample: sample[3])
+            db_seconds = sum(sample[2] for sample in samples)
+            data.append({
+                "route": route,
+                "requests": total,
+                "window": len(samples),
+                "avg_ms": round(sum(durations) / len(samples) * 1000, 3),
+                "p95_ms": round(durations[int(0.95 * (len(durations) - 1))] * 1000, 3),
+                "avg_queries": round(sum(sample[1] for sample in samples) / len(samples), 2),
+                "max_queries": max(sample[1] for sample in samples),
+                "avg_db_ms": round(db_seconds / len(samples) * 1000, 3),
+                "total_db_ms": round(db_seconds * 1000, 3),
+                "slowest_query_ms": round(slowest[3] * 1000, 3),
+                "slowest_query": slowest[4],
+            })
+        data.sort(key=lambda item: item["total_db_ms"], reverse=True)
+        return data
+
+
+route_stats = RouteStats(settings.SQL_STATS_WINDOW)
+
+
+class RequestScopedMiddleware:
+    """Base of the middleware below, for sync and async get_response alike.
+
+    ``process_request`` returns the state of the request. ``finish_request``
+    runs as soon as the view returned, even if it raised, and
+    ``process_response`` gets the response and the state.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes Django treat this middleware as a coroutine function.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = self.process_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish_request(state)
+        return self.process_response(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.process_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish_request(state)
+        return self.process_response(request, response, state)
+
+    def process_request(self, request):
+        return None
+
+    def finish_request(self, state):
+        pass
+
+    def process_response(self, request, response, state):
+        return response
+
+
+class SQLInstrumentationMiddleware(RequestScopedMiddleware):
+    """Record the SQL each request runs.
+
+    Adds a Server-Timing header with the query count, the database time and
+    the slowest query, and feeds the per-route aggregates shown by the SQL
+    stats API. Works for sync and async views.
+    """
+
+    def process_request(self, request):
+        recorder = QueryRecorder()
+        return recorder, current_recorder.set(recorder), time.perf_counter()
+
+    def finish_request(self, state):
+        recorder, token, start = state
+        current_recorder.reset(token)
+
+    def process_response(self, request, response, state):
+        recorder, token, start = state
+        duration = time.perf_counter() - start
+        response["Server-Timing"] = (
+            f'db;dur={recorder.seconds * 1000:.3f};desc="{recorder.count} queries", '
+            f"db-slowest;dur={recorder.slowest_seconds * 1000:.3f}, "
+            f"total;dur={duration * 1000:.3f}"
+        )
+        match = getattr(request, "resolver_match", None)
+        route = f"{request.method} /{match.route}" if match else f"{request.method} <unresolved>"
+        route_stats.add(route, duration, recorder)
+        return response
+
+
+class ReplicaPinningMiddleware(RequestScopedMiddleware):
+    """Pick the database a request reads from, see blog.routers.
+
+    Safe methods read from a replica. A request that writes, and every
+    request of the same client for the next REPLICA_PIN_SECONDS, reads from
+    the primary, so clients always see their own writes despite replica lag.
+    Browsers are recognized by a cookie, API clients by their Authorization
+    header.
+
+    Every request also reads from the primary for REPLICA_PIN_SECONDS after
+    the content version changed: the cache keys already carry the new
+    version, a lagging replica would fill them with the old rows.
+    """
+
+    cookie_name = "replica_pin"
+    client_key = "blog:replica_pin:{}"
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def process_request(self, request):
+        pinned = request.method not in self.safe_methods or self.cookie_name in request.COOKIES
+        if not pinned and settings.REPLICA_DATABASES:
+            keys = [CONTENT_CHANGED_KEY]
+            client_key = self.get_client_key(request)
+            if client_key is not None:
+                keys.append(client_key)
+            values = cache.get_many(keys)
+            changed = values.get(CONTENT_CHANGED_KEY)
+            pinned = client_key in values or (
+                changed is not None and time.time() - changed < settings.REPLICA_PIN_SECONDS
+            )
+        state = ReplicaState(pinned=pinned)
+        return state, current_replica_state.set(state)
+
+    def get_client_key(self, request):
+        """Return the cache key pinning a token client, None for other clients."""
+
+        authorization = request.META.get("HTTP_AUTHORIZATION")
+        if not authorization:
+            return None
+        return self.client_key.format(hashlib.md5(authorization.encode()).hexdigest())
+
+    def finish_request(self, state):
+        state, token = state
+        current_replica_state.reset(token)
+
+    def process_response(self, request, response, state):
+        state, token = state
+        if state.wrote and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                self.cookie_name, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+            client_key = self.get_client_key(request)
+            if client_key is not None:
+                cache.set(client_key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+
+class CompressionMiddleware(RequestScopedMiddleware):
+    """Compress responses with the best encoding the client accepts.
+
+    Uses brotli when the brotli package is installed, gzip otherwise.
+    Bodies below COMPRESSION_MIN_SIZE are sent as they are. Versioned
+    responses, the ones blog.api.conditional marks, are also cached
+    compressed, so a repeat request for the same version is served without
+    building or compressing the body again. Counters are kept in
+    blog.compression.compression_stats.
+    """
+
+    def process_request(self, request):
+        return time.perf_counter()
+
+    def process_response(self, request, response, start):
+        if getattr(response, "precompressed", False):
+            self.weaken_etag(response)
+            return response
+        if response.status_code != 200 or response.has_header("Content-Encoding") or not is_compressible(request, response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.streaming:
+            # Streams are compressed as they are sent, gzip can do that.
+            if negotiate_encoding(request, encodings=("gzip",)) is None:
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response["Content-Length"]
+            response["Content-Encoding"] = "gzip"
+            self.weaken_etag(response)
+            return response
+
+        encoding = negotiate_encoding(request)
+        content = response.content
+        if encoding is None or len(content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        compress_start = time.perf_counter()
+        body = compress(content, encoding)
+        end = time.perf_counter()
+        if len(body) >= len(content):
+            return response
+        compression_stats.add(
+            responses=1, bytes_in=len(content), bytes_out=len(body), compress_seconds=end - compress_start
+        )
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        etag = getattr(response, "precompress_etag", None)
+        if etag is not None:
+            store_precompressed_response(request, etag, encoding, response, end - start)
+        self.weaken_etag(response)
+        return response
+
+    def weaken_etag(self, response):
+        # The compressed body differs byte for byte, RFC 7232 section 2.1.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+
+
+class AsyncSecurityMiddleware(SecurityMiddleware):
+    """SecurityMiddleware that runs its hooks on the event loop.
+
+    They only read settings and set headers, the thread hop Django makes
+    for a sync hook under ASGI would cost more than the hooks themselves.
+    """
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+
+class PrerenderedPageMiddleware(WhiteNoiseMiddleware):
+    """Serve the pages ``manage.py prerender`` wrote to PRERENDER_ROOT.
+
+    WhiteNoise indexes its files once at startup, so the pages are looked up
+    on disk for each request instead: a stat and a file read, no query and
+    no rendering. ETag, Last-Modified, 304s and gzipped copies come with
+    WhiteNoise.
+
+    Only to GET requests without a session cookie: a logged in user sees
+    more than the anonymous page. Clients revalidate every time, so a page
+    the prerender run replaced is never served from their cache. Other URLs,
+    the API and the admin among them, are passed on without looking at the
+    disk.
+    """
+
+    safe_methods = ("GET", "HEAD")
+
+    def __init__(self, get_response=None, settings=settings):
+        self.get_response = get_response
+        self.use_finders = False
+        WhiteNoise.__init__(self, None, autorefresh=True, max_age=0, index_file=True)
+        self.add_files(settings.PRERENDER_ROOT, prefix="/")
+
+    def immutable_file_test(self, path, url):
+        return False
+
+    def process_request(self, request):
+        if (
+            request.method in self.safe_methods
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and is_prerendered_path(request.path_info)
+        ):
+            return super().process_request(request)
+        return None
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.12 on 2026-10-17 07:22
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+def render_posts(apps, schema_editor):
+    # Post.render_text, which the historical model does not have.
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.only('id', 'text').exclude(text='').order_by('id')
+    chunk = []
+    for post in posts.iterator(chunk_size=500):
+        post.rendered_html = linebreaksbr(post.text, autoescape=True)
+        post.excerpt = Truncator(post.text).chars(200)
+        chunk.append(post)
+        if len(chunk) >= 500:
+            Post.objects.bulk_update(chunk, ['rendered_html', 'excerpt'])
+            chunk = []
+    if chunk:
+        Post.objects.bulk_update(chunk, ['rendered_html', 'excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rendered_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
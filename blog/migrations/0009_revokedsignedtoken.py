@@ -0,0 +1,21 @@
+# Generated by Django 3.2.12 on 2026-10-17 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedSignedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_id', models.CharField(max_length=32, unique=True)),
+                ('expires_date', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.12 on 2026-10-17 08:11
+
+from django.db import migrations, models
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+
+def compute_impacts(apps, schema_editor):
+    # The BM25 term weight of blog.search.get_impact, with k1=1.2 and b=0.75.
+    SearchPosting = apps.get_model('blog', 'SearchPosting')
+    SearchStats = apps.get_model('blog', 'SearchStats')
+    stats = SearchStats.objects.filter(pk=1).first()
+    if stats is None or not stats.document_count:
+        return
+    average_length = stats.total_length / stats.document_count
+    term_frequency = Cast('term_frequency', FloatField())
+    document_length = Cast('document_length', FloatField())
+    SearchPosting.objects.update(
+        impact=term_frequency * 2.2 / (term_frequency + 1.2 * (0.25 + 0.75 * document_length / average_length))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_revokedsignedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchposting',
+            name='impact',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['term', '-impact', 'post'], name='blog_searchposting_impact_idx'),
+        ),
+        migrations.RunPython(compute_impacts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.12 on 2026-10-17 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_searchposting_impact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedFile',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
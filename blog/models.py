@@ -1,11 +1,22 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
 from rest_framework.authtoken.models import Token
 
+from blog.cache import invalidate_content, invalidate_post, invalidate_posts
+
+
+# Sent by CommentQuerySet.approve() and remove(), which send no post_save or
+# post_delete, with the ids of the posts whose comments changed.
+comments_moderated = Signal()
+
 
 class Post(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -13,26 +24,178 @@ class Post(models.Model):
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
     published_date = models.DateTimeField(blank=True, null=True)
+    updated_date = models.DateTimeField(auto_now=True)
+    approved_comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Rendered from text on save, so pages do not re-render it on every view.
+    rendered_html = models.TextField(blank=True, default="", editable=False)
+    excerpt = models.CharField(max_length=200, blank=True, default="", editable=False)
+
+    EXCERPT_LENGTH = 200
+
+    class Meta:
+        indexes = [
+            # post_list and the published posts API: filter and order by published_date.
+            models.Index(
+                fields=["published_date", "id"],
+                name="blog_post_published_idx",
+                condition=models.Q(published_date__isnull=False),
+            ),
+            # post_draft_list: only unpublished rows, ordered by created_date.
+            models.Index(
+                fields=["created_date", "id"],
+                name="blog_post_draft_idx",
+                condition=models.Q(published_date__isnull=True),
+            ),
+        ]
 
     def publish(self):
         self.published_date = timezone.now()
         self.save()
 
+    def render_text(self):
+        """Fill rendered_html and excerpt from text."""
+        self.rendered_html = linebreaksbr(self.text, autoescape=True)
+        self.excerpt = Truncator(self.text).chars(self.EXCERPT_LENGTH)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "text" in update_fields:
+            self.render_text()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "rendered_html", "excerpt"}
+        if update_fields is None and not self._state.adding:
+            # Comments move approved_comment_count with F() updates, writing
+            # back the value loaded earlier would undo concurrent ones.
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "approved_comment_count"
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
+    def approved_comments(self):
+        return self.comments.filter(approved_comment=True)
+
     def is_published(self):
         """Check if post is published."""
         
         return self.published_date is not None
 
 
+def count_approved_comments():
+    """Subquery counting the approved comments of the outer Post row."""
+    approved = (
+        Comment.objects.filter(post=OuterRef("pk"), approved_comment=True)
+        .order_by().values("post").annotate(count=Count("pk")).values("count")
+    )
+    return Coalesce(Subquery(approved), 0)
+
+
+class CommentQuerySet(models.QuerySet):
+    """Moderation of many comments with one UPDATE or DELETE.
+
+    Unlike saving or deleting the comments one by one these send no model
+    signals, they recount approved_comment_count of the posts involved,
+    invalidate their caches and send comments_moderated instead.
+    """
+
+    def _moderate(self, change):
+        with transaction.atomic():
+            post_ids = set(self.order_by().values_list("post_id", flat=True).distinct())
+            if not post_ids:
+                return 0
+            # Only rows of the posts read above, so every changed row's post is recounted.
+            count = change(self.filter(post_id__in=post_ids))
+            Post.objects.filter(pk__in=post_ids).update(approved_comment_count=count_approved_comments())
+            invalidate_posts(post_ids)
+            comments_moderated.send(sender=self.model, post_ids=post_ids)
+        return count
+
+    def approve(self):
+        """Approve the pending comments and return how many were approved."""
+        return self.filter(approved_comment=False)._moderate(
+            lambda comments: comments.update(approved_comment=True, updated_date=timezone.now())
+        )
+
+    def remove(self):
+        """Delete the comments and return how many were deleted."""
+        # Nothing references a comment, so a plain DELETE leaves nothing behind.
+        return self._moderate(lambda comments: comments._raw_delete(comments.db))
+
+
 class Comment(models.Model):
     post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, related_name='comments')
     author = models.CharField(max_length=200)
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
     approved_comment = models.BooleanField(default=False)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Comments of a post, optionally narrowed down to approved ones.
+            models.Index(fields=["post", "approved_comment"], name="blog_comment_post_approved_idx"),
+            # The approved comments API only ever reads approved rows.
+            models.Index(
+                fields=["id"],
+                name="blog_comment_approved_idx",
+                condition=models.Q(approved_comment=True),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored approval so save() knows whether it may have
+        # changed. Not when the column is deferred.
+        if "approved_comment" in instance.__dict__:
+            instance._loaded_approved_comment = instance.approved_comment
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the comment and keep its post's approved_comment_count in step.
+
+        A stored comment's approval only changes through a conditional UPDATE,
+        and the counter only moves when that UPDATE changed the row, so two
+        concurrent approvals count once.
+        """
+
+        if self._state.adding:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                changed = self.approved_comment
+                if changed:
+                    Post.objects.filter(pk=self.post_id).update(
+                        approved_comment_count=models.F("approved_comment_count") + 1
+                    )
+        else:
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            # updated_date keeps the save from being skipped, post_save must be sent.
+            kwargs["update_fields"] = {*update_fields, "updated_date"} - {"approved_comment"}
+            with transaction.atomic():
+                changed = False
+                if (
+                    "approved_comment" in update_fields
+                    and getattr(self, "_loaded_approved_comment", None) != self.approved_comment
+                ):
+                    changed = Comment.objects.filter(
+                        pk=self.pk, approved_comment=not self.approved_comment
+                    ).update(approved_comment=self.approved_comment) == 1
+                super().save(*args, **kwargs)
+                if changed:
+                    change = 1 if self.approved_comment else -1
+                    Post.objects.filter(pk=self.post_id).update(
+                        approved_comment_count=models.F("approved_comment_count") + change
+                    )
+        self._loaded_approved_comment = self.approved_comment
+        if self.approved_comment or changed:
+            invalidate_post(self.post_id)
 
     def approve(self):
         self.approved_comment = True
@@ -41,14 +204,138 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
 
-    def approved_comments(self):
-        return self.comments.filter(approved_comment=True)
-
     def is_approved(self):
         """Check if the comment is approved."""
         return  self.approved_comment is True
 
 
+class SearchTerm(models.Model):
+    """A term of the search index and the number of posts containing it."""
+
+    term = models.CharField(max_length=64, unique=True)
+    document_frequency = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.term
+
+
+class SearchPosting(models.Model):
+    """Occurrences of a term in a published post."""
+
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='postings')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_postings')
+    term_frequency = models.PositiveIntegerField()
+    # Copied from the post so ranking never needs a join.
+    document_length = models.PositiveIntegerField()
+    # The BM25 weight of the term in the post without the term's IDF, see
+    # blog.search.get_impact. Posting lists are read best first by it.
+    impact = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "post"], name="blog_searchposting_term_post_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["term", "-impact", "post"], name="blog_searchposting_impact_idx"),
+        ]
+
+
+class SearchStats(models.Model):
+    """Corpus totals used by the ranking, kept in a single row."""
+
+    document_count = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+
+class RevokedSignedToken(models.Model):
+    """A signed API token rejected before it expires, see blog.api.authentication."""
+
+    token_id = models.CharField(max_length=32, unique=True)
+    # The token is invalid from here on anyway and the row can go.
+    expires_date = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.token_id
+
+
+class FeedFile(models.Model):
+    """A feed document, or the rendered entries behind it, see blog.feeds.
+
+    Kept in the database so every web process serves what the worker wrote,
+    wherever each of them runs.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    content = models.TextField()
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """A task queued with blog.jobs.enqueue and run by ``manage.py runworker``."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # At most one pending job per key: enqueueing it again while it waits is a no-op.
+    idempotency_key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    # A running job whose lease expired belongs to a dead worker and is run again.
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    created_date = models.DateTimeField(default=timezone.now)
+    finished_date = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers look for due jobs by status and run_after.
+            models.Index(fields=["status", "run_after"], name="blog_job_due_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["idempotency_key"],
+                condition=models.Q(status="pending"),
+                name="blog_job_pending_key_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_approved_comment_count(sender, instance, **kwargs):
+    """Runs inside the delete's transaction, also for queryset deletes."""
+    if instance.approved_comment:
+        Post.objects.filter(pk=instance.post_id).update(
+            approved_comment_count=models.F("approved_comment_count") - 1
+        )
+        invalidate_post(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    """Publishing or editing a post changes its rendered fragments."""
+    invalidate_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    """The post's fragments die with it, the public lists change."""
+    invalidate_content()
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
@@ -0,0 +1,170 @@
+"""Static HTML of the published post pages and the index pages.
+
+``manage.py prerender`` renders the pages anonymous visitors see to
+PRERENDER_ROOT, one ``index.html`` per URL path, so ``/post/5/`` is
+``post/5/index.html``. blog.middleware.PrerenderedPageMiddleware, or a front
+proxy, serves them without running Django.
+
+A change to a post or its approved comments deletes the affected files once
+it commits, so visitors fall back to the live view until the next run
+renders them again.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections, transaction
+from django.db.models import Max, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve, reverse
+
+from blog.models import Post, Comment, comments_moderated
+from blog.views import get_published_posts
+
+
+# The views whose pages are prerendered.
+PRERENDERED_URL_NAMES = {"post_list", "post_list_page", "post_detail"}
+
+
+def write_file(path, content):
+    """Replace a file atomically, readers see the old or the new page."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    with os.fdopen(descriptor, "wb") as file:
+        file.write(content)
+    os.chmod(temporary, 0o644)
+    os.replace(temporary, path)
+
+
+def is_prerendered_path(path):
+    """Whether ``path`` is the URL of a page prerender writes, without touching the disk."""
+
+    try:
+        return resolve(path).url_name in PRERENDERED_URL_NAMES
+    except Resolver404:
+        return False
+
+
+def get_file_path(path):
+    return Path(settings.PRERENDER_ROOT) / path.lstrip("/") / "index.html"
+
+
+def get_index_path(page):
+    return reverse("post_list") if page == 1 else reverse("post_list_page", kwargs={"page": page})
+
+
+def get_page_versions():
+    """Return the version of every page to prerender, by URL path.
+
+    A post page changes with the post and its approved comments, an index
+    page with the posts it lists and the number of pages.
+    """
+
+    approved = Q(comments__approved_comment=True)
+    rows = list(
+        get_published_posts()
+        .annotate(comments_updated=Max("comments__updated_date", filter=approved))
+        .values_list("id", "updated_date", "approved_comment_count", "comments_updated")
+    )
+    versions = {}
+    for post_id, updated, comment_count, comments_updated in rows:
+        versions[reverse("post_detail", kwargs={"pk": post_id})] = f"{updated.isoformat()}|{comment_count}|{comments_updated}"
+
+    page_count = max(math.ceil(len(rows) / settings.POSTS_PER_PAGE), 1)
+    for page in range(1, page_count + 1):
+        listed = rows[(page - 1) * settings.POSTS_PER_PAGE:page * settings.POSTS_PER_PAGE]
+        state = "|".join(f"{post_id},{updated.isoformat()},{count}" for post_id, updated, count, _ in listed)
+        versions[get_index_path(page)] = hashlib.md5(f"{page_count}|{state}".encode()).hexdigest()
+    return versions
+
+
+def read_manifest():
+    try:
+        with open(settings.PRERENDER_MANIFEST) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_manifest(versions):
+    write_file(Path(settings.PRERENDER_MANIFEST), json.dumps(versions, sort_keys=True).encode())
+
+
+def render_pages(paths):
+    """Render pages as an anonymous visitor sees them and write them out.
+
+    Runs in the worker processes of ``manage.py prerender``. Returns the
+    paths that did not render with status 200.
+    """
+
+    factory = RequestFactory()
+    failed = []
+    for path in paths:
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        match = resolve(path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.status_code != 200:
+            failed.append(path)
+            continue
+        write_file(get_file_path(path), response.content)
+        write_file(get_file_path(path).with_suffix(".html.gz"), gzip.compress(response.content, mtime=0))
+    connections.close_all()
+    return failed
+
+
+def remove_pages(paths):
+    for path in paths:
+        file_path = get_file_path(path)
+        for file in (file_path, file_path.with_suffix(".html.gz")):
+            file.unlink(missing_ok=True)
+
+
+def remove_index_pages():
+    root = Path(settings.PRERENDER_ROOT)
+    paths = [reverse("post_list")]
+    if (root / "page").is_dir():
+        paths += [f"/page/{page.name}/" for page in (root / "page").iterdir()]
+    remove_pages(paths)
+
+
+def remove_post_pages(*post_ids):
+    """Stop serving the static pages that show the posts, once the change commits."""
+
+    def remove():
+        remove_pages([reverse("post_detail", kwargs={"pk": post_id}) for post_id in post_ids])
+        remove_index_pages()
+
+    transaction.on_commit(remove)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def remove_changed_post(sender, instance, raw=False, **kwargs):
+    # A draft with a page on disk was just unpublished.
+    if raw:
+        return
+    if instance.published_date is not None or get_file_path(reverse("post_detail", kwargs={"pk": instance.pk})).exists():
+        remove_post_pages(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def remove_commented_post(sender, instance, raw=False, **kwargs):
+    if not raw and instance.approved_comment:
+        remove_post_pages(instance.post_id)
+
+
+@receiver(comments_moderated)
+def remove_moderated_posts(sender, post_ids, **kwargs):
+    remove_post_pages(*post_ids)
@@ -0,0 +1,52 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Replica state of the request being handled. Outside a request (management
+# commands, the shell, tests) it is None and everything uses the primary.
+current_replica_state = ContextVar("blog_replica_state", default=None)
+
+
+class ReplicaState:
+    """Whether a request may read from a replica.
+
+    ``pinned`` sends its reads to the primary; it is set for unsafe methods,
+    for clients that wrote recently and as soon as the request writes.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+class PrimaryReplicaRouter:
+    """Send reads to the REPLICA_DATABASES and writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = current_replica_state.get()
+        replicas = settings.REPLICA_DATABASES
+        if state is None or state.pinned or not replicas:
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see its writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_replica_state.get()
+        if state is not None:
+            state.pinned = True
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,237 @@
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from blog.jobs import enqueue, task
+from blog.models import Post, SearchPosting, SearchStats, SearchTerm
+
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TERM_LENGTH = SearchTerm._meta.get_field("term").max_length
+MAX_QUERY_TERMS = 10
+# Title words count this many times as often as body words.
+TITLE_WEIGHT = 2
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+# Postings read per term and round of the top-k search.
+SEARCH_BLOCK_SIZE = 100
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have he her his i if in into is it
+    its me my no not of on or our she so that the their them then there these
+    they this to was we were what when which who will with you your
+""".split())
+
+
+def tokenize(text):
+    """Return the index terms of a text, in order."""
+
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if 1 < len(token) <= MAX_TERM_LENGTH and token not in STOP_WORDS
+    ]
+
+
+def get_term_frequencies(post):
+    """Return the weighted term counts of a post."""
+
+    frequencies = Counter(tokenize(post.text))
+    for term in tokenize(post.title):
+        frequencies[term] += TITLE_WEIGHT
+    return frequencies
+
+
+def get_impact(term_frequency, document_length, average_length):
+    """Return the BM25 weight of a term in a post, without the term's IDF.
+
+    Stored on the posting at index time, so the average length is the one
+    of that moment; rebuildsearchindex computes all of them afresh.
+    """
+
+    return term_frequency * (K1 + 1) / (
+        term_frequency + K1 * (1 - B + B * document_length / average_length)
+    )
+
+
+def get_impact_expression(average_length):
+    """get_impact as an expression over the posting's columns."""
+
+    term_frequency = Cast("term_frequency", FloatField())
+    document_length = Cast("document_length", FloatField())
+    return term_frequency * (K1 + 1) / (
+        term_frequency + K1 * (1 - B + B * document_length / average_length)
+    )
+
+
+def get_stats():
+    # A plain read first: get_or_create() is a write and would pin the
+    # request to the primary database.
+    stats = SearchStats.objects.filter(pk=1).first()
+    if stats is None:
+        stats, created = SearchStats.objects.get_or_create(pk=1)
+    return stats
+
+
+def update_stats(document_count, total_length):
+    """Apply a change to the corpus totals."""
+
+    get_stats()
+    SearchStats.objects.filter(pk=1).update(
+        document_count=F("document_count") + document_count,
+        total_length=F("total_length") + total_length,
+    )
+
+
+def remove_post(post_id):
+    """Remove a post from the index."""
+
+    with transaction.atomic():
+        postings = SearchPosting.objects.filter(post_id=post_id)
+        rows = list(postings.values_list("term_id", "document_length"))
+        if not rows:
+            return
+        term_ids = [term_id for term_id, length in rows]
+        SearchTerm.objects.filter(id__in=term_ids).update(document_frequency=F("document_frequency") - 1)
+        postings.delete()
+        update_stats(-1, -rows[0][1])
+
+
+def get_term_ids(terms):
+    """Return ``{term: id}``, creating the terms that are not indexed yet."""
+
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(term=term) for term in terms], batch_size=500, ignore_conflicts=True
+    )
+    term_ids = {}
+    for start in range(0, len(terms), 500):
+        batch = terms[start:start + 500]
+        term_ids.update(SearchTerm.objects.filter(term__in=batch).values_list("term", "id"))
+    return term_ids
+
+
+def index_post(post):
+    """(Re)index a post. Only published posts are searchable."""
+
+    with transaction.atomic():
+        remove_post(post.pk)
+        if not post.is_published():
+            return
+        frequencies = get_term_frequencies(post)
+        if not frequencies:
+            return
+        length = sum(frequencies.values())
+        stats = get_stats()
+        average_length = (stats.total_length + length) / (stats.document_count + 1)
+        term_ids = get_term_ids(list(frequencies))
+        SearchPosting.objects.bulk_create([
+            SearchPosting(term_id=term_ids[term], post_id=post.pk,
+                          term_frequency=frequency, document_length=length,
+                          impact=get_impact(frequency, length, average_length))
+            for term, frequency in frequencies.items()
+        ])
+        SearchTerm.objects.filter(id__in=term_ids.values()).update(
+            document_frequency=F("document_frequency") + 1
+        )
+        update_stats(1, length)
+
+
+def read_postings(term_id, after):
+    """Return the next block of a term's posting list, best impact first."""
+
+    postings = SearchPosting.objects.filter(term_id=term_id)
+    if after is not None:
+        impact, post_id = after
+        postings = postings.filter(Q(impact__lt=impact) | Q(impact=impact, post_id__gt=post_id))
+    return list(postings.order_by("-impact", "post_id").values_list("impact", "post_id")[:SEARCH_BLOCK_SIZE])
+
+
+def score_posts(post_ids, idf_by_term):
+    """Return the full score of each post over every query term."""
+
+    scores = dict.fromkeys(post_ids, 0.0)
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), 500):
+        postings = SearchPosting.objects.filter(
+            term_id__in=idf_by_term, post_id__in=post_ids[start:start + 500]
+        ).values_list("post_id", "term_id", "impact")
+        for post_id, term_id, impact in postings:
+            scores[post_id] += idf_by_term[term_id] * impact
+    return scores
+
+
+def search(query, offset=0, limit=10):
+    """Return ``[(post_id, score)]`` of published posts matching the query, best first.
+
+    Posts are ranked with BM25. The top ``offset + limit`` are found with
+    the threshold algorithm: the posting lists of the query terms are read
+    in blocks, best impact first, and every post seen is scored in full.
+    Reading stops once no unseen post can beat the results so far, so a
+    common term costs a few blocks instead of its whole posting list.
+    """
+
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    indexed = SearchTerm.objects.filter(term__in=terms, document_frequency__gt=0)
+    idf_by_term = {}
+    stats = get_stats()
+    for term_id, document_frequency in indexed.values_list("id", "document_frequency"):
+        idf_by_term[term_id] = math.log(
+            1 + (stats.document_count - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+    if not idf_by_term:
+        return []
+
+    wanted = offset + limit
+    scores = {}
+    # Last (impact, post_id) read from each list that is not exhausted.
+    positions = dict.fromkeys(idf_by_term)
+    while positions:
+        seen = set()
+        for term_id in list(positions):
+            block = read_postings(term_id, positions[term_id])
+            seen.update(post_id for impact, post_id in block)
+            if len(block) < SEARCH_BLOCK_SIZE:
+                del positions[term_id]
+            else:
+                positions[term_id] = block[-1]
+        scores.update(score_posts(seen - scores.keys(), idf_by_term))
+        # An unseen post scores at most the impacts last read from each list.
+        threshold = sum(idf_by_term[term_id] * impact for term_id, (impact, post_id) in positions.items())
+        if len(scores) >= wanted and sorted(scores.values(), reverse=True)[wanted - 1] >= threshold:
+            break
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[offset:offset + limit]
+
+
+@task(name="blog.search.index_post")
+def index_post_by_id(post_id):
+    """Index the current version of a post, see index_post."""
+
+    post = Post.objects.filter(pk=post_id).only("id", "title", "text", "published_date").first()
+    if post is not None:
+        index_post(post)
+
+
+@receiver(post_save, sender=Post)
+def queue_post_indexing(sender, instance, raw=False, **kwargs):
+    # Tokenizing and writing the postings is left to the worker. Drafts only
+    # need it to leave the index.
+    if raw:
+        return
+    if instance.published_date is not None or SearchPosting.objects.filter(post_id=instance.pk).exists():
+        enqueue(index_post_by_id, args=[instance.pk], key=f"search:post:{instance.pk}")
+
+
+@receiver(pre_delete, sender=Post)
+def remove_deleted_post(sender, instance, **kwargs):
+    # Before the delete cascades to the postings we need for the counters.
+    remove_post(instance.pk)
@@ -6,16 +6,33 @@ from .forms import PostForm
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
 from .forms import PostForm, CommentForm
-from .models import Post, Comment
+from .models import Post, Comment, FeedFile
+from .cache import get_content_version, get_post_version, public_cache
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from blog.api.conditional import conditional_response, make_etag
+from .feeds import FEEDS
 # Create your views here.
 
-def post_list(request):
-    posts = Post.objects.filter(published_date__lte=timezone.now()).order_by('published_date')
-    return render(request, 'blog/post_list.html', {'posts': posts})
+def get_published_posts():
+    return Post.objects.filter(published_date__lte=timezone.now()).order_by('-published_date', '-pk')
+
+def post_list(request, page=1):
+    paginator = Paginator(get_published_posts(), settings.POSTS_PER_PAGE)
+    try:
+        page = paginator.page(page)
+    except EmptyPage:
+        raise Http404("No such page.")
+    return render(request, 'blog/post_list.html', {'posts': page.object_list, 'page': page})
 
 def post_detail(request, pk):
+    # The version is read before the post: an edit committed in between
+    # must not put the old body in the cache under the new version.
+    post_version = get_post_version(pk)
     post = get_object_or_404(Post, pk=pk)
-    return render(request, 'blog/post_detail.html', {'post': post})
+    return render(request, 'blog/post_detail.html', {'post': post, 'post_version': post_version})
 
 @login_required
 def post_new(request):
@@ -87,3 +104,28 @@ def comment_remove(request, pk):
     comment.delete()
     return redirect('post_detail', pk=comment.post.pk)
 
+def feed(request, name):
+    """Serve a feed document kept up to date by blog.feeds.
+
+    Documents are cached in public_cache, writing them bumps the content
+    version: a poll runs no query until the feeds or any post change.
+    """
+    if name not in FEEDS:
+        raise Http404("No such feed.")
+    # Read before the row, see blog.api.conditional.cached_list_response.
+    version = get_content_version()
+    key = f"feed:{name}"
+    document = public_cache.get(key, version)
+    if document is None:
+        feed_file = FeedFile.objects.filter(name=name).first()
+        if feed_file is None:
+            raise Http404("No such feed.")
+        document = {"updated": feed_file.updated_date, "content": feed_file.content}
+        public_cache.set(key, document, version)
+    etag = make_etag(request, document["updated"].isoformat())
+    response = conditional_response(
+        request, etag, document["updated"],
+        lambda: HttpResponse(document["content"], content_type=FEEDS[name].content_type),
+    )
+    patch_cache_control(response, public=True, max_age=settings.FEED_MAX_AGE)
+    return response
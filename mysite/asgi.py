@@ -3,14 +3,48 @@ ASGI config for mysite project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests for the async API views (ASYNC_API_PREFIX) are handled with the
+async-native ASYNC_API_MIDDLEWARE only. The rest of MIDDLEWARE is sync and
+would move every request to a thread and back. Everything else goes through
+the regular stack.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
-application = get_asgi_application()
+
+class AsyncAPIHandler(ASGIHandler):
+    """ASGIHandler that builds its chain from ASYNC_API_MIDDLEWARE.
+
+    The middleware must be async capable and have no process_view,
+    process_template_response or process_exception hooks.
+    """
+
+    def load_middleware(self, is_async=False):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+        handler = convert_exception_to_response(self._get_response_async)
+        for middleware_path in reversed(settings.ASYNC_API_MIDDLEWARE):
+            handler = convert_exception_to_response(import_string(middleware_path)(handler))
+        self._middleware_chain = handler
+
+
+django_application = get_asgi_application()
+api_application = AsyncAPIHandler()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(settings.ASYNC_API_PREFIX):
+        return await api_application(scope, receive, send)
+    return await django_application(scope, receive, send)
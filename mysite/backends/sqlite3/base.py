@@ -0,0 +1,51 @@
+"""SQLite backend tuned for several processes sharing one database file.
+
+Use it as ENGINE 'mysite.backends.sqlite3'. Extra OPTIONS:
+
+* ``pragmas``: PRAGMAs to run on every new connection, merged into
+  DEFAULT_PRAGMAS.
+* ``transaction_mode``: how atomic blocks begin their transaction,
+  'IMMEDIATE' by default.
+
+Every other option is passed to sqlite3.connect() as usual.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+DEFAULT_PRAGMAS = {
+    # Readers no longer block the writer and the writer no longer blocks readers.
+    "journal_mode": "WAL",
+    # In WAL mode only a power loss can lose the last commits, never corrupt.
+    "synchronous": "NORMAL",
+    # Wait this many milliseconds for a lock instead of failing at once.
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **kwargs.pop("pragmas", {})}
+        self.transaction_mode = kwargs.pop("transaction_mode", "IMMEDIATE").upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}.")
+        # Python's own lock timeout, in seconds; busy_timeout replaces it.
+        kwargs.setdefault("timeout", self.pragmas["busy_timeout"] / 1000)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # A DEFERRED transaction that reads first and writes later cannot wait
+        # for the write lock: SQLite fails it at once with "database is
+        # locked". Taking the lock at BEGIN lets busy_timeout queue writers.
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
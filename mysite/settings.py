@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from operator import truediv
 from pathlib import Path
 from pickle import NONE
@@ -46,7 +47,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.SQLInstrumentationMiddleware',
+    'blog.middleware.CompressionMiddleware',
+    'blog.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.PrerenderedPageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,6 +60,17 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# The async API views are served by mysite.asgi with only these, which run
+# on the event loop without a thread hop. They must not need sessions, CSRF
+# or the other MIDDLEWARE above.
+ASYNC_API_PREFIX = '/async/'
+ASYNC_API_MIDDLEWARE = [
+    'blog.middleware.SQLInstrumentationMiddleware',
+    'blog.middleware.CompressionMiddleware',
+    'blog.middleware.ReplicaPinningMiddleware',
+    'blog.middleware.AsyncSecurityMiddleware',
+]
+
 ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
@@ -79,14 +95,78 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# mysite.backends.sqlite3 is the stock SQLite backend with WAL, a busy
+# timeout and BEGIN IMMEDIATE transactions, so several gunicorn workers can
+# share the file. `manage.py benchsqlite` compares it with the stock backend.
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'mysite.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# A file based cache is shared by every worker process on the machine, so
+# version bumps made by one worker are seen by all of them. It is not shared
+# between machines: on Heroku every dyno has its own, and running more than
+# one web dyno needs a shared backend such as Memcached configured here.
+# MAX_ENTRIES covers the version key and cached post_detail body of every
+# post plus the cached list responses; past it a third of the entries is
+# evicted at random.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# The tests run against a local memory cache instead, see mysite.test_runner.
+TEST_RUNNER = 'mysite.test_runner.TestRunner'
+
+# Responses of the anonymous read endpoints are kept in a per-process LRU of
+# this many entries in front of the shared cache above. Both are keyed by a
+# content version that every post or comment change bumps.
+PUBLIC_CACHE_MAX_ENTRIES = 256
+PUBLIC_CACHE_TIMEOUT = 60 * 10
+
+
+# Background jobs, see blog.jobs and manage.py runworker.
+# A failing job is retried after JOB_RETRY_DELAY seconds, doubling every time.
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+# A running job is given to another worker once this many seconds pass
+# without it finishing, its worker is assumed dead.
+JOB_LEASE_SECONDS = 60 * 5
+# runworker deletes jobs that finished, done or failed, this long ago.
+JOB_KEEP_FINISHED_SECONDS = 60 * 60 * 24 * 7
+
+# Atom and RSS feeds of the latest FEED_LENGTH posts, rendered by the worker
+# into the database (see blog.feeds) and served at /feeds/ with one query.
+# Clients may reuse them for FEED_MAX_AGE seconds. FEED_SITE_URL makes the
+# links absolute, there is no request.
+FEED_LENGTH = 20
+FEED_MAX_AGE = 60
+FEED_TITLE = 'Blog'
+FEED_DESCRIPTION = 'The latest posts.'
+FEED_SITE_URL = os.environ.get('FEED_SITE_URL', 'http://127.0.0.1:8000')
+
+# Posts on each page of post_list.
+POSTS_PER_PAGE = 10
+
+# Static HTML of the public pages, written by manage.py prerender and served
+# to visitors without a session (see blog.prerender). PRERENDER_MANIFEST
+# records the version each page was rendered at; it must not be served.
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+PRERENDER_MANIFEST = BASE_DIR / 'prerendered.json'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -138,13 +218,63 @@ LOGIN_REDIRECT_URL = '/'
 import django_on_heroku
 django_on_heroku.settings(locals())
 
+# Read replicas
+# Each comma separated URL in DATABASE_REPLICA_URLS becomes a database alias
+# (replica1, replica2, ...). Reads of safe-method requests go to a random
+# replica; writes, reads in transactions, the requests of a client that
+# wrote in the last REPLICA_PIN_SECONDS and all requests in the
+# REPLICA_PIN_SECONDS after a content change go to the primary, so it must
+# exceed the replicas' lag. To try it locally
+# with two SQLite files:
+#   cp db.sqlite3 db-replica.sqlite3
+#   DATABASE_REPLICA_URLS=sqlite:///db-replica.sqlite3 python manage.py runserver
+import dj_database_url
+
+REPLICA_DATABASES = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dj_database_url.parse(url.strip(), conn_max_age=DATABASES['default'].get('CONN_MAX_AGE', 0))
+    # Tests run against the primary only.
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
+        'blog.api.authentication.SignedTokenAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
 
+# Keys for the signed "Authorization: Signed <token>" API tokens, as
+# (key id, secret) pairs. The first key signs new tokens and every key is
+# accepted, so a key can be rotated by putting a new pair in front and
+# dropping the old one once SIGNED_TOKEN_MAX_AGE has passed.
+SIGNED_TOKEN_KEYS = [
+    ('1', os.environ.get('SIGNED_TOKEN_SECRET', SECRET_KEY)),
+]
+SIGNED_TOKEN_MAX_AGE = 60 * 60 * 24
+
+# Worker threads the async API views use for database queries.
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 8))
+
+# Requests per route kept for the SQL stats API.
+SQL_STATS_WINDOW = 1000
+
+# Responses smaller than this many bytes are not compressed. Compressed
+# versioned responses are cached for COMPRESSION_CACHE_TIMEOUT seconds.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE_TIMEOUT = 60 * 60
+
+# Encoded JSON of single posts and comments each process keeps for list
+# responses, see blog.api.fragments. Entries are checked against the post
+# versions, so edits never serve stale fragments.
+FRAGMENT_CACHE_MAX_ENTRIES = 10000
+
 
 AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend', # default
@@ -0,0 +1,138 @@
+import json
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TransactionTestCase
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+
+from blog.api.async_views import (
+    AsyncPublishedPostsAPIView,
+    AsyncPostAPIView,
+    AsyncPostCommentsAPIView,
+    AsyncApprovedCommentsAPIView,
+)
+from blog.models import Post, Comment
+
+
+class AsyncAPIViewsTestCase(TransactionTestCase):
+    """Async read endpoints test case.
+
+    The views query the database from worker threads, which only see
+    committed rows, hence TransactionTestCase.
+    """
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(
+            author = self.user,
+            title = "Test title",
+            text = "Test post",
+            published_date = timezone.now()
+        )
+        self.comment = Comment.objects.create(
+            post = self.post,
+            author = "Test author",
+            text = "Test comment",
+            approved_comment = True
+        )
+
+    def get(self, view, url, token=None, **kwargs):
+        headers = {"HTTP_AUTHORIZATION": "Token " + token} if token else {}
+        request = self.request_factory.get(url, **headers)
+        response = async_to_sync(view)(request, **kwargs)
+        return response.status_code, json.loads(response.content)
+
+    def test_published_posts(self) -> None:
+        """Published posts are served without authentication."""
+        status, data = self.get(AsyncPublishedPostsAPIView.as_view(), "/async/post/published/")
+
+        self.assertEqual(status, 200)
+        self.assertEqual([post["id"] for post in data["data"]], [self.post.id])
+
+    def test_approved_comments(self) -> None:
+        """Approved comments are served without authentication."""
+        status, data = self.get(AsyncApprovedCommentsAPIView.as_view(), "/async/comments/approved/")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["data"][0]["post"]["id"], self.post.id)
+
+    def test_post_requires_authentication(self) -> None:
+        """A post is only served to authenticated clients."""
+        view = AsyncPostAPIView.as_view()
+        url = "/async/posts/%d/" % self.post.id
+
+        status, data = self.get(view, url, post_id=self.post.id)
+        self.assertEqual(status, 401)
+
+        status, data = self.get(view, url, token=self.user.auth_token.key, post_id=self.post.id)
+        self.assertEqual(status, 200)
+        self.assertEqual(data["data"]["title"], "Test title")
+
+        status, data = self.get(view, url, token=self.user.auth_token.key, post_id=self.post.id + 1)
+        self.assertEqual(status, 404)
+
+    def test_permissions_are_checked(self) -> None:
+        """The DRF permission classes of the view apply, as in the sync API."""
+        view = AsyncPostAPIView.as_view(permission_classes=[IsAdminUser])
+
+        status, data = self.get(view, "/async/posts/%d/" % self.post.id, token=self.user.auth_token.key, post_id=self.post.id)
+
+        self.assertEqual(status, 403)
+
+    def asgi_get(self, path, query_string=b""):
+        """Request the path from the ASGI application, return status, headers and body."""
+        from mysite.asgi import application
+
+        async def request():
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query_string,
+                "root_path": "", "headers": [(b"host", b"testserver")],
+                "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+            }
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({"type": "http.request", "body": b""})
+            start = await communicator.receive_output()
+            body = b""
+            while True:
+                message = await communicator.receive_output()
+                body += message.get("body", b"")
+                if not message.get("more_body"):
+                    return start["status"], dict(start["headers"]), body
+
+        return async_to_sync(request)()
+
+    def test_asgi_application_skips_sync_middleware(self) -> None:
+        """Under ASGI the async API runs without the sync middleware, the rest with it."""
+        status, headers, body = self.asgi_get("/async/post/published/")
+        self.assertEqual(status, 200)
+        self.assertIn(b"Server-Timing", headers)
+        self.assertNotIn(b"X-Frame-Options", headers)
+
+        status, headers, body = self.asgi_get("/post/published/")
+        self.assertEqual(status, 200)
+        self.assertIn(b"X-Frame-Options", headers)
+
+    def test_published_posts_ignore_stream(self) -> None:
+        """?stream=1 answers with a page, a streamed body would query on the event loop."""
+        status, headers, body = self.asgi_get("/async/post/published/", b"stream=1")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["data"][0]["id"], self.post.id)
+
+    def test_post_comments(self) -> None:
+        """The comments of a post are listed."""
+        status, data = self.get(
+            AsyncPostCommentsAPIView.as_view(),
+            "/async/post/%d/comments/" % self.post.id,
+            token=self.user.auth_token.key,
+            post_id=self.post.id,
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data["data"][0]["id"], self.comment.id)
@@ -0,0 +1,117 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from blog.api.authentication import SignedTokenAuthentication, issue_signed_token
+from blog.api.views import SignedAuthToken, UnpublishedPostsAPIView
+
+
+class SignedTokenAuthenticationTestCase(TestCase):
+    """SignedTokenAuthentication test case."""
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        self.user = User.objects.create(username="testuser")
+        self.user.set_password("testpassword")
+        self.user.save()
+        self.view = UnpublishedPostsAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+
+    def get(self, token):
+        request = self.request_factory.get("post/unpublished/", HTTP_AUTHORIZATION="Signed " + token)
+        return self.view(request)
+
+    def test_signed_token_authenticates_without_a_query(self) -> None:
+        """A valid token is checked in memory, its user is loaded on first use."""
+        token = issue_signed_token(self.user)
+        self.get(token)
+        request = self.request_factory.get("post/unpublished/", HTTP_AUTHORIZATION="Signed " + token)
+
+        with self.assertNumQueries(0):
+            user, auth = SignedTokenAuthentication().authenticate(request)
+            # What IsAuthenticated checks.
+            self.assertTrue(user and user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "testuser")
+
+        self.assertEqual(auth.user_id, self.user.pk)
+
+    def test_inactive_user_is_rejected(self) -> None:
+        """Deactivating a user rejects their tokens at once."""
+        token = issue_signed_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_reactivated_user_is_accepted(self) -> None:
+        """Reactivating a user accepts their tokens again."""
+        token = issue_signed_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.user.is_active = True
+        self.user.save()
+
+        self.assertEqual(self.get(token).status_code, 200)
+
+    def test_deleted_user_is_rejected(self) -> None:
+        """Deleting a user rejects their tokens at once."""
+        token = issue_signed_token(self.user)
+        self.user.delete()
+
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_tampered_token_is_rejected(self) -> None:
+        """A token with a broken signature returns 401."""
+        token = issue_signed_token(self.user)
+
+        response = self.get(token[:-2] + "xx")
+
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SIGNED_TOKEN_MAX_AGE=-1)
+    def test_expired_token_is_rejected(self) -> None:
+        """An expired token returns 401."""
+        response = self.get(issue_signed_token(self.user))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotated_keys_keep_old_tokens_working(self) -> None:
+        """Tokens signed with an older key stay valid until that key is dropped."""
+        with self.settings(SIGNED_TOKEN_KEYS=[("old", "old-secret")]):
+            token = issue_signed_token(self.user)
+
+        with self.settings(SIGNED_TOKEN_KEYS=[("new", "new-secret"), ("old", "old-secret")]):
+            self.assertEqual(self.get(token).status_code, 200)
+            self.assertTrue(issue_signed_token(self.user).startswith("new:"))
+
+        with self.settings(SIGNED_TOKEN_KEYS=[("new", "new-secret")]):
+            self.assertEqual(self.get(token).status_code, 401)
+
+    def test_db_tokens_keep_working(self) -> None:
+        """Existing database tokens are still accepted."""
+        request = self.request_factory.get(
+            "post/unpublished/", HTTP_AUTHORIZATION="Token " + self.user.auth_token.key
+        )
+
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_issue_and_revoke_token(self) -> None:
+        """The signed token endpoint issues tokens and revokes them on DELETE, in the database."""
+        request = self.request_factory.post(
+            "api-signed-token-auth/", {"username": "testuser", "password": "testpassword"}
+        )
+        response = SignedAuthToken.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        token = response.data["token"]
+        self.assertEqual(self.get(token).status_code, 200)
+
+        request = self.request_factory.delete("api-signed-token-auth/", HTTP_AUTHORIZATION="Signed " + token)
+        response = SignedAuthToken.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        cache.clear()
+        self.assertEqual(self.get(token).status_code, 401)
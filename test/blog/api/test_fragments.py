@@ -0,0 +1,118 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.api.fragments import FragmentCache, FragmentJSONResponse, encode
+from blog.models import Post, Comment
+
+
+class FragmentJSONResponseTestCase(TestCase):
+    """Fragment splicing test case."""
+
+    def test_envelope(self) -> None:
+        """Fragments are spliced into the envelope as they are."""
+        fragments = [encode({"id": 1, "title": "Ünïcode"}), encode({"id": 2, "title": "B"})]
+        response = FragmentJSONResponse({"data": fragments, "count": 2}, list_key="data")
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(response.content), {
+            "data": [{"id": 1, "title": "Ünïcode"}, {"id": 2, "title": "B"}], "count": 2,
+        })
+        self.assertEqual(FragmentJSONResponse([]).data, [])
+
+
+class FragmentCacheLRUTestCase(TestCase):
+    """Fragment LRU test case."""
+
+    def test_least_recently_used_entries_are_dropped(self) -> None:
+        """The cache never holds more than max_entries."""
+        fragments = FragmentCache(2)
+        fragments.set_many({"a": (1, 1, "A"), "b": (1, 1, "B")})
+        fragments.get_many(["a"])
+        fragments.set_many({"c": (1, 1, "C")})
+
+        self.assertEqual(set(fragments.get_many(["a", "b", "c"])), {"a", "c"})
+
+
+class FragmentCacheTestCase(TestCase):
+    """Per object fragment cache test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"Post {i}", text=f"Text {i}", published_date=timezone.now())
+            for i in range(3)
+        ]
+        self.comment = Comment.objects.create(post=self.posts[0], author="Reader", text="Nice", approved_comment=True)
+        self.headers = {"HTTP_AUTHORIZATION": "Token " + self.user.auth_token.key}
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries]
+
+    def test_cached_posts_are_not_loaded(self) -> None:
+        """A repeat request only reads ids and versions."""
+        first, first_sql = self.get("/post/list/")
+        second, second_sql = self.get("/post/list/")
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(second_sql), len(first_sql) - 1)
+        self.assertFalse(any('"blog_post"."text"' in sql for sql in second_sql))
+
+    def test_saved_post_is_reserialized(self) -> None:
+        """Saving a post gives it a new fragment, the others stay cached."""
+        self.get("/post/list/")
+        post = self.posts[1]
+        post.title = "Edited"
+        post.save()
+
+        response, sql = self.get("/post/list/")
+
+        titles = {item["id"]: item["title"] for item in response.data}
+        self.assertEqual(titles[post.pk], "Edited")
+        self.assertEqual(titles[self.posts[0].pk], "Post 0")
+        self.assertIn(f"IN ({post.pk})", sql[-1])
+
+    def test_shapes_are_cached_apart(self) -> None:
+        """Fields and excerpts never get each other's fragments."""
+        self.get("/post/published/")
+        titles, _ = self.get("/post/published/?fields=title")
+        excerpts, _ = self.get("/post/published/?excerpt=2")
+
+        self.assertEqual(set(titles.data["data"][0]), {"id", "title"})
+        self.assertEqual(excerpts.data["data"][0]["text"], "Te")
+        self.assertTrue(excerpts.data["data"][0]["truncated"])
+
+    def test_comment_embeds_current_post(self) -> None:
+        """Editing the post of a cached comment refreshes the comment."""
+        self.get("/comments/approved/")
+        post = self.posts[0]
+        post.title = "Edited"
+        post.save()
+        Comment.objects.create(post=post, author="Reader", text="Approved later").approve()
+
+        response, _ = self.get("/comments/approved/")
+
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual({item["post"]["title"] for item in response.data["data"]}, {"Edited"})
+
+    def test_edited_pending_comment_is_current(self) -> None:
+        """Pending comments change no version and are never served from a fragment."""
+        pending = Comment.objects.create(post=self.posts[0], author="Reader", text="Draft")
+        path = f"/post/{self.posts[0].pk}/comments/"
+        self.get(path)
+
+        pending.text = "Edited"
+        pending.save()
+        response, _ = self.get(path)
+
+        self.assertEqual({item["text"] for item in response.data["data"]}, {"Nice", "Edited"})
@@ -1,5 +1,9 @@
+import json
 from urllib import request, response
+from django.core.cache import cache
+from django.db import connection
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -17,9 +21,12 @@ from blog.api.views import (
     ApprovedCommentsAPIView,
     UnpublishedPostsAPIView,
     PostAPIView,
+    PostBulkAPIView,
     ListAPIView,
     CommentAPIView,
     CommentsAPIView,
+    CommentBulkAPIView,
+    CommentModerationAPIView,
     PostCommentsAPIView,
     ApprovingCommentAPIView,
     PostPublishingAPIView,
@@ -39,6 +46,8 @@ class PublishedPostsAPIViewTestCase(APITestCase):
 
     def setUp(self) -> None:
         """Run this setup before each test."""
+        # Rolled back test data leaves the public cache's content version as it was.
+        cache.clear()
         self.url = "post/published/"
         self.view = PublishedPostsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -53,6 +62,7 @@ class PublishedPostsAPIViewTestCase(APITestCase):
                     "id": post.id, 
                     "title": post.title, 
                     "text": post.text,
+                    "excerpt": post.excerpt,
                     "is_published": post.is_published(),
                     }
                 posts_data.append(data)
@@ -67,7 +77,9 @@ class PublishedPostsAPIViewTestCase(APITestCase):
         posts_data = self.get_posts_data(posts)
         expected = {
             "data": posts_data,
-            "count": len(posts_data)
+            "page_size": len(posts_data),
+            "next": None,
+            "previous": None
         }
 
         published_posts_count = Post.objects.exclude(published_date=None).count()
@@ -78,8 +90,87 @@ class PublishedPostsAPIViewTestCase(APITestCase):
         response_data = response.data
         
         self.assertEqual(response_data, expected)
-        self.assertEqual(published_posts_count, response_data["count"])
-       
+        self.assertEqual(published_posts_count, response_data["page_size"])
+
+    def test_get_method_pages_with_cursor(self) -> None:
+        """GET method should walk published posts page by page."""
+
+        user = User.objects.create(username="testuser")
+        published_date = timezone.now()
+        for i in range(5):
+            Post.objects.create(
+                author = user,
+                title = "Test title %d" % i,
+                text = "Test post",
+                published_date = published_date
+            )
+        expected_ids = list(Post.objects.order_by("id").values_list("id", flat=True))
+
+        request = self.request_factory.get(self.url, {"page_size": 2})
+        response = self.view(request)
+        first_page = response.data
+
+        seen_ids = [post["id"] for post in first_page["data"]]
+        next_url = first_page["next"]
+        self.assertIsNone(first_page["previous"])
+        while next_url:
+            request = self.request_factory.get(next_url)
+            response = self.view(request)
+            seen_ids += [post["id"] for post in response.data["data"]]
+            last_page = response.data
+            next_url = response.data["next"]
+
+        self.assertEqual(seen_ids, expected_ids)
+        self.assertIsNotNone(last_page["previous"])
+
+        request = self.request_factory.get(last_page["previous"])
+        response = self.view(request)
+        self.assertEqual([post["id"] for post in response.data["data"]], expected_ids[2:4])
+
+    def test_get_method_answers_conditional_requests(self) -> None:
+        """GET method returns 304, from the public cache, until a post is published or edited."""
+
+        user = User.objects.create(username="testuser")
+        post = Post.objects.create(author = user, title = "Test title", text = "Test post")
+        post.publish()
+
+        response = self.view(self.request_factory.get(self.url))
+        etag = response["ETag"]
+
+        request = self.request_factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        with self.assertNumQueries(0):
+            response = self.view(request)
+        self.assertEqual(response.status_code, 304)
+
+        Post.objects.create(author = user, title = "Test title", text = "Test post").publish()
+        request = self.request_factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_method_revalidates_after_delete(self) -> None:
+        """Lists carry no Last-Modified, If-Modified-Since cannot hide a deletion."""
+
+        user = User.objects.create(username="testuser")
+        for i in range(2):
+            Post.objects.create(author = user, title = "Test title", text = "Test post").publish()
+        response = self.view(self.request_factory.get(self.url))
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        Post.objects.first().delete()
+        request = self.request_factory.get(self.url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["page_size"], 1)
+
+    def test_get_method_rejects_invalid_cursor(self) -> None:
+        """GET method should return 400 on a cursor it did not issue."""
+
+        request = self.request_factory.get(self.url, {"cursor": "not-a-cursor"})
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["title"], "Error")
+
 class ApprovedCommentsAPIViewTestCase(TestCase):
     """ApprovedCommentsAPIView test case."""
     
@@ -90,6 +181,8 @@ class ApprovedCommentsAPIViewTestCase(TestCase):
     
     def setUp(self) -> None:
         """Run this setup before each test."""
+        # Rolled back test data leaves the public cache's content version as it was.
+        cache.clear()
         self.url = "comments/approved/"
         self.view = ApprovedCommentsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -146,7 +239,37 @@ class ApprovedCommentsAPIViewTestCase(TestCase):
         
         self.assertEqual(response_data, expected)
         self.assertEqual(approved_comments_count, response_data["count"])
-        
+
+    def create_approved_comments(self, count) -> None:
+        """Create approved comments spread over a few posts."""
+
+        user = User.objects.create(username="testuser%d" % count)
+        posts = [
+            Post.objects.create(author = user, title = "Test title", text = "Test post")
+            for i in range(3)
+        ]
+        for i in range(count):
+            Comment.objects.create(
+                post = posts[i % len(posts)],
+                author = "Test author",
+                text = "Test comment",
+                approved_comment = True
+            )
+
+    def test_get_method_query_count_does_not_grow_with_comments(self) -> None:
+        """GET method should use the same number of queries for 1 or 30 comments."""
+
+        # Comments, posts.
+        self.create_approved_comments(1)
+        with self.assertNumQueries(2):
+            response = self.view(self.request_factory.get(self.url))
+        self.assertEqual(response.data["count"], 1)
+
+        self.create_approved_comments(29)
+        with self.assertNumQueries(2):
+            response = self.view(self.request_factory.get(self.url))
+        self.assertEqual(response.data["count"], 30)
+
 class UnpublishedPostsAPIViewTestCase(TestCase):
     """UnpublishedPostsAPIView test case."""
     
@@ -171,6 +294,7 @@ class UnpublishedPostsAPIViewTestCase(TestCase):
                     "id": post.id, 
                     "title": post.title, 
                     "text": post.text,
+                    "excerpt": post.excerpt,
                     "is_published": post.is_published(),
                     }
                 posts_data.append(data)
@@ -187,7 +311,9 @@ class UnpublishedPostsAPIViewTestCase(TestCase):
         posts_data = self.get_posts_data(posts)
         expected = {
             "data": posts_data,
-            "count": len(posts_data)
+            "page_size": len(posts_data),
+            "next": None,
+            "previous": None
         }
         
         unpublished_posts_count = Post.objects.filter(published_date = None).count()
@@ -199,7 +325,7 @@ class UnpublishedPostsAPIViewTestCase(TestCase):
         response_data = response.data
         
         self.assertEqual(response_data, expected)
-        self.assertEqual(unpublished_posts_count, response_data["count"])
+        self.assertEqual(unpublished_posts_count, response_data["page_size"])
        
 class PostAPIViewTestCase(TestCase):
     """PostAPIView test case."""
@@ -225,6 +351,7 @@ class PostAPIViewTestCase(TestCase):
                 "id": post.id, 
                 "title": post.title, 
                 "text": post.text,
+                "excerpt": post.excerpt,
                 "is_published": post.is_published(),
                 }
             posts_data.append(data)
@@ -238,6 +365,7 @@ class PostAPIViewTestCase(TestCase):
             "id": post.id, 
             "title": post.title, 
             "text": post.text, 
+            "rendered_html": post.rendered_html,
             "author": post.author.id,
             "is_published": post.is_published()
             }
@@ -269,6 +397,37 @@ class PostAPIViewTestCase(TestCase):
 
         self.assertEqual(response_data, expected)
         self.assertEqual(response.status_code, 200)
+
+    def test_get_method_answers_conditional_requests(self) -> None:
+        """Get method returns 304 while the post is unchanged."""
+
+        user = User.objects.create(username="testuser")
+        post = Post.objects.create(
+                author = user,
+                title = "Test title",
+                text = "Test post"
+                )
+        self.url = "posts/" + str(post.id) + "/"
+
+        request = self.request_factory.get(self.url)
+        force_authenticate(request, user=user, token=user.auth_token)
+        response = self.view(request, post_id=post.id)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        request = self.request_factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=user, token=user.auth_token)
+        with self.assertNumQueries(1):
+            response = self.view(request, post_id=post.id)
+        self.assertEqual(response.status_code, 304)
+
+        post.title = "Edited test title"
+        post.save()
+        request = self.request_factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=user, token=user.auth_token)
+        response = self.view(request, post_id=post.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
     
     
     def test_get_method_views_a_post_error(self) -> None:
@@ -614,6 +773,22 @@ class ListAPIViewTestCase(TestCase):
         response = self.view(request)
         
         self.assertEqual(response.status_code, 200)
+
+    def test_get_method_streams_all_post(self) -> None:
+        """GET method with ?stream=1 should stream the same data as a JSON array."""
+
+        user = User.objects.create(username="testuser")
+        for i in range(3):
+            Post.objects.create(author = user, title = "Test title %d" % i, text = "Test post")
+        expected = PostSerializer(Post.objects.order_by("id"), many=True).data
+
+        request = self.request_factory.get(self.url, {"stream": "1"})
+        force_authenticate(request, user=user, token=user.auth_token)
+        response = self.view(request)
+
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content)
+        self.assertEqual(json.loads(body), expected)
         
 class CommentAPIViewTestCase(TestCase):
     """CommentAPIView test case."""
@@ -636,6 +811,7 @@ class CommentAPIViewTestCase(TestCase):
                 "id": post.id, 
                 "title": post.title, 
                 "text": post.text,
+                "excerpt": post.excerpt,
                 "is_published": post.is_published(),
                 }
             posts_data.append(data)
@@ -746,6 +922,7 @@ class CommentsAPIViewTestCase(TestCase):
                 "id": post.id, 
                 "title": post.title, 
                 "text": post.text,
+                "excerpt": post.excerpt,
                 "is_published": post.is_published(),
                 }
             posts_data.append(data)
@@ -888,6 +1065,7 @@ class PostCommentsAPIViewTestCase(TestCase):
                     "id": post.id, 
                     "title": post.title, 
                     "text": post.text,
+                    "excerpt": post.excerpt,
                     "is_published": post.is_published(),
                     }
                 posts_data.append(data)
@@ -1179,3 +1357,307 @@ class CustomAuthTokenTestCase(TestCase):
         self.assertEqual(response_data["message"], expected)
         self.assertEqual(response.status_code, 400)
 
+
+
+class PostBulkAPIViewTestCase(TestCase):
+    """PostBulkAPIView test case."""
+
+    def setUp(self) -> None:
+        self.url = "posts/bulk/"
+        self.view = PostBulkAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+
+    def post(self, data):
+        request = self.request_factory.post(self.url, data, format="json")
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return self.view(request)
+
+    def test_post_method_creates_all_posts(self) -> None:
+        """Post method creates every post with a fixed number of queries."""
+
+        data = [
+            {"author": self.user.id, "title": "Test title %d" % i, "text": "Test text"}
+            for i in range(20)
+        ]
+
+        with self.assertNumQueries(4):
+            response = self.post(data)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual([item["status"] for item in response.data["data"]], [201] * 20)
+
+    def test_post_method_renders_text(self) -> None:
+        """Post method stores the rendered text save() would."""
+
+        self.post([{"author": self.user.id, "title": "Test title", "text": "Line one\nLine two"}])
+
+        post = Post.objects.get()
+        self.assertEqual(post.rendered_html, "Line one<br>Line two")
+        self.assertEqual(post.excerpt, "Line one\nLine two")
+
+    def test_post_method_reports_item_errors(self) -> None:
+        """Post method creates the valid posts and reports the invalid ones."""
+
+        data = [
+            {"author": self.user.id, "title": "Test title", "text": "Test text"},
+            {"author": self.user.id + 100, "title": "Test title", "text": "Test text"},
+            {"author": self.user.id, "text": "Test text"},
+        ]
+
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(Post.objects.count(), 1)
+        results = response.data["data"]
+        self.assertEqual([item["status"] for item in results], [201, 400, 400])
+        self.assertIn("author", results[1]["errors"])
+        self.assertIn("title", results[2]["errors"])
+
+    def test_post_method_rejects_non_list(self) -> None:
+        """Post method needs a JSON array."""
+
+        response = self.post({"author": self.user.id, "title": "Test title", "text": "Test text"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class CommentBulkAPIViewTestCase(TestCase):
+    """CommentBulkAPIView test case."""
+
+    def setUp(self) -> None:
+        self.url = "comments/bulk/"
+        self.view = CommentBulkAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(author = self.user, title = "Test title", text = "Test post")
+
+    def test_post_method_creates_comments(self) -> None:
+        """Post method creates comments on existing posts only."""
+
+        data = [
+            {"post": self.post.id, "author": "Test author", "text": "Test comment"},
+            {"post": self.post.id, "author": "Test author", "text": "Test comment"},
+            {"post": self.post.id + 1, "author": "Test author", "text": "Test comment"},
+        ]
+        request = self.request_factory.post(self.url, data, format="json")
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(self.post.comments.count(), 2)
+        self.assertEqual(response.data["data"][2]["status"], 400)
+
+
+class CommentModerationAPIViewTestCase(TestCase):
+    """CommentModerationAPIView test case."""
+
+    def setUp(self) -> None:
+        self.url = "comments/moderate/"
+        self.view = CommentModerationAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.posts = [
+            Post.objects.create(author = self.user, title = f"Test title {i}", text = "Test post")
+            for i in range(2)
+        ]
+        self.comments = [
+            Comment.objects.create(post = post, author = author, text = "Test comment")
+            for post in self.posts for author in ("Spammer", "Reader")
+        ]
+        self.comments[1].approve()
+
+    def moderate(self, data):
+        request = self.request_factory.post(self.url, data, format="json")
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return self.view(request)
+
+    def get_counts(self):
+        return [post.approved_comment_count for post in Post.objects.order_by("pk")]
+
+    def test_approve_by_ids(self) -> None:
+        """Pending comments are approved with one UPDATE and counted once."""
+
+        ids = [comment.id for comment in self.comments[:3]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.moderate({"action": "approve", "ids": ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["approved"], 2)
+        self.assertEqual(self.get_counts(), [2, 1])
+        updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "blog_comment"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_delete_by_filter(self) -> None:
+        """Deleting by author keeps the approved comment counts right."""
+
+        self.comments[0].approve()
+        response = self.moderate({"action": "delete", "author": "Spammer"})
+
+        self.assertEqual(response.data["deleted"], 2)
+        self.assertEqual(Comment.objects.filter(author="Spammer").count(), 0)
+        self.assertEqual(self.get_counts(), [1, 0])
+
+    def test_filters_combine(self) -> None:
+        """Filters narrow each other down, a match of nothing changes nothing."""
+
+        response = self.moderate({"action": "delete", "post": self.posts[1].id, "author": "Nobody"})
+        self.assertEqual(response.data["deleted"], 0)
+
+        self.moderate({"action": "approve", "post": self.posts[1].id, "created_before": timezone.now().isoformat()})
+        self.assertEqual(self.get_counts(), [1, 2])
+
+    def test_invalid_request(self) -> None:
+        """A request without ids or a filter approves nothing."""
+
+        for data in ({"action": "approve"}, {"action": "publish", "ids": [1]},
+                     {"action": "delete", "ids": [1], "post": 1}):
+            response = self.moderate(data)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["title"], "Error")
+        self.assertEqual(self.get_counts(), [1, 0])
+
+
+class SparseFieldsetsTestCase(TestCase):
+    """?fields= test case."""
+
+    def setUp(self) -> None:
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(
+            author = self.user,
+            title = "Test title",
+            text = "Test post",
+            published_date = timezone.now()
+        )
+        self.comment = Comment.objects.create(
+            post = self.post,
+            author = "Test author",
+            text = "Test comment",
+            approved_comment = True
+        )
+
+    def get(self, view, url, **kwargs):
+        request = self.request_factory.get(url)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        with CaptureQueriesContext(connection) as context:
+            response = view(request, **kwargs)
+            response.render()
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        return response, sql
+
+    def test_published_posts_load_only_requested_columns(self) -> None:
+        """Unrequested columns are neither returned nor read."""
+        response, sql = self.get(PublishedPostsAPIView.as_view(), "post/published/?fields=title,id")
+
+        self.assertEqual(response.data["data"], [{"id": self.post.id, "title": "Test title"}])
+        self.assertNotIn('"blog_post"."text"', sql)
+        self.assertNotIn('"blog_post"."rendered_html"', sql)
+
+    def test_post(self) -> None:
+        """A single post can be loaded with some fields."""
+        response, sql = self.get(PostAPIView.as_view(), "posts/?fields=is_published", post_id=self.post.id)
+
+        self.assertEqual(response.data, {"data": {"id": self.post.id, "is_published": True}})
+        self.assertNotIn('"blog_post"."text"', sql)
+
+    def test_list(self) -> None:
+        """ListAPIView selects from the PostSerializer fields."""
+        response, sql = self.get(ListAPIView.as_view(), "post/list/?fields=author")
+
+        self.assertEqual(response.data, [{"id": self.post.id, "author": self.user.id}])
+
+    def test_comments_with_nested_post_fields(self) -> None:
+        """post.<field> selects fields of the embedded post."""
+        response, sql = self.get(ApprovedCommentsAPIView.as_view(), "comments/approved/?fields=author,post.title")
+
+        self.assertEqual(response.data["data"], [
+            {"id": self.comment.id, "post": {"id": self.post.id, "title": "Test title"}, "author": "Test author"}
+        ])
+        self.assertNotIn('"blog_post"."text"', sql)
+        self.assertNotIn('"blog_comment"."text"', sql)
+
+    def test_comments_without_post(self) -> None:
+        """Posts are not loaded when the post field is not requested."""
+        with self.assertNumQueries(3):
+            response, sql = self.get(PostCommentsAPIView.as_view(), "comments/?fields=text", post_id=self.post.id)
+
+        self.assertEqual(response.data["data"], [{"id": self.comment.id, "text": "Test comment"}])
+        self.assertNotIn('"blog_post"."title"', sql)
+
+    def test_unknown_field(self) -> None:
+        """Unknown fields are rejected."""
+        response, sql = self.get(CommentAPIView.as_view(), "comments/?fields=post.secret", comment_id=self.comment.id)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["message"], "Unknown field: post.secret.")
+
+
+class ExcerptModeTestCase(TestCase):
+    """?excerpt= test case."""
+
+    def setUp(self) -> None:
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.long_post = Post.objects.create(
+            author = self.user,
+            title = "Long post",
+            text = "x" * 100,
+            published_date = timezone.now()
+        )
+        self.short_post = Post.objects.create(
+            author = self.user,
+            title = "Short post",
+            text = "short",
+        )
+
+    def get(self, view, url):
+        request = self.request_factory.get(url)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        with CaptureQueriesContext(connection) as context:
+            response = view(request)
+            response.render()
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        return response, sql
+
+    def test_published_posts(self) -> None:
+        """The text is cut in SQL and flagged as truncated."""
+        response, sql = self.get(PublishedPostsAPIView.as_view(), "post/published/?excerpt=10&fields=text")
+
+        self.assertEqual(response.data["data"], [{"id": self.long_post.id, "text": "x" * 10, "truncated": True}])
+        self.assertIn("SUBSTR", sql.upper())
+        # Only read inside SUBSTR() and LENGTH().
+        self.assertNotRegex(sql, r'[^(]"blog_post"\."text"')
+
+    def test_unpublished_posts(self) -> None:
+        """Texts shorter than the excerpt are not truncated."""
+        response, sql = self.get(UnpublishedPostsAPIView.as_view(), "post/unpublished/?excerpt=10")
+
+        data = response.data["data"][0]
+        self.assertEqual((data["text"], data["truncated"]), ("short", False))
+        self.assertEqual(data["excerpt"], self.short_post.excerpt)
+
+    def test_list(self) -> None:
+        """ListAPIView returns the PostSerializer fields with the excerpt."""
+        response, sql = self.get(ListAPIView.as_view(), "post/list/?excerpt=3")
+
+        self.assertEqual(response.data, [
+            {"id": self.long_post.id, "title": "Long post", "text": "xxx", "author": self.user.id, "truncated": True},
+            {"id": self.short_post.id, "title": "Short post", "text": "sho", "author": self.user.id, "truncated": True},
+        ])
+
+    def test_streamed_published_posts(self) -> None:
+        """Streamed lists support excerpts too."""
+        response = PublishedPostsAPIView.as_view()(self.request_factory.get("post/published/?stream=1&excerpt=5"))
+
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual((data[0]["text"], data[0]["truncated"]), ("xxxxx", True))
+
+    def test_invalid_excerpt(self) -> None:
+        """Lengths outside 1..MAX_EXCERPT_LENGTH are rejected."""
+        for value in ("0", "abc", "100000"):
+            response, sql = self.get(PublishedPostsAPIView.as_view(), f"post/published/?excerpt={value}")
+
+            self.assertEqual(response.status_code, 400)
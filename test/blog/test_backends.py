@@ -0,0 +1,56 @@
+import tempfile
+from pathlib import Path
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from mysite.backends.sqlite3.base import DatabaseWrapper
+
+
+class TunedSQLiteBackendTestCase(SimpleTestCase):
+    """mysite.backends.sqlite3 test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_dict = {
+            **connections["default"].settings_dict,
+            "NAME": str(Path(directory.name) / "db.sqlite3"),
+            "OPTIONS": {"pragmas": {"busy_timeout": 1000}},
+        }
+
+    def get_wrapper(self, **options):
+        settings_dict = {**self.settings_dict, "OPTIONS": {**self.settings_dict["OPTIONS"], **options}}
+        wrapper = DatabaseWrapper(settings_dict, alias="tuned")
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pragmas_on_connect(self) -> None:
+        """New connections use WAL, the busy timeout and the other pragmas."""
+        with self.get_wrapper().cursor() as cursor:
+            values = [cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                      for name in ("journal_mode", "synchronous", "busy_timeout")]
+
+        self.assertEqual(values, ["wal", 1, 1000])
+
+    def test_transactions_begin_immediate(self) -> None:
+        """An atomic block holds the write lock from its start."""
+        wrapper = self.get_wrapper()
+        other = self.get_wrapper(pragmas={"busy_timeout": 0}, timeout=0)
+        with wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE item (id INTEGER PRIMARY KEY)")
+
+        # What transaction.atomic() runs on SQLite, before any statement.
+        wrapper._start_transaction_under_autocommit()
+        try:
+            with self.assertRaisesMessage(Exception, "locked"):
+                with other.cursor() as cursor:
+                    cursor.execute("INSERT INTO item DEFAULT VALUES")
+        finally:
+            wrapper.cursor().execute("ROLLBACK")
+
+    def test_invalid_transaction_mode(self) -> None:
+        """Unknown transaction modes are rejected."""
+        with self.assertRaises(ValueError):
+            self.get_wrapper(transaction_mode="LATER").get_connection_params()
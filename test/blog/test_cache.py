@@ -0,0 +1,183 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.api.views import PublishedPostsAPIView
+from blog.cache import TieredCache, bump_content_version, get_content_version, get_post_version, public_cache
+from blog.models import Post, Comment
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PostVersionTestCase(TestCase):
+    """Post fragment cache version test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(
+            author = self.user,
+            title="Test post",
+            text="Test",
+        )
+        self.comment = Comment.objects.create(post=self.post, author="Test author", text="Pending")
+
+    def test_version_bumps_on_publish_approve_and_remove(self) -> None:
+        """Publishing, approving and removing bump the post version."""
+        versions = [get_post_version(self.post.pk)]
+
+        self.post.publish()
+        versions.append(get_post_version(self.post.pk))
+
+        self.comment.approve()
+        versions.append(get_post_version(self.post.pk))
+
+        self.comment.delete()
+        versions.append(get_post_version(self.post.pk))
+
+        self.assertEqual(len(set(versions)), len(versions))
+
+    def test_new_unapproved_comment_keeps_version(self) -> None:
+        """An unapproved comment is invisible to the cached fragments."""
+        version = get_post_version(self.post.pk)
+
+        Comment.objects.create(post=self.post, author="Test author", text="Pending")
+
+        self.assertEqual(get_post_version(self.post.pk), version)
+
+    def test_post_detail_caches_no_body_older_than_its_version(self) -> None:
+        """An edit committed while post_detail runs is shown on the next request."""
+        url = reverse("post_detail", kwargs={"pk": self.post.pk})
+
+        def edit_then_get_version(post_id):
+            if self.post.title != "Edited":
+                self.post.title = "Edited"
+                self.post.save()
+            return get_post_version(post_id)
+
+        with mock.patch("blog.views.get_post_version", edit_then_get_version):
+            self.client.get(url)
+
+        self.assertContains(self.client.get(url), "Edited")
+
+    def test_post_detail_serves_fragments_from_cache(self) -> None:
+        """Anonymous post_detail renders approved comments from the cache."""
+        self.comment.approve()
+        url = reverse("post_detail", kwargs={"pk": self.post.pk})
+
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+
+        self.assertContains(second, "Pending")
+        self.assertEqual(first.content, second.content)
+
+    def test_post_detail_shows_unapproved_comments_to_moderators(self) -> None:
+        """Logged in users always see unapproved comments live."""
+        url = reverse("post_detail", kwargs={"pk": self.post.pk})
+        self.client.get(url)
+
+        Comment.objects.create(post=self.post, author="Test author", text="Fresh comment")
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+
+        self.assertContains(response, "Fresh comment")
+
+
+class PublicCacheTestCase(TestCase):
+    """Two tier public response cache test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        public_cache.clear()
+        public_cache.reset()
+        self.user = User.objects.create(username="testuser", is_staff=True)
+        self.post = Post.objects.create(author=self.user, title="Test post", text="Test")
+        self.post.publish()
+        self.comment = Comment.objects.create(post=self.post, author="Test author", text="Pending")
+
+    def test_repeat_requests_run_no_queries(self) -> None:
+        """The second request is a local hit, a cleared process a shared one."""
+        first = self.client.get("/post/published/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/post/published/")
+        public_cache.clear()
+        with self.assertNumQueries(0):
+            third = self.client.get("/post/published/")
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(third.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        stats = public_cache.get_data()
+        self.assertEqual((stats["local_hits"], stats["shared_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_changes_bump_the_content_version(self) -> None:
+        """Publishing, approving, deleting and bulk creating invalidate at once."""
+        versions = [get_content_version()]
+
+        self.comment.approve()
+        versions.append(get_content_version())
+
+        self.comment.delete()
+        versions.append(get_content_version())
+
+        self.post.delete()
+        versions.append(get_content_version())
+
+        response = self.client.post("/posts/bulk/", [{"author": self.user.pk, "title": "Bulk", "text": "Bulk"}],
+                                    content_type="application/json",
+                                    HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+        self.assertEqual(response.status_code, 201)
+        versions.append(get_content_version())
+
+        self.assertEqual(len(set(versions)), len(versions))
+
+    def test_change_during_build_is_not_cached_as_current(self) -> None:
+        """A list built from rows of the old version is not stored under the new one."""
+        get_response = PublishedPostsAPIView.get_response
+
+        def get_response_then_write(view, *args):
+            response = get_response(view, *args)
+            # A write commits after the rows were read, before the entry is stored.
+            bump_content_version()
+            return response
+
+        with mock.patch.object(PublishedPostsAPIView, "get_response", get_response_then_write):
+            self.client.get("/post/published/")
+
+        self.assertEqual(public_cache.get_data()["misses"], 1)
+        self.client.get("/post/published/")
+        self.assertEqual(public_cache.get_data()["misses"], 2)
+
+    def test_approved_comment_is_shown(self) -> None:
+        """Approving a comment refreshes the cached approved comments."""
+        self.assertEqual(self.client.get("/comments/approved/").json()["count"], 0)
+
+        self.comment.approve()
+
+        self.assertEqual(self.client.get("/comments/approved/").json()["count"], 1)
+
+    def test_local_tier_is_lru(self) -> None:
+        """The least recently used local entry is evicted first."""
+        tiered = TieredCache("test", max_entries=2, timeout=60)
+        for key in ("a", "b", "c"):
+            tiered.set(key, key)
+        tiered.get("b")
+        tiered.set("d", "d")
+
+        self.assertEqual(len(tiered.entries), 2)
+        self.assertEqual(tiered.get("a"), "a")
+        self.assertEqual(tiered.get_data()["shared_hits"], 1)
+
+    def test_stats_are_staff_only(self) -> None:
+        """Only staff see the cache counters."""
+        self.client.get("/post/published/")
+        anonymous = self.client.get("/stats/cache/")
+        staff = self.client.get("/stats/cache/", HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(staff.json()["data"]["misses"], 1)
@@ -0,0 +1,115 @@
+import gzip
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from blog.compression import compression_stats, negotiate_encoding
+from blog.models import Post
+
+
+class NegotiateEncodingTestCase(SimpleTestCase):
+    """Accept-Encoding negotiation test case."""
+
+    def negotiate(self, accept_encoding, encodings=("br", "gzip")):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return negotiate_encoding(request, encodings)
+
+    def test_prefers_brotli(self) -> None:
+        """Brotli wins ties, gzip is used without it."""
+        self.assertEqual(self.negotiate("gzip, deflate, br"), "br")
+        self.assertEqual(self.negotiate("gzip, deflate, br", encodings=("gzip",)), "gzip")
+
+    def test_quality_values(self) -> None:
+        """q-values rank encodings and q=0 refuses them."""
+        self.assertEqual(self.negotiate("br;q=0.5, gzip;q=0.8"), "gzip")
+        self.assertEqual(self.negotiate("*;q=0.1, br;q=0"), "gzip")
+        self.assertIsNone(self.negotiate("gzip;q=0"))
+        self.assertIsNone(self.negotiate(""))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTestCase(TestCase):
+    """Response compression test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        compression_stats.reset()
+        self.user = User.objects.create(username="testuser")
+        for i in range(20):
+            Post.objects.create(author=self.user, title=f"Post {i}", text="Some text " * 20,
+                                published_date=timezone.now())
+        self.headers = {"HTTP_AUTHORIZATION": "Token " + self.user.auth_token.key,
+                        "HTTP_ACCEPT_ENCODING": "gzip"}
+
+    def test_gzip(self) -> None:
+        """Large JSON responses are gzipped and keep a weak ETag."""
+        response = self.client.get("/post/list/", **self.headers)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 20)
+        self.assertLess(compression_stats.get_data()["ratio"], 1)
+
+    def test_small_and_unaccepted_responses_are_not_compressed(self) -> None:
+        """Small bodies and clients without gzip get plain responses."""
+        small = self.client.get("/post/list/?fields=id&excerpt=1", **{**self.headers, "HTTP_ACCEPT_ENCODING": "br"})
+        plain = self.client.get("/post/list/", HTTP_AUTHORIZATION=self.headers["HTTP_AUTHORIZATION"])
+
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(len(plain.json()), 20)
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_pages_are_not_compressed(self) -> None:
+        """HTML carrying a CSRF token is sent as it is, see BREACH."""
+        self.client.force_login(self.user)
+        response = self.client.get("/post/new/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.content), settings.COMPRESSION_MIN_SIZE)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_repeat_request_is_served_precompressed(self) -> None:
+        """A second request for the same version skips serialization and compression."""
+        first = self.client.get("/post/list/", **self.headers)
+        # The token lookup only.
+        with self.assertNumQueries(1):
+            second = self.client.get("/post/list/", **self.headers)
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        data = compression_stats.get_data()
+        self.assertEqual((data["responses"], data["cache_hits"]), (1, 1))
+        self.assertGreater(data["cache_seconds_saved"], 0)
+
+    def test_new_version_is_not_served_from_cache(self) -> None:
+        """An edit changes the ETag and so the cache entry."""
+        self.client.get("/post/list/", **self.headers)
+        Post.objects.create(author=self.user, title="New post", text="Some text " * 20)
+
+        response = self.client.get("/post/list/", **self.headers)
+
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 21)
+        self.assertEqual(compression_stats.get_data()["cache_hits"], 0)
+
+    def test_streaming_responses_are_gzipped(self) -> None:
+        """Streamed lists are compressed as they are sent."""
+        response = self.client.get("/post/list/?stream=1", **self.headers)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(b"".join(response.streaming_content)))), 20)
+
+    def test_stats_api(self) -> None:
+        """Staff can read the compression counters."""
+        staff = User.objects.create(username="staff", is_staff=True)
+        self.client.get("/post/list/", **self.headers)
+
+        response = self.client.get("/stats/compression/", HTTP_AUTHORIZATION="Token " + staff.auth_token.key)
+
+        self.assertEqual(response.json()["data"]["responses"], 1)
@@ -0,0 +1,111 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.feeds import rebuild_feeds
+from blog.jobs import run_due_jobs
+from blog.models import FeedFile, Job, Post
+
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+@override_settings(FEED_LENGTH=3)
+class FeedTestCase(TestCase):
+    """Prerendered Atom and RSS feed test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+        self.posts = []
+        for i in range(4):
+            post = Post.objects.create(author=self.user, title=f"Post {i}", text=f"Text {i}")
+            post.publish()
+            self.posts.append(post)
+        run_due_jobs()
+
+    def get_titles(self, name="posts.atom"):
+        root = ElementTree.fromstring(FeedFile.objects.get(name=name).content)
+        if name == "posts.atom":
+            return [entry.find(f"{ATOM}title").text for entry in root.iter(f"{ATOM}entry")]
+        return [item.find("title").text for item in root.iter("item")]
+
+    def test_publish_writes_the_latest_posts(self) -> None:
+        """Publishing queues a job that writes both feeds, newest first."""
+        self.assertEqual(self.get_titles(), ["Post 3", "Post 2", "Post 1"])
+        self.assertEqual(self.get_titles("posts.rss"), ["Post 3", "Post 2", "Post 1"])
+
+    def test_edit_patches_one_entry(self) -> None:
+        """An edit re-renders only the edited post's entry."""
+        post = self.posts[2]
+        post.title = "Edited"
+        post.save()
+        self.assertEqual(Job.objects.filter(task="blog.feeds.update_post", status=Job.PENDING).count(), 1)
+        # Only the feed job's queries are counted below.
+        Job.objects.exclude(task="blog.feeds.update_post").delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            run_due_jobs()
+
+        self.assertEqual(self.get_titles(), ["Post 3", "Edited", "Post 1"])
+        post_queries = [query["sql"] for query in queries if 'FROM "blog_post"' in query["sql"]]
+        self.assertEqual(len(post_queries), 1)
+
+    def test_deleted_post_is_replaced(self) -> None:
+        """The next older post takes a deleted post's place."""
+        self.posts[3].delete()
+        run_due_jobs()
+
+        self.assertEqual(self.get_titles(), ["Post 2", "Post 1", "Post 0"])
+
+    def test_drafts_queue_nothing(self) -> None:
+        """Saving an unpublished post leaves the feeds alone."""
+        Post.objects.create(author=self.user, title="Draft", text="Text")
+
+        self.assertFalse(Job.objects.filter(status=Job.PENDING).exists())
+
+    def test_unpublished_post_is_replaced(self) -> None:
+        """Unpublishing a post takes it out of the feeds."""
+        post = self.posts[3]
+        post.published_date = None
+        post.save()
+        run_due_jobs()
+
+        self.assertEqual(self.get_titles(), ["Post 2", "Post 1", "Post 0"])
+        self.assertEqual(self.get_titles("posts.rss"), ["Post 2", "Post 1", "Post 0"])
+
+    def test_feed_is_served_from_the_cache(self) -> None:
+        """The feed URL serves the stored document with validators, queries only on a miss."""
+        rebuild_feeds()
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/feeds/posts.atom")
+        with self.assertNumQueries(0):
+            repeated = self.client.get("/feeds/posts.atom")
+        with self.assertNumQueries(0):
+            cached = self.client.get("/feeds/posts.atom", HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response["Content-Type"], "application/atom+xml; charset=utf-8")
+        self.assertEqual(response.content.decode(), FeedFile.objects.get(name="posts.atom").content)
+        self.assertEqual(repeated.content, response.content)
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_rewritten_feed_is_served(self) -> None:
+        """Writing the feeds invalidates the cached document."""
+        self.client.get("/feeds/posts.atom")
+        post = self.posts[3]
+        post.title = "Edited"
+        post.save()
+        run_due_jobs()
+
+        response = self.client.get("/feeds/posts.atom")
+
+        self.assertIn("Edited", response.content.decode())
+
+    def test_entries_are_not_served(self) -> None:
+        """Only the feed documents have a URL."""
+        self.assertEqual(self.client.get("/feeds/entries.json").status_code, 404)
@@ -0,0 +1,152 @@
+import logging
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from blog.jobs import claim_job, enqueue, prune_jobs, run_due_jobs, task
+from blog.models import Job
+
+
+calls = []
+calls_lock = threading.Lock()
+
+
+@task(name="test.record")
+def record(value):
+    with calls_lock:
+        calls.append(value)
+
+
+@task(name="test.fail", max_attempts=2)
+def fail(title):
+    raise RuntimeError("Task failed.")
+
+
+@task(name="test.record_savepoints")
+def record_savepoints():
+    with calls_lock:
+        calls.append(len(connection.savepoint_ids))
+
+
+class JobQueueTestCase(TestCase):
+    """Background job queue test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        calls.clear()
+
+    def test_job_is_queued_with_the_transaction(self) -> None:
+        """A job exists only if the transaction that queued it commits."""
+        try:
+            with transaction.atomic():
+                enqueue(record, args=[1])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        job = enqueue("test.record", args=[2])
+
+        self.assertEqual(list(Job.objects.values_list("pk", flat=True)), [job.pk])
+        self.assertEqual(run_due_jobs(), 1)
+        self.assertEqual(calls, [2])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 1))
+
+    def test_idempotency_key(self) -> None:
+        """A key is queued once while pending and again once a worker took it."""
+        first = enqueue(record, args=[1], key="record")
+        second = enqueue(record, args=[2], key="record")
+        self.assertEqual(first.pk, second.pk)
+
+        claim_job()
+        third = enqueue(record, args=[3], key="record")
+
+        self.assertNotEqual(third.pk, first.pk)
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+
+    def test_unregistered_function_is_rejected(self) -> None:
+        """Only registered tasks can be queued by function."""
+        with self.assertRaises(ValueError):
+            enqueue(print)
+
+    def test_failed_job_is_retried_then_failed(self) -> None:
+        """Failures back off and give up after max_attempts."""
+        job = enqueue(fail, args=["Changed"])
+
+        with self.assertLogs("blog.jobs", "WARNING"):
+            run_due_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn("Task failed.", job.last_error)
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs("blog.jobs", "WARNING"):
+            run_due_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_task_runs_outside_a_transaction(self) -> None:
+        """The worker holds no transaction, and so no write lock, while a task runs."""
+        enqueue(record_savepoints)
+
+        run_due_jobs()
+
+        self.assertEqual(calls, [len(connection.savepoint_ids)])
+
+    def test_finished_jobs_are_pruned(self) -> None:
+        """Done and failed jobs are deleted once they are old enough, pending ones never."""
+        old = timezone.now() - timedelta(days=8)
+        done = enqueue(record, args=[1])
+        failed = enqueue(record, args=[2])
+        recent = enqueue(record, args=[3])
+        pending = enqueue(record, args=[4])
+        Job.objects.filter(pk=done.pk).update(status=Job.DONE, finished_date=old)
+        Job.objects.filter(pk=failed.pk).update(status=Job.FAILED, finished_date=old)
+        Job.objects.filter(pk=recent.pk).update(status=Job.DONE, finished_date=timezone.now())
+        Job.objects.filter(pk=pending.pk).update(created_date=old)
+
+        self.assertEqual(prune_jobs(batch_size=1), 2)
+        self.assertEqual(set(Job.objects.values_list("pk", flat=True)), {recent.pk, pending.pk})
+
+    def test_abandoned_job_is_run_again(self) -> None:
+        """A running job whose lease expired is claimed again, or failed when out of attempts."""
+        job = enqueue(record, args=[1])
+        claim_job()
+        self.assertIsNone(claim_job())
+
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_due_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, calls), (Job.DONE, 2, [1]))
+
+        lost = enqueue(record, args=[2], max_attempts=1)
+        claim_job()
+        Job.objects.filter(pk=lost.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_due_jobs(), 0)
+        lost.refresh_from_db()
+        self.assertEqual(lost.status, Job.FAILED)
+
+
+@override_settings(JOB_RETRY_DELAY=0, JOB_LEASE_SECONDS=0)
+class RunWorkerTestCase(TransactionTestCase):
+    """runworker command test case."""
+
+    def test_burst(self) -> None:
+        """Worker threads run every job and exit."""
+        calls.clear()
+        for i in range(20):
+            enqueue(record, args=[i])
+        # The in-memory test database reports lock contention as errors, the
+        # jobs they interrupt are taken over at once without a lease.
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+        call_command("runworker", threads=3, burst=True, stdout=StringIO())
+
+        self.assertEqual(set(calls), set(range(20)))
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 20)
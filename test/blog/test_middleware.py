@@ -0,0 +1,97 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from blog.api.async_views import AsyncPostAPIView
+from blog.middleware import SQLInstrumentationMiddleware, route_stats
+from blog.models import Post
+
+
+class SQLInstrumentationTestCase(TestCase):
+    """SQL instrumentation middleware test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        route_stats.reset()
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(
+            author = self.user,
+            title="Test post",
+            text="Test",
+            published_date=timezone.now(),
+        )
+        self.staff = User.objects.create(username="staff", is_staff=True)
+
+    def test_server_timing_header(self) -> None:
+        """Responses report the query count and database time."""
+        response = self.client.get(f"/post/{self.post.pk}/comments/",
+                                   HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+
+        self.assertRegex(response["Server-Timing"],
+                         r'^db;dur=[\d.]+;desc="4 queries", db-slowest;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_stats_are_aggregated_per_route(self) -> None:
+        """Requests to the same route share one aggregate."""
+        for i in range(3):
+            self.client.get("/post/published/")
+
+        response = self.client.get("/stats/sql/", HTTP_AUTHORIZATION="Token " + self.staff.auth_token.key)
+
+        stats = {item["route"]: item for item in response.data["data"]}
+        self.assertEqual(stats["GET /post/published/"]["requests"], 3)
+        # Only the first request queries, later ones are served from the public cache.
+        self.assertEqual(stats["GET /post/published/"]["max_queries"], 2)
+        self.assertAlmostEqual(stats["GET /post/published/"]["avg_queries"], 2 / 3, places=2)
+        self.assertTrue(stats["GET /post/published/"]["slowest_query"].startswith("SELECT"))
+
+    def test_stats_are_staff_only(self) -> None:
+        """Non-staff users get no stats."""
+        response = self.client.get("/stats/sql/", HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_stats_reset(self) -> None:
+        """DELETE clears the aggregates."""
+        self.client.get("/post/published/")
+
+        self.client.delete("/stats/sql/", HTTP_AUTHORIZATION="Token " + self.staff.auth_token.key)
+
+        routes = [item["route"] for item in route_stats.get_data()]
+        self.assertEqual(routes, ["DELETE /stats/sql/"])
+
+
+class AsyncSQLInstrumentationTestCase(TransactionTestCase):
+    """SQL instrumentation of async views test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(author=self.user, title="Test post", text="Test")
+
+    def test_queries_on_worker_threads_are_recorded(self) -> None:
+        """Queries the async views run on the database pool count for the request: token, validators, post."""
+        async def get_response(request):
+            return await AsyncPostAPIView.as_view()(request, post_id=self.post.pk)
+
+        middleware = SQLInstrumentationMiddleware(get_response)
+        request = RequestFactory().get(f"/async/posts/{self.post.pk}/",
+                                       HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+
+        response = async_to_sync(middleware)(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+
+    def test_sync_view(self) -> None:
+        """Sync views are recorded on the request thread."""
+        def get_response(request):
+            Post.objects.count()
+            return HttpResponse()
+
+        response = SQLInstrumentationMiddleware(get_response)(RequestFactory().get("/"))
+
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
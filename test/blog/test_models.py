@@ -1,9 +1,12 @@
+from io import StringIO
 from pickle import TRUE
 from django.utils import timezone
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth.models import User
 
+from blog.cache import get_content_version, get_post_version
 from blog.models import Post, Comment
 
 
@@ -102,4 +105,100 @@ class CommentModelTestCase(TestCase):
         expected = comment.text
 
         self.assertEqual(comment.__str__(), expected)
-        self.assertEqual(str(comment), expected) 
\ No newline at end of file
+        self.assertEqual(str(comment), expected) 
+
+class ApprovedCommentCountTestCase(TestCase):
+    """Post.approved_comment_count test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(
+            author = self.user,
+            title="Test post",
+            text="Test",
+        )
+
+    def get_count(self) -> int:
+        self.post.refresh_from_db()
+        return self.post.approved_comment_count
+
+    def test_count_follows_create_approve_and_delete(self) -> None:
+        """Creating, approving and deleting comments updates the counter."""
+        Comment.objects.create(post=self.post, author="Test author", text="Approved", approved_comment=True)
+        comment = Comment.objects.create(post=self.post, author="Test author", text="Pending")
+        self.assertEqual(self.get_count(), 1)
+
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.approve()
+        comment.approve()
+        self.assertEqual(self.get_count(), 2)
+
+        comment.delete()
+        self.assertEqual(self.get_count(), 1)
+
+        Comment.objects.all().delete()
+        self.assertEqual(self.get_count(), 0)
+
+    def test_concurrent_approvals_count_once(self) -> None:
+        """Two copies of a pending comment approved one after the other count once."""
+        comment = Comment.objects.create(post=self.post, author="Test author", text="Pending")
+        first = Comment.objects.get(pk=comment.pk)
+        second = Comment.objects.get(pk=comment.pk)
+
+        first.approve()
+        second.approve()
+
+        self.assertEqual(self.get_count(), 1)
+
+    def test_post_save_keeps_concurrent_count(self) -> None:
+        """Saving a post loaded before an approval does not write back its count."""
+        post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=self.post, author="Test author", text="Approved", approved_comment=True)
+
+        post.title = "Edited"
+        post.save()
+
+        self.assertEqual(self.get_count(), 1)
+        self.assertEqual(self.post.title, "Edited")
+
+    def test_recountcomments_command_fixes_counts(self) -> None:
+        """recountcomments recomputes a drifted counter."""
+        Comment.objects.create(post=self.post, author="Test author", text="Approved", approved_comment=True)
+        Post.objects.filter(pk=self.post.pk).update(approved_comment_count=7)
+
+        call_command("recountcomments", stdout=StringIO())
+
+        self.assertEqual(self.get_count(), 1)
+
+
+class RenderedPostTestCase(TestCase):
+    """Post.rendered_html and Post.excerpt test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+
+    def test_save_renders_text(self) -> None:
+        """Saving a post stores its escaped HTML and excerpt."""
+        post = Post.objects.create(author=self.user, title="Test post", text="<b>Hi</b>\nthere" + "x" * 300)
+
+        self.assertTrue(post.rendered_html.startswith("&lt;b&gt;Hi&lt;/b&gt;<br>there"))
+        self.assertEqual(len(post.excerpt), Post.EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.endswith("…"))
+
+    def test_renderposts_command_backfills_posts(self) -> None:
+        """renderposts fills posts saved without rendered text."""
+        post = Post.objects.create(author=self.user, title="Test post", text="Line one\nLine two")
+        Post.objects.filter(pk=post.pk).update(rendered_html="", excerpt="")
+
+        post_version = get_post_version(post.pk)
+        content_version = get_content_version()
+
+        call_command("renderposts", stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.rendered_html, "Line one<br>Line two")
+        self.assertEqual(post.excerpt, "Line one\nLine two")
+        self.assertNotEqual(get_post_version(post.pk), post_version)
+        self.assertNotEqual(get_content_version(), content_version)
@@ -0,0 +1,129 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from blog.middleware import PrerenderedPageMiddleware
+from blog.models import Post, Comment
+
+
+@override_settings(POSTS_PER_PAGE=2, STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PrerenderTestCase(TestCase):
+    """Static pre-rendering test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.root = Path(directory) / "prerendered"
+        settings = override_settings(PRERENDER_ROOT=self.root, PRERENDER_MANIFEST=Path(directory) / "manifest.json")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create(username="testuser")
+        self.posts = []
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title=f"Post {i}", text=f"Text {i}")
+            post.publish()
+            self.posts.append(post)
+        self.draft = Post.objects.create(author=self.user, title="Draft", text="Text")
+
+    def prerender(self, *args):
+        out = StringIO()
+        call_command("prerender", *args, processes=1, stdout=out)
+        return out.getvalue()
+
+    def test_renders_published_pages(self) -> None:
+        """Post pages and index pages are written as the live views render them."""
+        self.assertIn("Rendered 5 of 5 pages", self.prerender())
+
+        files = sorted(str(path.relative_to(self.root)) for path in self.root.rglob("index.html"))
+        self.assertEqual(files, ["index.html", "page/2/index.html"] + [
+            f"post/{post.pk}/index.html" for post in self.posts
+        ])
+        live = self.client.get(f"/post/{self.posts[0].pk}/", HTTP_COOKIE="sessionid=none")
+        self.assertEqual((self.root / f"post/{self.posts[0].pk}/index.html").read_bytes(), live.content)
+
+    def test_only_changed_pages_are_rendered(self) -> None:
+        """Approving a comment renders its post and the index pages again."""
+        self.prerender()
+        self.assertIn("Rendered 0 of 5 pages", self.prerender())
+
+        comment = Comment.objects.create(post=self.posts[1], author="Reader", text="Nice")
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.approve()
+        self.assertFalse((self.root / f"post/{self.posts[1].pk}/index.html").exists())
+
+        self.assertIn("Rendered 3 of 5 pages", self.prerender())
+        self.assertIn("Nice", (self.root / f"post/{self.posts[1].pk}/index.html").read_text())
+
+    def test_deleted_post_is_removed(self) -> None:
+        """Pages of deleted posts and surplus index pages go away."""
+        self.prerender()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[2].delete()
+
+        self.assertIn("removed 2", self.prerender())
+        self.assertFalse((self.root / "page/2/index.html").exists())
+        self.assertEqual(self.client.get(f"/post/{self.posts[2].pk}/").status_code, 404)
+
+    def test_unpublished_post_is_removed(self) -> None:
+        """Unpublishing a post removes its page and the index pages at once."""
+        self.prerender()
+        post = self.posts[2]
+        post.published_date = None
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+
+        self.assertFalse((self.root / f"post/{post.pk}/index.html").exists())
+        self.assertFalse((self.root / "index.html").exists())
+        self.assertNotIn(post.title, self.client.get("/").content.decode())
+
+    def test_served_to_anonymous_visitors_only(self) -> None:
+        """Visitors without a session get the static page without a query."""
+        self.prerender()
+
+        with self.assertNumQueries(0):
+            static = self.client.get("/page/2/")
+        live = self.client.get("/page/2/", HTTP_COOKIE="sessionid=none")
+
+        self.assertEqual(b"".join(static.streaming_content), live.content)
+        self.assertEqual(self.client.get("/page/3/", HTTP_COOKIE="sessionid=none").status_code, 404)
+
+    def test_bulk_moderation_removes_pages(self) -> None:
+        """Comments approved in bulk send no post_save but still clear their posts' pages."""
+        self.prerender()
+        Comment.objects.create(post=self.posts[0], author="Reader", text="Nice")
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.filter(author="Reader").approve()
+
+        self.assertFalse((self.root / f"post/{self.posts[0].pk}/index.html").exists())
+        self.assertTrue((self.root / f"post/{self.posts[1].pk}/index.html").exists())
+        self.assertIn("Rendered 3 of 5 pages", self.prerender())
+
+    def test_index_lists_newest_first(self) -> None:
+        """The first index page shows the latest posts, static or live."""
+        self.prerender()
+
+        static = b"".join(self.client.get("/").streaming_content).decode()
+        live = self.client.get("/", HTTP_COOKIE="sessionid=none").content.decode()
+
+        for page in (static, live):
+            self.assertLess(page.index("Post 2"), page.index("Post 1"))
+            self.assertNotIn("Post 0", page)
+
+    def test_other_urls_skip_the_disk(self) -> None:
+        """Only the URLs of prerendered pages are looked up in PRERENDER_ROOT."""
+        self.prerender()
+
+        with mock.patch.object(PrerenderedPageMiddleware, "find_file", return_value=None) as find_file:
+            self.client.get("/post/published/")
+            self.client.get("/admin/login/")
+            self.assertFalse(find_file.called)
+            self.client.get(f"/post/{self.posts[0].pk}/")
+        find_file.assert_called_once_with(f"/post/{self.posts[0].pk}/")
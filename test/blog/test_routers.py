@@ -0,0 +1,98 @@
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from blog.cache import CONTENT_CHANGED_KEY, bump_content_version
+from blog.middleware import ReplicaPinningMiddleware
+from blog.models import Post
+from blog.routers import PrimaryReplicaRouter
+
+
+@override_settings(REPLICA_DATABASES=["replica1"])
+class PrimaryReplicaRouterTestCase(SimpleTestCase):
+    """Read replica router test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.request_factory = RequestFactory()
+
+    def call(self, request, view):
+        """Run a view through the pinning middleware, recording where it read."""
+        reads = []
+
+        def get_response(request):
+            reads.append(self.router.db_for_read(Post))
+            view()
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(get_response)(request)
+        return reads, response
+
+    def test_reads_outside_requests_use_primary(self) -> None:
+        """Management commands and the shell are never routed to a replica."""
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_safe_request_reads_from_replica(self) -> None:
+        """GET requests that do not write read from a replica."""
+        reads, response = self.call(self.request_factory.get("/"), lambda: None)
+
+        self.assertEqual(reads, ["replica1", "replica1"])
+        self.assertNotIn("replica_pin", response.cookies)
+
+    def test_write_pins_request_and_client(self) -> None:
+        """After a write the request and the client's next requests use the primary."""
+        reads, response = self.call(self.request_factory.get("/"), lambda: self.router.db_for_write(Post))
+
+        self.assertEqual(reads, ["replica1", "default"])
+        self.assertEqual(response.cookies["replica_pin"]["max-age"], 5)
+
+        request = self.request_factory.get("/")
+        request.COOKIES["replica_pin"] = "1"
+        reads, response = self.call(request, lambda: None)
+        self.assertEqual(reads, ["default", "default"])
+
+    def test_write_pins_token_client(self) -> None:
+        """Clients without cookies are pinned by their Authorization header."""
+        request = self.request_factory.get("/", HTTP_AUTHORIZATION="Token abc")
+        self.call(request, lambda: self.router.db_for_write(Post))
+
+        reads, response = self.call(self.request_factory.get("/", HTTP_AUTHORIZATION="Token abc"), lambda: None)
+        self.assertEqual(reads, ["default", "default"])
+
+        reads, response = self.call(self.request_factory.get("/", HTTP_AUTHORIZATION="Token xyz"), lambda: None)
+        self.assertEqual(reads, ["replica1", "replica1"])
+
+    def test_content_change_pins_every_request(self) -> None:
+        """Right after a content change no request fills the cache from a replica."""
+        bump_content_version()
+
+        reads, response = self.call(self.request_factory.get("/"), lambda: None)
+        self.assertEqual(reads, ["default", "default"])
+
+        cache.set(CONTENT_CHANGED_KEY, time.time() - 6, timeout=None)
+        reads, response = self.call(self.request_factory.get("/"), lambda: None)
+        self.assertEqual(reads, ["replica1", "replica1"])
+
+    def test_unsafe_methods_use_primary(self) -> None:
+        """POST requests never read from a replica."""
+        reads, response = self.call(self.request_factory.post("/"), lambda: None)
+
+        self.assertEqual(reads, ["default", "default"])
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self) -> None:
+        """Without replicas everything uses the primary and no cookie is set."""
+        reads, response = self.call(self.request_factory.get("/"), lambda: self.router.db_for_write(Post))
+
+        self.assertEqual(reads, ["default", "default"])
+        self.assertNotIn("replica_pin", response.cookies)
+
+    def test_replicas_are_not_migrated(self) -> None:
+        """Migrations only run on the primary."""
+        self.assertIs(self.router.allow_migrate("replica1", "blog"), False)
+        self.assertIsNone(self.router.allow_migrate("default", "blog"))
@@ -0,0 +1,142 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from blog.api.views import SearchAPIView
+from blog.jobs import run_due_jobs
+from blog.models import Job, Post, SearchPosting, SearchStats, SearchTerm
+from blog.search import search, tokenize
+
+
+class SearchIndexTestCase(TestCase):
+    """Search index test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+
+    def create_post(self, title, text, published=True) -> Post:
+        return Post.objects.create(
+            author = self.user,
+            title = title,
+            text = text,
+            published_date = timezone.now() if published else None
+        )
+
+    def get_ids(self, query) -> list:
+        run_due_jobs()
+        return [post_id for post_id, score in search(query)]
+
+    def test_tokenize_drops_stop_words_and_case(self) -> None:
+        """Terms are lowercased words without stop words."""
+        self.assertEqual(tokenize("The Django ORM, and a cache!"), ["django", "orm", "cache"])
+
+    def test_only_published_posts_are_found(self) -> None:
+        """Drafts are indexed once they are published."""
+        draft = self.create_post("Python tips", "Generators everywhere", published=False)
+        self.assertEqual(self.get_ids("generators"), [])
+
+        draft.publish()
+        self.assertEqual(self.get_ids("generators"), [draft.id])
+
+    def test_ranking_prefers_more_relevant_posts(self) -> None:
+        """Posts mentioning the terms more often, or in the title, rank higher."""
+        once = self.create_post("Cooking", "A note about caching and soup")
+        title = self.create_post("Caching", "A note about soup")
+        often = self.create_post("Notes", "caching caching caching soup")
+        self.create_post("Unrelated", "Nothing to see")
+
+        ids = self.get_ids("caching")
+
+        self.assertEqual(ids[0], often.id)
+        self.assertEqual(set(ids), {once.id, title.id, often.id})
+        self.assertLess(ids.index(title.id), ids.index(once.id))
+
+    def test_edit_and_delete_update_the_index(self) -> None:
+        """Editing reindexes a post and deleting removes it."""
+        post = self.create_post("Databases", "Indexes make queries fast")
+        post.text = "Replicas make reads scale"
+        post.save()
+
+        self.assertEqual(self.get_ids("indexes"), [])
+        self.assertEqual(self.get_ids("replicas"), [post.id])
+
+        post.delete()
+        self.assertEqual(self.get_ids("replicas"), [])
+        self.assertEqual(SearchStats.objects.get(pk=1).document_count, 0)
+        self.assertFalse(SearchTerm.objects.filter(document_frequency__gt=0).exists())
+
+    def test_saving_queues_indexing(self) -> None:
+        """Saving a post leaves the indexing to a job."""
+        post = self.create_post("Queued", "Indexed later")
+
+        self.assertFalse(SearchPosting.objects.filter(post=post).exists())
+        self.assertTrue(Job.objects.filter(idempotency_key=f"search:post:{post.pk}", status=Job.PENDING).exists())
+        self.assertEqual(self.get_ids("later"), [post.id])
+
+    def test_top_k_reads_few_postings(self) -> None:
+        """A common term is ranked from the first blocks of its posting list."""
+        for i in range(60):
+            self.create_post(f"Post {i}", "common " * (i % 7 + 1) + "word " * (i % 5))
+        run_due_jobs()
+        # One block holds every posting, nothing is pruned.
+        exhaustive = search("common word", limit=60)
+
+        with mock.patch("blog.search.SEARCH_BLOCK_SIZE", 5), CaptureQueriesContext(connection) as queries:
+            top = search("common word", limit=3)
+
+        self.assertEqual([post_id for post_id, score in top], [post_id for post_id, score in exhaustive[:3]])
+        self.assertLess(len(queries), 10)
+
+    def test_rebuild_command_matches_incremental_index(self) -> None:
+        """rebuildsearchindex builds the same postings and statistics."""
+        self.create_post("Databases", "Indexes make queries fast")
+        self.create_post("Caching", "Caches make reads fast")
+        self.create_post("Draft", "Not yet", published=False)
+        run_due_jobs()
+        expected_postings = sorted(SearchPosting.objects.values_list("post_id", "term__term", "term_frequency"))
+        expected_frequencies = dict(SearchTerm.objects.filter(document_frequency__gt=0).values_list("term", "document_frequency"))
+        expected_stats = SearchStats.objects.values("document_count", "total_length").get(pk=1)
+
+        call_command("rebuildsearchindex", stdout=StringIO())
+
+        self.assertEqual(sorted(SearchPosting.objects.values_list("post_id", "term__term", "term_frequency")), expected_postings)
+        self.assertEqual(dict(SearchTerm.objects.values_list("term", "document_frequency")), expected_frequencies)
+        self.assertEqual(SearchStats.objects.values("document_count", "total_length").get(pk=1), expected_stats)
+
+
+class SearchAPIViewTestCase(TestCase):
+    """SearchAPIView test case."""
+
+    def setUp(self) -> None:
+        self.view = SearchAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        user = User.objects.create(username="testuser")
+        for i in range(3):
+            Post.objects.create(author = user, title = "Search %d" % i, text = "Test post", published_date = timezone.now())
+        run_due_jobs()
+
+    def test_get_method_pages_results(self) -> None:
+        """GET method returns ranked pages of matching posts."""
+        response = self.view(self.request_factory.get("search/", {"q": "search", "page_size": 2}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["page_size"], 2)
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.view(self.request_factory.get(response.data["next"]))
+        self.assertEqual(response.data["page_size"], 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_get_method_requires_query(self) -> None:
+        """GET method without ?q= returns 400."""
+        response = self.view(self.request_factory.get("search/"))
+
+        self.assertEqual(response.status_code, 400)